@@ -0,0 +1,262 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Any, Callable, Optional, Tuple
+import numpy as np
+from .engine import GA, GAConfig, GAState, FitnessFn
+if TYPE_CHECKING:
+    from .local_search import LocalSearch
+
+Bounds = Tuple[np.ndarray, np.ndarray]
+
+class _ContinuousEngine(GA):
+    """Shared plumbing for real-vector optimizers that reuse the GA run loop.
+
+    Populations are (pop_size, dim) arrays sampled from ``self.rng``, so
+    stopping rules, history, callbacks, the worker pool, the fitness cache and
+    islands all behave as in ``GA``; subclasses only override
+    ``_next_generation``.
+    """
+    def __init__(
+        self,
+        fitness_fn: FitnessFn,
+        bounds: Bounds,
+        config: GAConfig,
+        local_search: Optional["LocalSearch"] = None,
+        on_generation: Optional[Callable[[GAState], Any]] = None,
+        on_improvement: Optional[Callable[[GAState], Any]] = None,
+    ):
+        super().__init__(fitness_fn, None, None, None, None, config, local_search, on_generation, on_improvement)
+        self.lo = np.asarray(bounds[0], dtype=float)
+        self.hi = np.asarray(bounds[1], dtype=float)
+
+    def _init_population(self) -> np.ndarray:
+        return self.rng.uniform(self.lo, self.hi, size=(self.cfg.pop_size, len(self.lo)))
+
+    def _order(self, fits: np.ndarray) -> np.ndarray:
+        return np.argsort(fits, kind="stable") if self.cfg.minimize else np.argsort(-fits, kind="stable")
+
+# ---------------- Differential evolution ----------------
+DE_STRATEGIES = ("rand/1/bin", "best/1/bin", "current-to-best/1/bin")
+
+class DifferentialEvolution(_ContinuousEngine):
+    """Vectorized DE: every trial vector of a generation is built with array ops.
+
+    ``F`` scales difference vectors, ``CR`` is the binomial crossover rate.
+    Trials leaving ``bounds`` are bounced back halfway between the parent and
+    the violated bound. A trial replaces its parent when it is at least as good.
+    """
+    def __init__(
+        self,
+        fitness_fn: FitnessFn,
+        bounds: Bounds,
+        config: GAConfig,
+        F: float = 0.5,
+        CR: float = 0.9,
+        strategy: str = "rand/1/bin",
+        local_search: Optional["LocalSearch"] = None,
+        on_generation: Optional[Callable[[GAState], Any]] = None,
+        on_improvement: Optional[Callable[[GAState], Any]] = None,
+    ):
+        if strategy not in DE_STRATEGIES:
+            raise ValueError(f"Unknown DE strategy: {strategy}")
+        if config.pop_size < 4:
+            raise ValueError("DifferentialEvolution needs pop_size >= 4")
+        super().__init__(fitness_fn, bounds, config, local_search, on_generation, on_improvement)
+        self.F = float(F)
+        self.CR = float(CR)
+        self.strategy = strategy
+
+    def _donors(self, n: int) -> np.ndarray:
+        # three distinct indices per row, all different from the row itself
+        keys = self.rng.random((n, n))
+        keys[np.arange(n), np.arange(n)] = np.inf
+        return np.argpartition(keys, 3, axis=1)[:, :3]
+
+    def _next_generation(self, state: GAState):
+        lap = self._timer.lap
+        X, fits = state.pop, state.fits
+        n, dim = X.shape
+        r = self._donors(n)
+        if self.strategy == "rand/1/bin":
+            mutant = X[r[:, 0]] + self.F * (X[r[:, 1]] - X[r[:, 2]])
+        else:
+            best = X[self._best_index(fits)]
+            base = best if self.strategy == "best/1/bin" else X + self.F * (best - X)
+            mutant = base + self.F * (X[r[:, 0]] - X[r[:, 1]])
+        lap("mutate")
+        cross = self.rng.random((n, dim)) < self.CR
+        cross[np.arange(n), self.rng.integers(0, dim, size=n)] = True  # at least one gene from the mutant
+        trial = np.where(cross, mutant, X)
+        trial = np.where(trial < self.lo, (X + self.lo) / 2, trial)
+        trial = np.where(trial > self.hi, (X + self.hi) / 2, trial)
+        lap("crossover")
+        trial_fits = self._eval_pop(trial)
+        lap("evaluate")
+        keep = (trial_fits <= fits) if self.cfg.minimize else (trial_fits >= fits)
+        state.pop = np.where(keep[:, None], trial, X)
+        state.fits = np.where(keep, trial_fits, fits)
+        lap("select")
+
+# ---------------- CMA-ES ----------------
+def cmaes_pop_size(dim: int) -> int:
+    """Default CMA-ES offspring count, 4 + floor(3 ln dim)."""
+    return 4 + int(3 * np.log(max(dim, 1)))
+
+class CMAES(_ContinuousEngine):
+    """(mu/mu_w, lambda)-CMA-ES with lambda = ``config.pop_size``.
+
+    Each generation first adapts the search distribution (mean, step size,
+    covariance) from the previous evaluated samples, then draws and evaluates
+    a new batch. ``diagonal=True`` learns only the covariance diagonal
+    (sep-CMA-ES): O(dim) per sample instead of O(dim^2) and no
+    eigendecompositions, which is the better choice for dim in the hundreds
+    or more. Samples are clipped to ``bounds`` and the update uses the clipped
+    points, so injected migrants are handled the same way.
+
+    ``restarts > 0`` enables IPOP: once the distribution has converged (step
+    size collapsed or fitness flat over recent generations) the search
+    restarts from a new random mean with twice the population, which is what
+    multimodal landscapes like rastrigin need. Give ``stall_generations``
+    room for the restarts when using it.
+    """
+    def __init__(
+        self,
+        fitness_fn: FitnessFn,
+        bounds: Bounds,
+        config: GAConfig,
+        sigma0: Optional[float] = None,
+        x0: Optional[np.ndarray] = None,
+        diagonal: bool = False,
+        restarts: int = 0,
+        local_search: Optional["LocalSearch"] = None,
+        on_generation: Optional[Callable[[GAState], Any]] = None,
+        on_improvement: Optional[Callable[[GAState], Any]] = None,
+    ):
+        if config.pop_size < 2:
+            raise ValueError("CMAES needs pop_size >= 2")
+        super().__init__(fitness_fn, bounds, config, local_search, on_generation, on_improvement)
+        self.diagonal = diagonal
+        self.sigma0 = float(sigma0) if sigma0 is not None else 0.3 * float(np.max(self.hi - self.lo))
+        self.restarts = int(restarts)
+        self.n_restarts = 0
+        self._reset(config.pop_size, None if x0 is None else np.asarray(x0, dtype=float))
+
+    def _reset(self, lam: int, mean: Optional[np.ndarray]):
+        n = len(self.lo)
+        self.lam = lam
+        self.mu = lam // 2
+        w = np.log(self.mu + 0.5) - np.log(np.arange(1, self.mu + 1))
+        self.weights = w / w.sum()
+        self.mueff = 1.0 / np.sum(self.weights ** 2)
+        mueff = self.mueff
+        self.cc = (4 + mueff / n) / (n + 4 + 2 * mueff / n)
+        self.cs = (mueff + 2) / (n + mueff + 5)
+        self.c1 = 2 / ((n + 1.3) ** 2 + mueff)
+        self.cmu = min(1 - self.c1, 2 * (mueff - 2 + 1 / mueff) / ((n + 2) ** 2 + mueff))
+        if self.diagonal:
+            # sep-CMA-ES learning rates
+            self.c1 = min(1.0, self.c1 * (n + 2) / 3)
+            self.cmu = min(1 - self.c1, self.cmu * (n + 2) / 3)
+        self.damps = 1 + 2 * max(0.0, np.sqrt((mueff - 1) / (n + 1)) - 1) + self.cs
+        self.chi_n = np.sqrt(n) * (1 - 1 / (4 * n) + 1 / (21 * n ** 2))
+        # refresh B, D every few generations so the O(n^3) eigendecomposition stays amortized
+        self.eigen_every = max(1, int(1 / ((self.c1 + self.cmu) * n * 10)))
+        self.sigma = self.sigma0
+        self.mean = mean
+        self.pc = np.zeros(n)
+        self.ps = np.zeros(n)
+        self.C = np.ones(n) if self.diagonal else np.eye(n)
+        self.B = None if self.diagonal else np.eye(n)
+        self.D = np.ones(n)  # square roots of the eigenvalues (or of the diagonal)
+        self._updates = 0
+        self._recent = []  # best fitness of recent generations, for the flat-fitness test
+        self._window = 10 + int(np.ceil(30 * n / lam))
+
+    def _converged(self, fits: np.ndarray) -> bool:
+        self._recent.append(float(np.min(fits) if self.cfg.minimize else np.max(fits)))
+        del self._recent[:-self._window]
+        if self.sigma * np.max(self.D) < 1e-12 * self.sigma0:
+            return True
+        if np.max(self.D) > 1e7 * np.min(self.D):
+            return True
+        if len(self._recent) == self._window:
+            spread = max(np.ptp(self._recent), np.ptp(fits))
+            return spread <= 1e-9 * max(1.0, abs(self._recent[-1]))
+        return False
+
+    def _sample(self) -> np.ndarray:
+        z = self.rng.standard_normal((self.lam, len(self.lo)))
+        y = z * self.D if self.diagonal else (z * self.D) @ self.B.T
+        return np.clip(self.mean + self.sigma * y, self.lo, self.hi)
+
+    def _init_population(self) -> np.ndarray:
+        if self.mean is None:
+            self.mean = self.rng.uniform(self.lo, self.hi)
+        return self._sample()
+
+    def _adapt(self, X: np.ndarray, fits: np.ndarray):
+        n = len(self.lo)
+        y = (X[self._order(fits)[: self.mu]] - self.mean) / self.sigma
+        yw = self.weights @ y
+        self.mean = self.mean + self.sigma * yw
+        if self.diagonal:
+            c_inv_sqrt_yw = yw / self.D
+        else:
+            c_inv_sqrt_yw = self.B @ ((self.B.T @ yw) / self.D)
+        self.ps = (1 - self.cs) * self.ps + np.sqrt(self.cs * (2 - self.cs) * self.mueff) * c_inv_sqrt_yw
+        self._updates += 1
+        ps_norm = np.linalg.norm(self.ps)
+        hsig = ps_norm / np.sqrt(1 - (1 - self.cs) ** (2 * self._updates)) / self.chi_n < 1.4 + 2 / (n + 1)
+        self.pc = (1 - self.cc) * self.pc + hsig * np.sqrt(self.cc * (2 - self.cc) * self.mueff) * yw
+        decay = 1 - self.c1 - self.cmu + (1 - hsig) * self.c1 * self.cc * (2 - self.cc)
+        if self.diagonal:
+            self.C = decay * self.C + self.c1 * self.pc ** 2 + self.cmu * (self.weights @ y ** 2)
+            self.D = np.sqrt(np.maximum(self.C, 1e-20))
+        else:
+            self.C = decay * self.C + self.c1 * np.outer(self.pc, self.pc) + self.cmu * (y.T * self.weights) @ y
+            if self._updates % self.eigen_every == 0:
+                C = np.triu(self.C) + np.triu(self.C, 1).T
+                eig, self.B = np.linalg.eigh(C)
+                self.D = np.sqrt(np.maximum(eig, 1e-20))
+        self.sigma *= np.exp((self.cs / self.damps) * (ps_norm / self.chi_n - 1))
+
+    def _next_generation(self, state: GAState):
+        lap = self._timer.lap
+        self._adapt(state.pop, state.fits)
+        if self.n_restarts < self.restarts and self._converged(state.fits):
+            self.n_restarts += 1
+            self._reset(2 * self.lam, self.rng.uniform(self.lo, self.hi))
+        lap("adapt")
+        state.pop = self._sample()
+        lap("mutate")
+        state.fits = self._eval_pop(state.pop)
+        lap("evaluate")
+
+    # ---- checkpointing: the search distribution lives outside GAState ----
+    def _checkpoint_arrays(self, state: GAState) -> dict:
+        arrays = super()._checkpoint_arrays(state)
+        arrays.update({
+            "cma_lam": np.asarray(self.lam),
+            "cma_mean": self.mean,
+            "cma_sigma": np.asarray(self.sigma),
+            "cma_C": self.C,
+            "cma_D": self.D,
+            "cma_pc": self.pc,
+            "cma_ps": self.ps,
+            "cma_updates": np.asarray(self._updates),
+            "cma_recent": np.asarray(self._recent, dtype=float),
+            "cma_restarts": np.asarray(self.n_restarts),
+        })
+        if self.B is not None:
+            arrays["cma_B"] = self.B
+        return arrays
+
+    def _restore_checkpoint(self, z):
+        self._reset(int(z["cma_lam"]), z["cma_mean"].copy())  # strategy constants follow from lambda
+        self.sigma = float(z["cma_sigma"])
+        self.C, self.D = z["cma_C"].copy(), z["cma_D"].copy()
+        self.pc, self.ps = z["cma_pc"].copy(), z["cma_ps"].copy()
+        if "cma_B" in z.files:
+            self.B = z["cma_B"].copy()
+        self._updates = int(z["cma_updates"])
+        self._recent = z["cma_recent"].tolist()
+        self.n_restarts = int(z["cma_restarts"])
@@ -1,15 +1,30 @@
 from __future__ import annotations
+import hashlib
+import json
+import os
+from collections import OrderedDict
 from dataclasses import dataclass, field
-from typing import Callable, List, Tuple, Any, Optional
+import time
+from typing import TYPE_CHECKING, Callable, Dict, List, Tuple, Any, Optional
 import numpy as np
 from joblib import Parallel, delayed
+from .parallel import PoolEvaluator
+if TYPE_CHECKING:
+    from .local_search import LocalSearch
 
 FitnessFn = Callable[[Any], float]
+BatchFitnessFn = Callable[[np.ndarray], np.ndarray]  # optional ``fitness_fn.batch``
 InitFn = Callable[[], Any]
 MutateFn = Callable[[Any, np.random.Generator], Any]
 CrossoverFn = Callable[[Any, Any, np.random.Generator], Tuple[Any, Any]]
 SelectFn = Callable[[List[Any], np.ndarray, np.random.Generator], Any]
 
+# Batched counterparts used by VectorizedGA: populations are (pop_size, dim) arrays
+BatchInitFn = Callable[[int], np.ndarray]
+BatchMutateFn = Callable[[np.ndarray, np.random.Generator], np.ndarray]
+BatchCrossoverFn = Callable[[np.ndarray, np.ndarray, np.random.Generator], Tuple[np.ndarray, np.ndarray]]
+BatchSelectFn = Callable[[np.ndarray, int, np.random.Generator], np.ndarray]
+
 @dataclass
 class GAConfig:
     pop_size: int = 100
@@ -22,12 +37,27 @@ class GAConfig:
     target_fitness: Optional[float] = None
     seed: Optional[int] = None
     n_jobs: int = 1  # parallel fitness eval
+    cache_size: int = 0  # LRU fitness cache entries (0 = off)
+    checkpoint_every: int = 0  # generations between checkpoints (0 = off)
+    checkpoint_path: Optional[str] = None
+    profile: bool = False  # record per-phase wall time in GAHistory.phase_times
 
 @dataclass
 class GAHistory:
     best_fitness: List[float] = field(default_factory=list)
     mean_fitness: List[float] = field(default_factory=list)
     std_fitness: List[float] = field(default_factory=list)
+    cache_hits: int = 0
+    cache_misses: int = 0
+    # memetic stage, one entry per generation when a LocalSearch is attached
+    ls_improved: List[int] = field(default_factory=list)
+    ls_steps: List[int] = field(default_factory=list)
+    ls_time: List[float] = field(default_factory=list)
+    # per generation: full fitness evaluations and incremental (fitness_fn.delta) ones
+    fitness_evals: List[int] = field(default_factory=list)
+    delta_evals: List[int] = field(default_factory=list)
+    # phase -> seconds per generation, filled when GAConfig.profile is set (see PHASES)
+    phase_times: Dict[str, List[float]] = field(default_factory=dict)
 
 @dataclass
 class GAResult:
@@ -35,6 +65,75 @@ class GAResult:
     best_fitness: float
     history: GAHistory
     generations: int
+    island_histories: Optional[List[GAHistory]] = None
+
+@dataclass
+class GAState:
+    """Mutable snapshot of a run between generations (see ``GA.start``/``GA.step``)."""
+    pop: Any
+    fits: np.ndarray
+    best: Any
+    best_fit: float
+    stall: int = 0
+    gen: int = 0
+    done: bool = False
+    history: GAHistory = field(default_factory=GAHistory)
+
+class FitnessCache:
+    """Bounded LRU cache of fitness values keyed by a hash of the genome bytes."""
+    def __init__(self, maxsize: int):
+        self.maxsize = int(maxsize)
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[bytes, float]" = OrderedDict()
+
+    @staticmethod
+    def key(ind: Any) -> bytes:
+        a = np.ascontiguousarray(ind)
+        h = hashlib.blake2b(digest_size=16)
+        h.update(a.dtype.str.encode())
+        h.update(np.asarray(a.shape, dtype=np.int64).tobytes())
+        h.update(a.tobytes())
+        return h.digest()
+
+    def get(self, key: bytes) -> Optional[float]:
+        fit = self._data.get(key)
+        if fit is None:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return fit
+
+    def put(self, key: bytes, fit: float):
+        self._data[key] = fit
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+PHASES = ("bookkeeping", "elitism", "select", "crossover", "mutate", "evaluate", "adapt", "local_search")
+
+class PhaseTimer:
+    """Splits a generation's wall time into phases: ``lap(name)`` charges the
+    time since the previous lap to ``name``. A no-op unless enabled."""
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self.totals: Dict[str, float] = {}
+        self._last = 0.0
+
+    def reset(self):
+        if self.enabled:
+            self.totals = dict.fromkeys(PHASES, 0.0)
+            self._last = time.perf_counter()
+
+    def lap(self, phase: str):
+        if self.enabled:
+            now = time.perf_counter()
+            self.totals[phase] += now - self._last
+            self._last = now
+
+def _take(pop: Any, idx: List[int]) -> Any:
+    return pop[np.asarray(idx, dtype=int)] if isinstance(pop, np.ndarray) else [pop[i] for i in idx]
 
 class GA:
     def __init__(
@@ -45,84 +144,406 @@ class GA:
         crossover_fn: CrossoverFn,
         select_fn: SelectFn,
         config: GAConfig,
+        local_search: Optional["LocalSearch"] = None,
+        on_generation: Optional[Callable[[GAState], Any]] = None,
+        on_improvement: Optional[Callable[[GAState], Any]] = None,
     ):
+        """``on_generation(state)`` runs after every generation (a truthy return
+        stops the run); ``on_improvement(state)`` runs whenever the best-so-far
+        improves."""
         self.fitness_fn = fitness_fn
         self.init_fn = init_fn
         self.mutate_fn = mutate_fn
         self.crossover_fn = crossover_fn
         self.select_fn = select_fn
         self.cfg = config
+        self.local_search = local_search
+        self.on_generation = on_generation
+        self.on_improvement = on_improvement
         self.rng = np.random.default_rng(self.cfg.seed)
+        self._evaluator: Optional[PoolEvaluator] = None
+        self._cache: Optional[FitnessCache] = None
+        self._timer = PhaseTimer(self.cfg.profile)
+        self._n_evals = 0
+        self._n_deltas = 0
 
-    def _eval_pop(self, pop: List[Any]) -> np.ndarray:
+    def _eval_pop(self, pop: List[Any], known: Optional[np.ndarray] = None) -> np.ndarray:
+        if known is not None:
+            # only individuals without an already-known fitness (NaN) are evaluated
+            fits = known.astype(float, copy=True)
+            todo = np.flatnonzero(np.isnan(fits))
+            if len(todo):
+                fits[todo] = self._eval_pop(_take(pop, todo.tolist()))
+            return fits
+        if self._cache is None:
+            return self._eval_uncached(pop)
+        fits = np.empty(len(pop), dtype=float)
+        pending: "OrderedDict[bytes, List[int]]" = OrderedDict()
+        for i, ind in enumerate(pop):
+            key = FitnessCache.key(ind)
+            if key in pending:  # duplicate within this generation
+                pending[key].append(i)
+                self._cache.hits += 1
+                continue
+            fit = self._cache.get(key)
+            if fit is None:
+                pending[key] = [i]
+            else:
+                fits[i] = fit
+        if pending:
+            first = [idx[0] for idx in pending.values()]
+            new_fits = self._eval_uncached(_take(pop, first))
+            for (key, idx), fit in zip(pending.items(), new_fits):
+                fits[idx] = fit
+                self._cache.put(key, float(fit))
+        return fits
+
+    def _eval_uncached(self, pop: List[Any]) -> np.ndarray:
+        self._n_evals += len(pop)
+        if self._evaluator is not None:
+            X = np.asarray(pop)
+            if X.dtype != object:
+                return self._evaluator(X)
+        batch_fn: Optional[BatchFitnessFn] = getattr(self.fitness_fn, "batch", None)
+        if batch_fn is not None:
+            return np.asarray(batch_fn(np.asarray(pop)), dtype=float)
         if self.cfg.n_jobs and self.cfg.n_jobs > 1:
             fits = Parallel(n_jobs=self.cfg.n_jobs)(delayed(self.fitness_fn)(ind) for ind in pop)
             return np.asarray(fits, dtype=float)
         else:
             return np.asarray([self.fitness_fn(ind) for ind in pop], dtype=float)
 
-    def run(self) -> GAResult:
-        # init
-        pop = [self.init_fn() for _ in range(self.cfg.pop_size)]
-        fits = self._eval_pop(pop)
-        history = GAHistory()
-
-        best_idx = int(np.argmin(fits) if self.cfg.minimize else np.argmax(fits))
-        best = pop[best_idx]
-        best_fit = float(fits[best_idx])
-        stall = 0
-
-        for gen in range(1, self.cfg.generations + 1):
-            history.best_fitness.append(float(np.min(fits) if self.cfg.minimize else np.max(fits)))
-            history.mean_fitness.append(float(np.mean(fits)))
-            history.std_fitness.append(float(np.std(fits)))
-
-            # Elitism
-            if self.cfg.elitism > 0:
-                elite_idx = np.argsort(fits) if self.cfg.minimize else np.argsort(-fits)
-                elites = [pop[i] for i in elite_idx[: self.cfg.elitism]]
-                elite_fits = fits[elite_idx[: self.cfg.elitism]]
-            else:
-                elites = []
-                elite_fits = np.empty((0,), dtype=float)
+    def _init_population(self) -> List[Any]:
+        return [self.init_fn() for _ in range(self.cfg.pop_size)]
+
+    def _elites(self, pop: List[Any], fits: np.ndarray) -> List[Any]:
+        if self.cfg.elitism <= 0:
+            return []
+        elite_idx = np.argsort(fits) if self.cfg.minimize else np.argsort(-fits)
+        return [pop[i] for i in elite_idx[: self.cfg.elitism]]
+
+    def _tracks_moves(self) -> bool:
+        return getattr(self.mutate_fn, "returns_move", False) and getattr(self.fitness_fn, "delta", None) is not None
+
+    def _mutate(self, ind: Any, fit: float) -> Tuple[Any, float]:
+        """Mutate one individual; returns the child and its fitness if it can be
+        derived from ``fit`` via ``fitness_fn.delta``, else NaN."""
+        if not getattr(self.mutate_fn, "returns_move", False):
+            return self.mutate_fn(ind, self.rng), np.nan
+        child, move = self.mutate_fn(ind, self.rng)
+        if np.isnan(fit) or getattr(self.fitness_fn, "delta", None) is None:
+            return child, np.nan
+        self._n_deltas += 1
+        return child, fit + self.fitness_fn.delta(ind, move)
 
-            # New generation
-            new_pop: List[Any] = list(elites)
-            while len(new_pop) < self.cfg.pop_size:
+    def _breed(self, pop: List[Any], fits: np.ndarray) -> Tuple[List[Any], Optional[np.ndarray]]:
+        """Build the next generation; also returns fitness values already known
+        for some children (NaN where unknown), or None when nothing is tracked."""
+        track = self._tracks_moves()
+        # scalar selection hands back population members, so parents are found by identity
+        fit_of = {id(ind): float(f) for ind, f in zip(pop, fits)} if track else {}
+        new_pop: List[Any] = self._elites(pop, fits)
+        known: List[float] = [fit_of.get(id(e), np.nan) for e in new_pop]
+        lap = self._timer.lap
+        lap("elitism")
+        # a batched selector draws every parent index of the generation in one call
+        batch_select: Optional[BatchSelectFn] = getattr(self.select_fn, "batch", None)
+        parents: Optional[np.ndarray] = None
+        n_children = self.cfg.pop_size - len(new_pop)
+        if batch_select is not None and n_children > 0:
+            parents = np.asarray(batch_select(fits, 2 * ((n_children + 1) // 2), self.rng))
+            lap("select")
+        k = 0
+        while len(new_pop) < self.cfg.pop_size:
+            if parents is not None:
+                i1, i2 = int(parents[k]), int(parents[k + 1])
+                k += 2
+                p1, p2 = pop[i1], pop[i2]
+                f1, f2 = (float(fits[i1]), float(fits[i2])) if track else (np.nan, np.nan)
+            else:
                 p1 = self.select_fn(pop, fits, self.rng)
                 p2 = self.select_fn(pop, fits, self.rng)
-                c1, c2 = p1, p2
-                if self.rng.random() < self.cfg.cx_rate:
-                    c1, c2 = self.crossover_fn(p1, p2, self.rng)
-                # Mutate
+                f1, f2 = fit_of.get(id(p1), np.nan), fit_of.get(id(p2), np.nan)
+            lap("select")
+            c1, c2 = p1, p2
+            if self.rng.random() < self.cfg.cx_rate:
+                c1, c2 = self.crossover_fn(p1, p2, self.rng)
+                f1 = f2 = np.nan
+            lap("crossover")
+            # Mutate
+            if self.rng.random() < self.cfg.mut_rate:
+                c1, f1 = self._mutate(c1, f1)
+            if len(new_pop) + 1 < self.cfg.pop_size:
                 if self.rng.random() < self.cfg.mut_rate:
-                    c1 = self.mutate_fn(c1, self.rng)
-                if len(new_pop) + 1 < self.cfg.pop_size:
-                    if self.rng.random() < self.cfg.mut_rate:
-                        c2 = self.mutate_fn(c2, self.rng)
-                    new_pop.extend([c1, c2])
-                else:
-                    new_pop.append(c1)
-
-            pop = new_pop[: self.cfg.pop_size]
-            fits = self._eval_pop(pop)
-
-            # Track best
-            curr_best_idx = int(np.argmin(fits) if self.cfg.minimize else np.argmax(fits))
-            curr_best = pop[curr_best_idx]
-            curr_fit = float(fits[curr_best_idx])
-            improved = (curr_fit < best_fit) if self.cfg.minimize else (curr_fit > best_fit)
-            if improved:
-                best, best_fit = curr_best, curr_fit
-                stall = 0
+                    c2, f2 = self._mutate(c2, f2)
+                new_pop.extend([c1, c2])
+                known.extend([f1, f2])
             else:
-                stall += 1
+                new_pop.append(c1)
+                known.append(f1)
+            lap("mutate")
+        n = self.cfg.pop_size
+        return new_pop[:n], (np.asarray(known[:n], dtype=float) if track else None)
+
+    def _open(self):
+        # one pool for the whole run instead of a fresh joblib.Parallel per generation
+        if self.cfg.n_jobs and self.cfg.n_jobs > 1:
+            self._evaluator = PoolEvaluator(self.fitness_fn, self.cfg.n_jobs)
+        self._cache = FitnessCache(self.cfg.cache_size) if self.cfg.cache_size > 0 else None
+
+    def _close(self):
+        if self._evaluator is not None:
+            self._evaluator.close()
+            self._evaluator = None
+
+    def _best_index(self, fits: np.ndarray) -> int:
+        return int(np.argmin(fits) if self.cfg.minimize else np.argmax(fits))
+
+    def _better(self, a: float, b: float) -> bool:
+        return (a < b) if self.cfg.minimize else (a > b)
+
+    def _reached_target(self, fit: float) -> bool:
+        if self.cfg.target_fitness is None:
+            return False
+        return (fit <= self.cfg.target_fitness) if self.cfg.minimize else (fit >= self.cfg.target_fitness)
+
+    def run(self) -> GAResult:
+        return self._drive(None)
+
+    def resume(self, path: str) -> GAResult:
+        """Continue a run from a checkpoint written by ``save_checkpoint``.
+
+        The GA must be built with the same operators and config; the run then
+        continues bit-identically to one that was never interrupted.
+        """
+        return self._drive(path)
+
+    def _drive(self, checkpoint: Optional[str]) -> GAResult:
+        every = self.cfg.checkpoint_every
+        if every and not self.cfg.checkpoint_path:
+            raise ValueError("checkpoint_every requires checkpoint_path")
+        self._open()
+        try:
+            state = self.start() if checkpoint is None else self.load_checkpoint(checkpoint)
+            while not state.done and state.gen < self.cfg.generations:
+                self.step(state)
+                if every and state.gen % every == 0:
+                    self.save_checkpoint(state, self.cfg.checkpoint_path)
+            return self.result(state)
+        finally:
+            self._close()
+
+    # ---- checkpointing ----
+    _HISTORY_LISTS = ("best_fitness", "mean_fitness", "std_fitness", "ls_improved", "ls_steps", "ls_time", "fitness_evals", "delta_evals")
+
+    def save_checkpoint(self, state: GAState, path: str):
+        """Write population, fitness, best-so-far, counters, history and RNG state to ``path`` (.npz)."""
+        arrays = self._checkpoint_arrays(state)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp, path)  # never leave a half-written checkpoint behind
+
+    def _checkpoint_arrays(self, state: GAState) -> dict:
+        # engines with state outside GAState extend this and _restore_checkpoint
+        h = state.history
+        arrays = {
+            "pop": np.asarray(state.pop),
+            "pop_is_array": np.asarray(isinstance(state.pop, np.ndarray)),
+            "fits": state.fits,
+            "best": np.asarray(state.best),
+            "best_fit": np.asarray(state.best_fit),
+            "stall": np.asarray(state.stall),
+            "gen": np.asarray(state.gen),
+            "done": np.asarray(state.done),
+            "rng_state": np.asarray(json.dumps(self.rng.bit_generator.state)),
+            "cache_counts": np.asarray([self._cache.hits, self._cache.misses] if self._cache is not None else [h.cache_hits, h.cache_misses]),
+        }
+        for name in self._HISTORY_LISTS:
+            arrays["history_" + name] = np.asarray(getattr(h, name))
+        arrays["history_phase_times"] = np.asarray(json.dumps(h.phase_times))
+        return arrays
+
+    def _restore_checkpoint(self, z):
+        pass
+
+    def load_checkpoint(self, path: str) -> GAState:
+        with np.load(path) as z:
+            pop = z["pop"]
+            if not bool(z["pop_is_array"]):
+                pop = list(pop)
+            history = GAHistory()
+            for name in self._HISTORY_LISTS:
+                if "history_" + name in z.files:
+                    setattr(history, name, z["history_" + name].tolist())
+            if "history_phase_times" in z.files:
+                history.phase_times = json.loads(str(z["history_phase_times"]))
+            history.cache_hits, history.cache_misses = (int(x) for x in z["cache_counts"])
+            state = GAState(
+                pop, z["fits"].copy(), z["best"].copy(), float(z["best_fit"]),
+                stall=int(z["stall"]), gen=int(z["gen"]), done=bool(z["done"]), history=history,
+            )
+            self.rng.bit_generator.state = json.loads(str(z["rng_state"]))
+            self._restore_checkpoint(z)
+        if self._cache is not None:
+            self._cache.hits, self._cache.misses = history.cache_hits, history.cache_misses
+        return state
+
+    def start(self) -> GAState:
+        pop = self._init_population()
+        fits = self._eval_pop(pop)
+        best_idx = self._best_index(fits)
+        return GAState(pop, fits, pop[best_idx], float(fits[best_idx]))
+
+    def step(self, state: GAState) -> GAState:
+        """Advance ``state`` by one generation in place."""
+        timer = self._timer
+        timer.reset()
+        state.gen += 1
+        fits = state.fits
+        history = state.history
+        history.best_fitness.append(float(np.min(fits) if self.cfg.minimize else np.max(fits)))
+        history.mean_fitness.append(float(np.mean(fits)))
+        history.std_fitness.append(float(np.std(fits)))
+        timer.lap("bookkeeping")
+
+        self._next_generation(state)
+        if self.local_search is not None:
+            self._local_search(state)
+            timer.lap("local_search")
+
+        # Track best
+        curr_best_idx = self._best_index(state.fits)
+        curr_fit = float(state.fits[curr_best_idx])
+        improved = self._better(curr_fit, state.best_fit)
+        if improved:
+            state.best, state.best_fit = state.pop[curr_best_idx], curr_fit
+            state.stall = 0
+        else:
+            state.stall += 1
+
+        # Stopping conditions
+        if self._reached_target(state.best_fit):
+            state.done = True
+        if self.cfg.stall_generations and state.stall >= self.cfg.stall_generations:
+            state.done = True
+
+        # evaluations of the initial population are charged to the first generation
+        history.fitness_evals.append(self._n_evals)
+        history.delta_evals.append(self._n_deltas)
+        self._n_evals = self._n_deltas = 0
+        timer.lap("bookkeeping")
+        if timer.enabled:
+            for phase, t in timer.totals.items():
+                history.phase_times.setdefault(phase, []).append(t)
+        if improved and self.on_improvement is not None:
+            self.on_improvement(state)
+        if self.on_generation is not None and self.on_generation(state):
+            state.done = True
+        return state
+
+    def _next_generation(self, state: GAState):
+        """Replace ``state.pop``/``state.fits`` with the next evaluated generation."""
+        # Elitism + new generation
+        state.pop, known = self._breed(state.pop, state.fits)
+        self._timer.lap("bookkeeping")
+        state.fits = self._eval_pop(state.pop, known)
+        self._timer.lap("evaluate")
+
+    def _local_search(self, state: GAState):
+        t0 = time.perf_counter()
+        improved, steps = self.local_search.apply(state.pop, state.fits, self.cfg.minimize)
+        state.history.ls_improved.append(improved)
+        state.history.ls_steps.append(steps)
+        state.history.ls_time.append(time.perf_counter() - t0)
+
+    def result(self, state: GAState) -> GAResult:
+        if self._cache is not None:
+            state.history.cache_hits, state.history.cache_misses = self._cache.hits, self._cache.misses
+        return GAResult(state.best, state.best_fit, state.history, state.gen)
+
+    # ---- migration (used by ga_toolkit.islands) ----
+    def emigrants(self, state: GAState, k: int) -> Tuple[Any, np.ndarray]:
+        order = np.argsort(state.fits) if self.cfg.minimize else np.argsort(-state.fits)
+        top = order[:k].tolist()
+        return _take(state.pop, top), state.fits[top]
+
+    def immigrate(self, state: GAState, migrants: Any, migrant_fits: np.ndarray):
+        """Replace the worst individuals of ``state`` with already-evaluated migrants."""
+        n = min(len(migrants), self.cfg.pop_size - max(self.cfg.elitism, 0))
+        if n <= 0:
+            return
+        order = np.argsort(state.fits) if self.cfg.minimize else np.argsort(-state.fits)
+        worst = order[::-1][:n]
+        for slot, j in zip(worst, range(n)):
+            state.pop[slot] = migrants[j]
+            state.fits[slot] = migrant_fits[j]
+        best_idx = self._best_index(state.fits)
+        if self._better(float(state.fits[best_idx]), state.best_fit):
+            state.best, state.best_fit = state.pop[best_idx], float(state.fits[best_idx])
+            state.stall = 0
+
+class VectorizedGA(GA):
+    """GA variant that keeps the population as a single (pop_size, dim) array.
+
+    Operators work on whole batches instead of single individuals:
+    ``init_fn(n)`` returns an (n, dim) array, ``select_fn(fits, n, rng)`` (or
+    ``select_fn.batch``) returns n parent indices, ``crossover_fn(A, B, rng)`` crosses row-aligned parent
+    matrices and ``mutate_fn(X, rng)`` mutates every row of X. See the
+    ``batch_*`` operators in ``ga_toolkit.operators``.
+    """
+    def __init__(
+        self,
+        fitness_fn: FitnessFn,
+        init_fn: BatchInitFn,
+        mutate_fn: BatchMutateFn,
+        crossover_fn: BatchCrossoverFn,
+        select_fn: BatchSelectFn,
+        config: GAConfig,
+        local_search: Optional["LocalSearch"] = None,
+        on_generation: Optional[Callable[[GAState], Any]] = None,
+        on_improvement: Optional[Callable[[GAState], Any]] = None,
+    ):
+        super().__init__(fitness_fn, init_fn, mutate_fn, crossover_fn, select_fn, config, local_search, on_generation, on_improvement)
+
+    def _init_population(self) -> np.ndarray:
+        return np.asarray(self.init_fn(self.cfg.pop_size))
+
+    def _elites(self, pop: np.ndarray, fits: np.ndarray) -> np.ndarray:
+        if self.cfg.elitism <= 0:
+            return pop[:0]
+        elite_idx = np.argsort(fits) if self.cfg.minimize else np.argsort(-fits)
+        return pop[elite_idx[: self.cfg.elitism]]
+
+    def _breed(self, pop: np.ndarray, fits: np.ndarray) -> Tuple[np.ndarray, None]:
+        lap = self._timer.lap
+        elites = self._elites(pop, fits)
+        lap("elitism")
+        n_children = self.cfg.pop_size - len(elites)
+        if n_children <= 0:
+            return elites[: self.cfg.pop_size].copy(), None
+        n_pairs = (n_children + 1) // 2
+
+        select = getattr(self.select_fn, "batch", self.select_fn)
+        parents = select(fits, 2 * n_pairs, self.rng)
+        p1, p2 = pop[parents[:n_pairs]], pop[parents[n_pairs:]]
+        lap("select")
+        c1, c2 = p1.copy(), p2.copy()
+        cx = self.rng.random(n_pairs) < self.cfg.cx_rate
+        if cx.any():
+            c1[cx], c2[cx] = self.crossover_fn(p1[cx], p2[cx], self.rng)
+
+        # interleave siblings like GA does, then drop the surplus child
+        children = np.empty((2 * n_pairs,) + pop.shape[1:], dtype=pop.dtype)
+        children[0::2] = c1
+        children[1::2] = c2
+        children = children[:n_children]
 
-            # Stopping conditions
-            if self.cfg.target_fitness is not None:
-                if (best_fit <= self.cfg.target_fitness and self.cfg.minimize) or (best_fit >= self.cfg.target_fitness and not self.cfg.minimize):
-                    break
-            if self.cfg.stall_generations and stall >= self.cfg.stall_generations:
-                break
+        lap("crossover")
 
-        return GAResult(best, best_fit, history, gen)
\ No newline at end of file
+        mut = self.rng.random(n_children) < self.cfg.mut_rate
+        if mut.any():
+            children[mut] = self.mutate_fn(children[mut], self.rng)
+        lap("mutate")
+        return np.concatenate([elites, children]), None
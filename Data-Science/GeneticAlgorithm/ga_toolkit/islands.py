@@ -0,0 +1,137 @@
+from __future__ import annotations
+import multiprocessing as mp
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+import numpy as np
+import cloudpickle
+from .engine import GA, GAHistory, GAResult
+
+MakeGA = Callable[[int], GA]  # seed -> fully configured GA for one island
+
+@dataclass
+class IslandConfig:
+    n_islands: int = 4
+    migrate_every: int = 10  # generations between migrations
+    migrants: int = 2        # top-k individuals each island sends
+    topology: str = "ring"   # "ring" or "full"
+
+def island_seeds(seed: Optional[int], n: int) -> List[int]:
+    """Independent per-island seeds derived from one base seed."""
+    return [int(ss.generate_state(1)[0]) for ss in np.random.SeedSequence(seed).spawn(n)]
+
+def _island_worker(conn, payload: bytes, seed: int, migrants: int):
+    make_ga = cloudpickle.loads(payload)
+    ga = make_ga(seed)
+    ga._open()
+    try:
+        state = ga.start()
+        while True:
+            cmd, arg = conn.recv()
+            if cmd == "run":
+                for _ in range(arg):
+                    if state.done or state.gen >= ga.cfg.generations:
+                        break
+                    ga.step(state)
+                finished = state.done or state.gen >= ga.cfg.generations
+                inds, fits = ga.emigrants(state, migrants)
+                conn.send((inds, fits, finished, ga._reached_target(state.best_fit)))
+            elif cmd == "migrate":
+                inds, fits = arg
+                if not (state.done or state.gen >= ga.cfg.generations) and len(inds):
+                    ga.immigrate(state, inds, fits)
+            else:  # "stop"
+                conn.send(ga.result(state))
+                break
+    finally:
+        ga._close()
+        conn.close()
+
+def _sources(i: int, n: int, topology: str) -> List[int]:
+    if topology == "ring":
+        return [(i - 1) % n] if n > 1 else []
+    return [j for j in range(n) if j != i]
+
+def merge_histories(histories: List[GAHistory], minimize: bool) -> GAHistory:
+    """Per-generation view over all islands: best of bests, pooled mean and std."""
+    merged = GAHistory()
+    n_gen = max((len(h.best_fitness) for h in histories), default=0)
+    for g in range(n_gen):
+        live = [h for h in histories if len(h.best_fitness) > g]
+        bests = [h.best_fitness[g] for h in live]
+        means = np.array([h.mean_fitness[g] for h in live])
+        stds = np.array([h.std_fitness[g] for h in live])
+        mean = float(means.mean())
+        merged.best_fitness.append(float(min(bests) if minimize else max(bests)))
+        merged.mean_fitness.append(mean)
+        merged.std_fitness.append(float(np.sqrt(max(np.mean(stds ** 2 + means ** 2) - mean ** 2, 0.0))))
+        merged.fitness_evals.append(sum(h.fitness_evals[g] for h in live if len(h.fitness_evals) > g))
+        merged.delta_evals.append(sum(h.delta_evals[g] for h in live if len(h.delta_evals) > g))
+        # islands run concurrently, so summed phase times are CPU-seconds rather than wall time
+        for phase in {p for h in live for p in h.phase_times}:
+            merged.phase_times.setdefault(phase, []).append(sum(h.phase_times[phase][g] for h in live if len(h.phase_times.get(phase, ())) > g))
+    merged.cache_hits = sum(h.cache_hits for h in histories)
+    merged.cache_misses = sum(h.cache_misses for h in histories)
+    return merged
+
+class IslandModel:
+    """Run N independent GA populations in separate processes with periodic migration.
+
+    ``make_ga(seed)`` builds the GA for one island (operators, init, config);
+    each island gets its own seed derived from ``seed``. Every
+    ``migrate_every`` generations each island sends its top ``migrants``
+    individuals to its neighbours on the chosen topology, where they replace
+    the worst individuals.
+    """
+    def __init__(self, make_ga: MakeGA, config: IslandConfig, seed: Optional[int] = None, minimize: bool = True):
+        if config.topology not in {"ring", "full"}:
+            raise ValueError(f"Unknown topology: {config.topology}")
+        self.make_ga = make_ga
+        self.cfg = config
+        self.seed = seed
+        self.minimize = minimize
+
+    def run(self) -> GAResult:
+        n = self.cfg.n_islands
+        payload = cloudpickle.dumps(self.make_ga)
+        ctx = mp.get_context()
+        conns, procs = [], []
+        for seed in island_seeds(self.seed, n):
+            parent, child = ctx.Pipe()
+            p = ctx.Process(target=_island_worker, args=(child, payload, seed, self.cfg.migrants))
+            p.start()
+            child.close()
+            conns.append(parent)
+            procs.append(p)
+        try:
+            while True:
+                for c in conns:
+                    c.send(("run", max(1, self.cfg.migrate_every)))
+                reports = [c.recv() for c in conns]
+                if all(r[2] for r in reports) or any(r[3] for r in reports):
+                    break
+                for i, c in enumerate(conns):
+                    src = _sources(i, n, self.cfg.topology)
+                    inds = [ind for j in src for ind in reports[j][0]]
+                    fits = np.concatenate([reports[j][1] for j in src]) if src else np.empty((0,))
+                    c.send(("migrate", (inds, fits)))
+            for c in conns:
+                c.send(("stop", None))
+            results: List[GAResult] = [c.recv() for c in conns]
+        finally:
+            for c in conns:
+                c.close()
+            for p in procs:
+                p.join()
+        return self._merge(results)
+
+    def _merge(self, results: List[GAResult]) -> GAResult:
+        fits = np.array([r.best_fitness for r in results])
+        best = results[int(np.argmin(fits) if self.minimize else np.argmax(fits))]
+        histories = [r.history for r in results]
+        return GAResult(
+            best.best_individual,
+            best.best_fitness,
+            merge_histories(histories, self.minimize),
+            max(r.generations for r in results),
+            island_histories=histories,
+        )
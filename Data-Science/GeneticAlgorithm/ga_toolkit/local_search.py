@@ -0,0 +1,139 @@
+from __future__ import annotations
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, Tuple
+import numpy as np
+from .problems import TSPProblem, knapsack_value
+
+# improve(individual, fitness, max_steps) -> (individual, fitness, steps_used)
+ImproveFn = Callable[[Any, float, int], Tuple[Any, float, int]]
+
+@dataclass
+class LocalSearch:
+    """Memetic stage: improve the best ``fraction`` of each generation in place.
+
+    ``max_steps`` and ``time_budget`` (seconds) bound the work per generation;
+    the step budget is shared evenly and unused steps roll over to the next
+    individual.
+    """
+    improve: ImproveFn
+    fraction: float = 0.1
+    max_steps: int = 200
+    time_budget: Optional[float] = None
+
+    def apply(self, pop: Any, fits: np.ndarray, minimize: bool) -> Tuple[int, int]:
+        """Returns (individuals improved, steps used)."""
+        n = min(len(fits), max(1, int(round(self.fraction * len(fits)))))
+        order = np.argsort(fits) if minimize else np.argsort(-fits)
+        t0 = time.perf_counter()
+        improved = 0
+        remaining = int(self.max_steps)
+        for rank, i in enumerate(order[:n]):
+            if remaining <= 0:
+                break
+            if self.time_budget is not None and time.perf_counter() - t0 >= self.time_budget:
+                break
+            share = max(1, remaining // (n - rank))
+            new, fit, used = self.improve(pop[i], float(fits[i]), share)
+            remaining -= max(int(used), 1)
+            if (fit < fits[i]) if minimize else (fit > fits[i]):
+                pop[i] = new
+                fits[i] = fit
+                improved += 1
+        return improved, int(self.max_steps) - max(remaining, 0)
+
+# ---------------- Permutations (TSP) ----------------
+def two_opt_improver(problem: TSPProblem, block: int = 256) -> ImproveFn:
+    """Best-improvement 2-opt; every step scores all (i, j) reversals with
+    array ops over the distance matrix, ``block`` rows at a time."""
+    D = problem.dist
+    def improve(perm: np.ndarray, fit: float, max_steps: int):
+        t = np.array(perm, copy=True)
+        n = len(t)
+        if n < 4:
+            return t, fit, 0
+        idx = np.arange(n)
+        steps = 0
+        while steps < max_steps:
+            prev = np.roll(t, 1)
+            nxt = np.roll(t, -1)
+            d_in = D[prev, t]    # edge entering position i
+            d_out = D[t, nxt]    # edge leaving position j
+            best, bi, bj = -1e-12, -1, -1
+            for s in range(0, n, block):
+                rows = idx[s:s + block]
+                # reversing t[i..j] swaps edges (i-1, i), (j, j+1) for (i-1, j), (i, j+1)
+                delta = D[prev[rows][:, None], t[None, :]] + D[t[rows][:, None], nxt[None, :]]
+                delta -= d_in[rows][:, None] + d_out[None, :]
+                delta[idx[None, :] <= rows[:, None]] = np.inf
+                if s == 0:
+                    delta[0, n - 1] = np.inf  # reversing the whole tour is a no-op
+                k = int(np.argmin(delta))
+                if delta.flat[k] < best:
+                    best, bi, bj = float(delta.flat[k]), int(rows[k // n]), int(k % n)
+            if bi < 0:
+                break
+            t[bi:bj + 1] = t[bi:bj + 1][::-1]
+            steps += 1
+        return t, problem(t), steps
+    return improve
+
+# ---------------- Bit strings (knapsack) ----------------
+def knapsack_improver(values: np.ndarray, weights: np.ndarray, capacity: float, penalty: float = 1e3) -> ImproveFn:
+    """Greedy repair (drop worst value/weight items until feasible) followed by
+    greedy fill (add best-ratio items that still fit). One step = one flip."""
+    order = np.argsort(-(values / weights), kind="stable")  # best ratio first
+    w_min = float(np.min(weights))
+    def improve(bits: np.ndarray, fit: float, max_steps: int):
+        b = np.array(bits, copy=True)
+        steps = 0
+        w = float(b @ weights)
+        if w > capacity:
+            worst_first = order[::-1]
+            sel = worst_first[b[worst_first] == 1]
+            cut = int(np.searchsorted(np.cumsum(weights[sel]), w - capacity)) + 1
+            drop = sel[:min(cut, max_steps)]
+            b[drop] = 0
+            w -= float(weights[drop].sum())
+            steps += len(drop)
+        for i in order[b[order] == 0]:
+            if steps >= max_steps or capacity - w < w_min:
+                break
+            if w + weights[i] <= capacity:
+                b[i] = 1
+                w += float(weights[i])
+                steps += 1
+        return b, knapsack_value(b, values, weights, capacity, penalty), steps
+    return improve
+
+# ---------------- Real vectors ----------------
+def coordinate_descent_improver(fitness_fn: Callable, bounds: Tuple[np.ndarray, np.ndarray], step: float, minimize: bool = True, shrink: float = 0.5, min_step: float = 1e-8) -> ImproveFn:
+    """Bounded coordinate descent: each step evaluates x +/- h*e_i for every
+    coordinate in one batch, moves to the best, and shrinks h when stuck."""
+    lo, hi = bounds
+    batch_fn = getattr(fitness_fn, "batch", None)
+    sign = 1.0 if minimize else -1.0
+    def evaluate(X):
+        if batch_fn is not None:
+            return np.asarray(batch_fn(X), dtype=float)
+        return np.asarray([fitness_fn(x) for x in X], dtype=float)
+    def improve(x: np.ndarray, fit: float, max_steps: int):
+        x = np.array(x, dtype=float)
+        dim = len(x)
+        eye = np.arange(dim)
+        h = float(step)
+        steps = 0
+        while steps < max_steps and h > min_step:
+            cand = np.repeat(x[None, :], 2 * dim, axis=0)
+            cand[eye, eye] += h
+            cand[dim + eye, eye] -= h
+            cand = np.clip(cand, lo, hi)
+            f = evaluate(cand)
+            steps += 1
+            k = int(np.argmin(sign * f))
+            if sign * f[k] < sign * fit:
+                x, fit = cand[k], float(f[k])
+            else:
+                h *= shrink
+        return x, fit, steps
+    return improve
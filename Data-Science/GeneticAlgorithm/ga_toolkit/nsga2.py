@@ -0,0 +1,208 @@
+from __future__ import annotations
+from bisect import bisect_left
+from dataclasses import dataclass, field, replace
+from typing import Any, Callable, List, Optional
+import numpy as np
+from .engine import GAConfig, VectorizedGA, BatchInitFn, BatchMutateFn, BatchCrossoverFn
+from .operators import batch_tournament_selection
+
+# objectives_fn(x) -> (n_obj,) vector, optional ``objectives_fn.batch(X) -> (pop, n_obj)``.
+# Every objective is minimized; negate the ones to maximize.
+ObjectivesFn = Callable[[Any], np.ndarray]
+
+# ---------------- Sorting and crowding ----------------
+def _ranks_2d(F: np.ndarray) -> np.ndarray:
+    # Sweep in (f1, f2) order: each front is summarized by its last member, whose
+    # (f2, f1) keys stay sorted across fronts, so a point joins the first front
+    # whose key is >= its own -- O(N log N) instead of pairwise comparisons.
+    n = len(F)
+    ranks = np.empty(n, dtype=int)
+    f1, f2 = F[:, 0].tolist(), F[:, 1].tolist()
+    last: List[tuple] = []
+    for i in np.lexsort((F[:, 1], F[:, 0])).tolist():
+        key = (f2[i], f1[i])
+        k = bisect_left(last, key)
+        if k == len(last):
+            last.append(key)
+        else:
+            last[k] = key
+        ranks[i] = k
+    return ranks
+
+def non_dominated_ranks(F: np.ndarray, block: int = 1024) -> np.ndarray:
+    """Pareto front index (0 = non-dominated) of every row of the (n, n_obj)
+    objective matrix F, all objectives minimized.
+
+    Two objectives use an O(N log N) sweep. Otherwise the dominance matrix is
+    built with broadcast comparisons ``block`` rows at a time and fronts are
+    peeled by decrementing domination counts.
+    """
+    F = np.asarray(F, dtype=float)
+    n = len(F)
+    if n == 0:
+        return np.empty(0, dtype=int)
+    if F.shape[1] == 2:
+        return _ranks_2d(F)
+    dom = np.empty((n, n), dtype=bool)  # dom[i, j]: i dominates j
+    for s in range(0, n, block):
+        A = F[s:s + block, None, :]
+        dom[s:s + block] = (A <= F[None, :, :]).all(axis=2) & (A < F[None, :, :]).any(axis=2)
+    count = dom.sum(axis=0)
+    ranks = np.empty(n, dtype=int)
+    front = np.flatnonzero(count == 0)
+    r = 0
+    while front.size:
+        ranks[front] = r
+        count -= dom[front].sum(axis=0)
+        count[front] = -1
+        front = np.flatnonzero(count == 0)
+        r += 1
+    return ranks
+
+def crowding_distance(F: np.ndarray, ranks: np.ndarray) -> np.ndarray:
+    """Crowding distance of every row within its own front; boundary points get inf."""
+    F = np.asarray(F, dtype=float)
+    n, m = F.shape
+    dist = np.zeros(n)
+    if n == 0:
+        return dist
+    for j in range(m):
+        order = np.lexsort((F[:, j], ranks))  # fronts contiguous, sorted by objective j
+        f, r = F[order, j], ranks[order]
+        first = np.r_[True, r[1:] != r[:-1]]
+        last = np.r_[r[1:] != r[:-1], True]
+        run = np.cumsum(first) - 1
+        span = (f[last] - f[first])[run]
+        gap = np.zeros(n)
+        gap[1:-1] = f[2:] - f[:-2]
+        contrib = np.divide(gap, span, out=np.zeros(n), where=span > 0)
+        contrib[first | last] = np.inf
+        dist[order] += contrib
+    return dist
+
+def hypervolume_2d(F: np.ndarray, ref_point) -> float:
+    """Area dominated by the points of F (minimized) and bounded by ``ref_point``."""
+    F = np.asarray(F, dtype=float)
+    ref = np.asarray(ref_point, dtype=float)
+    F = F[(F < ref).all(axis=1)]
+    if len(F) == 0:
+        return 0.0
+    F = F[np.lexsort((F[:, 1], F[:, 0]))]
+    best_f2 = np.minimum.accumulate(F[:, 1])
+    prev = np.r_[ref[1], best_f2[:-1]]
+    return float(np.sum((ref[0] - F[:, 0]) * np.maximum(prev - best_f2, 0.0)))
+
+# ---------------- Engine ----------------
+@dataclass
+class ParetoHistory:
+    front_size: List[int] = field(default_factory=list)
+    hypervolume: List[float] = field(default_factory=list)  # only with a 2-objective ref_point
+    fitness_evals: List[int] = field(default_factory=list)
+    phase_times: dict = field(default_factory=dict)
+
+@dataclass
+class ParetoResult:
+    pareto_set: np.ndarray     # distinct non-dominated individuals, sorted by the first objective
+    pareto_front: np.ndarray   # their objective vectors
+    population: np.ndarray
+    objectives: np.ndarray
+    history: ParetoHistory
+    generations: int
+
+@dataclass
+class ParetoState:
+    pop: np.ndarray
+    objs: np.ndarray
+    ranks: np.ndarray
+    crowding: np.ndarray
+    gen: int = 0
+    done: bool = False
+    history: ParetoHistory = field(default_factory=ParetoHistory)
+
+class NSGA2(VectorizedGA):
+    """NSGA-II over batched operators (see ``VectorizedGA`` for their signatures).
+
+    Parents are picked by binary tournaments on (front, -crowding); offspring
+    and parents are merged and the best ``pop_size`` survive by the same
+    order. From ``GAConfig`` it uses pop_size, generations, cx_rate, mut_rate,
+    seed, n_jobs and profile; ``minimize`` does not apply (all objectives are
+    minimized) and runs end after ``generations`` or when ``on_generation``
+    returns a truthy value. With two objectives and a ``ref_point``, the
+    hypervolume of the first front is recorded every generation.
+    """
+    def __init__(
+        self,
+        objectives_fn: ObjectivesFn,
+        init_fn: BatchInitFn,
+        mutate_fn: BatchMutateFn,
+        crossover_fn: BatchCrossoverFn,
+        config: GAConfig,
+        ref_point: Optional[np.ndarray] = None,
+        on_generation: Optional[Callable[[ParetoState], Any]] = None,
+    ):
+        if config.cache_size or config.checkpoint_every:
+            raise ValueError("NSGA2 supports neither the fitness cache nor checkpoints")
+        # survival is (mu + lambda) on the merged population, so breeding keeps no elites
+        super().__init__(objectives_fn, init_fn, mutate_fn, crossover_fn, self._crowded_tournament, replace(config, elitism=0), on_generation=on_generation)
+        self.ref_point = None if ref_point is None else np.asarray(ref_point, dtype=float)
+
+    @staticmethod
+    def _crowded_tournament(key: np.ndarray, n: int, rng: np.random.Generator) -> np.ndarray:
+        return batch_tournament_selection(key, n, rng, k=2, minimize=True)
+
+    @staticmethod
+    def _key(ranks: np.ndarray, crowding: np.ndarray) -> np.ndarray:
+        # front first, then wider crowding; 1 / (2 + d) stays inside (0, 0.5]
+        return ranks + 1.0 / (2.0 + crowding)
+
+    def _evaluate(self, X: np.ndarray) -> np.ndarray:
+        F = np.asarray(self._eval_uncached(X), dtype=float)
+        return F.reshape(len(X), -1)
+
+    def _survive(self, state: ParetoState, X: np.ndarray, F: np.ndarray, n: int):
+        ranks = non_dominated_ranks(F)
+        crowding = crowding_distance(F, ranks)
+        keep = np.lexsort((-crowding, ranks))[:n]
+        state.pop, state.objs, state.ranks, state.crowding = X[keep], F[keep], ranks[keep], crowding[keep]
+
+    def _record(self, state: ParetoState):
+        h = state.history
+        first = state.ranks == 0
+        h.front_size.append(int(first.sum()))
+        if self.ref_point is not None and state.objs.shape[1] == 2:
+            h.hypervolume.append(hypervolume_2d(state.objs[first], self.ref_point))
+        h.fitness_evals.append(self._n_evals)
+        self._n_evals = 0
+
+    def start(self) -> ParetoState:
+        X = self._init_population()
+        F = self._evaluate(X)
+        state = ParetoState(X, F, np.empty(0, dtype=int), np.empty(0))
+        self._survive(state, X, F, len(X))
+        return state
+
+    def step(self, state: ParetoState) -> ParetoState:
+        timer = self._timer
+        timer.reset()
+        state.gen += 1
+        children, _ = self._breed(state.pop, self._key(state.ranks, state.crowding))
+        F = self._evaluate(children)
+        timer.lap("evaluate")
+        self._survive(state, np.concatenate([state.pop, children]), np.concatenate([state.objs, F]), self.cfg.pop_size)
+        timer.lap("select")
+        self._record(state)
+        timer.lap("bookkeeping")
+        if timer.enabled:
+            for phase, t in timer.totals.items():
+                state.history.phase_times.setdefault(phase, []).append(t)
+        if self.on_generation is not None and self.on_generation(state):
+            state.done = True
+        return state
+
+    def result(self, state: ParetoState) -> ParetoResult:
+        first = state.ranks == 0
+        X, F = state.pop[first], state.objs[first]
+        X, idx = np.unique(X, axis=0, return_index=True)
+        F = F[idx]
+        order = np.lexsort(F.T[::-1])
+        return ParetoResult(X[order], F[order], state.pop, state.objs, state.history, state.gen)
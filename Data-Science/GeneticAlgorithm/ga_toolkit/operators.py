@@ -15,11 +15,38 @@ def roulette_selection(pop: List[Any], fitness: np.ndarray, rng: np.random.Gener
     # rank-based scaling for stability
     ranks = np.argsort(fitness) if minimize else np.argsort(-fitness)
     probs = np.empty_like(fitness, dtype=float)
-    probs[ranks] = np.linspace(1.0, 2.0, num=len(fitness))  # higher rank -> higher prob
+    probs[ranks] = np.linspace(2.0, 1.0, num=len(fitness))  # better rank -> higher prob
     probs = probs / probs.sum()
     idx = rng.choice(len(pop), p=probs)
     return pop[int(idx)]
 
+# Batched selection returns parent indices for a whole generation at once; the
+# rank table / CDF is built once per call instead of once per parent.
+def _rank_cdf(fitness: np.ndarray, minimize: bool) -> np.ndarray:
+    ranks = np.argsort(fitness) if minimize else np.argsort(-fitness)
+    weights = np.empty(len(fitness), dtype=float)
+    weights[ranks] = np.linspace(2.0, 1.0, num=len(fitness))  # same scaling as roulette_selection
+    return np.cumsum(weights)
+
+def batch_roulette_selection(fitness: np.ndarray, n: int, rng: np.random.Generator, minimize: bool = True) -> np.ndarray:
+    cdf = _rank_cdf(fitness, minimize)
+    return np.searchsorted(cdf, rng.random(n) * cdf[-1], side="right")
+
+def sus_selection(fitness: np.ndarray, n: int, rng: np.random.Generator, minimize: bool = True) -> np.ndarray:
+    # stochastic universal sampling: n evenly spaced pointers, one random offset
+    cdf = _rank_cdf(fitness, minimize)
+    step = cdf[-1] / n
+    pointers = (rng.random() + np.arange(n)) * step
+    idx = np.searchsorted(cdf, pointers, side="right")
+    return rng.permutation(idx)  # pointers come out sorted; shuffle so pairings are random
+
+def batch_tournament_selection(fitness: np.ndarray, n: int, rng: np.random.Generator, k: int = 3, minimize: bool = True) -> np.ndarray:
+    # contestants are drawn with replacement; for k << pop this matches the per-call operator closely
+    idx = rng.integers(0, len(fitness), size=(n, k))
+    scores = fitness[idx]
+    best = np.argmin(scores, axis=1) if minimize else np.argmax(scores, axis=1)
+    return idx[np.arange(n), best]
+
 # ---------------- Crossover ----------------
 def one_point_crossover(a: np.ndarray, b: np.ndarray, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
     n = len(a)
@@ -52,22 +79,181 @@ def blx_alpha_crossover(a: np.ndarray, b: np.ndarray, rng: np.random.Generator,
         c2 = np.clip(c2, lo, hi)
     return c1, c2
 
-# Permutation crossover: Order Crossover (OX)
+# Batched crossover: A and B are (m, dim) arrays of row-aligned parent pairs
+def batch_one_point_crossover(A: np.ndarray, B: np.ndarray, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    m, n = A.shape
+    if n < 2:
+        return A.copy(), B.copy()
+    cx = rng.integers(1, n, size=m)
+    mask = np.arange(n) >= cx[:, None]
+    c1 = np.where(mask, B, A)
+    c2 = np.where(mask, A, B)
+    return c1, c2
+
+def batch_uniform_crossover(A: np.ndarray, B: np.ndarray, rng: np.random.Generator, p: float = 0.5) -> Tuple[np.ndarray, np.ndarray]:
+    mask = rng.random(A.shape) < p
+    c1 = np.where(mask, B, A)
+    c2 = np.where(mask, A, B)
+    return c1, c2
+
+def batch_blx_alpha_crossover(A: np.ndarray, B: np.ndarray, rng: np.random.Generator, alpha: float = 0.5, bounds: Tuple[np.ndarray, np.ndarray] | None = None) -> Tuple[np.ndarray, np.ndarray]:
+    low = np.minimum(A, B)
+    high = np.maximum(A, B)
+    range_ = high - low
+    minv = low - alpha * range_
+    maxv = high + alpha * range_
+    c1 = rng.uniform(minv, maxv)
+    c2 = rng.uniform(minv, maxv)
+    if bounds is not None:
+        lo, hi = bounds
+        c1 = np.clip(c1, lo, hi)
+        c2 = np.clip(c2, lo, hi)
+    return c1, c2
+
+# ---------------- Permutation crossover ----------------
+# Genomes are permutations of 0..n-1, so membership tests are boolean-mask lookups
+# and every operator below is O(n) per child.
+
+# Order Crossover (OX)
 def order_crossover(a: np.ndarray, b: np.ndarray, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
     n = len(a)
     i, j = sorted(rng.choice(n, size=2, replace=False))
+    outside = np.ones(n, dtype=bool)
+    outside[i:j] = False
     def ox(p1, p2):
-        child = -np.ones(n, dtype=int)
+        child = np.empty_like(p1)
         child[i:j] = p1[i:j]
-        fill = [x for x in p2 if x not in child]
-        pos = 0
-        for k in range(n):
-            if child[k] == -1:
-                child[k] = fill[pos]
-                pos += 1
+        used = np.zeros(n, dtype=bool)
+        used[p1[i:j]] = True
+        child[outside] = p2[~used[p2]]  # p2's order, minus the copied segment
         return child
     return ox(a, b), ox(b, a)
 
+def pmx_crossover(a: np.ndarray, b: np.ndarray, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    c1, c2 = batch_pmx_crossover(a[None, :], b[None, :], rng)
+    return c1[0], c2[0]
+
+def cycle_crossover(a: np.ndarray, b: np.ndarray, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    c1, c2 = batch_cycle_crossover(a[None, :], b[None, :], rng)
+    return c1[0], c2[0]
+
+def edge_recombination_crossover(a: np.ndarray, b: np.ndarray, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    return _erx(a, b, rng), _erx(b, a, rng)
+
+def _erx(p1: np.ndarray, p2: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    n = len(p1)
+    # up to four tour neighbours per city from both parents (-1 marks duplicates)
+    adj = np.full((n, 4), -1, dtype=np.int64)
+    adj[p1, 0] = np.roll(p1, 1)
+    adj[p1, 1] = np.roll(p1, -1)
+    adj[p2, 2] = np.roll(p2, 1)
+    adj[p2, 3] = np.roll(p2, -1)
+    for col in (1, 2, 3):
+        dup = np.zeros(n, dtype=bool)
+        for prev in range(col):
+            dup |= adj[:, col] == adj[:, prev]
+        adj[dup, col] = -1
+    adj_l = adj.tolist()
+    visited = [False] * n
+    # unvisited cities in a swap-remove list for O(1) random restarts
+    remaining = list(range(n))
+    where = list(range(n))
+    def take(city):
+        visited[city] = True
+        k = where[city]
+        last = remaining[-1]
+        remaining[k] = last
+        where[last] = k
+        remaining.pop()
+    def degree(city):
+        return sum(1 for x in adj_l[city] if x >= 0 and not visited[x])
+
+    child = np.empty_like(p1)
+    cur = int(p1[0])
+    for pos in range(n):
+        child[pos] = cur
+        take(cur)
+        if not remaining:
+            break
+        cands = [x for x in adj_l[cur] if x >= 0 and not visited[x]]
+        if cands:
+            degs = [degree(x) for x in cands]
+            low = min(degs)
+            best = [x for x, d in zip(cands, degs) if d == low]
+            cur = best[int(rng.integers(len(best)))] if len(best) > 1 else best[0]
+        else:
+            cur = remaining[int(rng.integers(len(remaining)))]
+    return child
+
+# Batched permutation crossover over (m, n) parent matrices
+def _segments(m: int, n: int, rng: np.random.Generator) -> np.ndarray:
+    # per-row [lo, hi) from two distinct cut positions, like sorted(rng.choice(n, 2, replace=False))
+    i = rng.integers(0, n, size=m)
+    j = rng.integers(0, n - 1, size=m)
+    j += j >= i
+    lo, hi = np.minimum(i, j), np.maximum(i, j)
+    pos = np.arange(n)
+    return (pos >= lo[:, None]) & (pos < hi[:, None])
+
+def _values_in(P: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    # used[r, v] is True when value v sits in P[r] at a masked position
+    used = np.zeros(P.shape, dtype=bool)
+    rows = np.nonzero(mask)[0]
+    used[rows, P[mask]] = True
+    return used
+
+def batch_order_crossover(A: np.ndarray, B: np.ndarray, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    seg = _segments(*A.shape, rng)
+    def ox(P1, P2):
+        child = np.empty_like(P1)
+        child[seg] = P1[seg]
+        used = _values_in(P1, seg)
+        keep = ~np.take_along_axis(used, P2, axis=1)
+        child[~seg] = P2[keep]  # row-major order lines up: both sides have n - len(segment) per row
+        return child
+    return ox(A, B), ox(B, A)
+
+def batch_pmx_crossover(A: np.ndarray, B: np.ndarray, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    seg = _segments(*A.shape, rng)
+    def pmx(P1, P2):
+        pos1 = np.empty_like(P1)
+        np.put_along_axis(pos1, P1, np.broadcast_to(np.arange(P1.shape[1]), P1.shape), axis=1)
+        used = _values_in(P1, seg)
+        vals = P2.copy()
+        conflict = ~seg & np.take_along_axis(used, P2, axis=1)
+        # follow the segment mapping until every outside value is free; chains are disjoint
+        while conflict.any():
+            r, c = np.nonzero(conflict)
+            vals[r, c] = P2[r, pos1[r, vals[r, c]]]
+            conflict[r, c] = used[r, vals[r, c]]
+        return np.where(seg, P1, vals)
+    return pmx(A, B), pmx(B, A)
+
+def batch_cycle_crossover(A: np.ndarray, B: np.ndarray, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    m, n = A.shape
+    pos_a = np.empty_like(A)
+    np.put_along_axis(pos_a, A, np.broadcast_to(np.arange(n), A.shape), axis=1)
+    nxt = np.take_along_axis(pos_a, B, axis=1)  # position cycle: i -> where B[i] sits in A
+    # label each position with the smallest index on its cycle by pointer doubling
+    label = np.broadcast_to(np.arange(n), (m, n)).copy()
+    ptr = nxt
+    for _ in range(max(1, int(np.ceil(np.log2(max(n, 2))))) + 1):
+        label = np.minimum(label, np.take_along_axis(label, ptr, axis=1))
+        ptr = np.take_along_axis(ptr, ptr, axis=1)
+    starts = label == np.arange(n)
+    order = np.cumsum(starts, axis=1) - 1
+    cycle = np.take_along_axis(order, label, axis=1)
+    from_a = cycle % 2 == 0  # alternate cycles between parents
+    return np.where(from_a, A, B), np.where(from_a, B, A)
+
+def batch_edge_recombination_crossover(A: np.ndarray, B: np.ndarray, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    # ERX builds each tour city by city, so pairs are processed one at a time
+    c1 = np.empty_like(A)
+    c2 = np.empty_like(B)
+    for r in range(len(A)):
+        c1[r], c2[r] = edge_recombination_crossover(A[r], B[r], rng)
+    return c1, c2
+
 # ---------------- Mutation ----------------
 def gaussian_mutation(x: np.ndarray, rng: np.random.Generator, sigma: float = 0.1, bounds: Tuple[np.ndarray, np.ndarray] | None = None) -> np.ndarray:
     y = x + rng.normal(0.0, sigma, size=x.shape)
@@ -88,9 +274,56 @@ def random_reset_mutation(x: np.ndarray, rng: np.random.Generator, lo: np.ndarra
     y[mask] = rng.integers(lo[mask], hi[mask] + 1)
     return y
 
+# Batched mutation: every row of X is mutated
+def batch_gaussian_mutation(X: np.ndarray, rng: np.random.Generator, sigma: float = 0.1, bounds: Tuple[np.ndarray, np.ndarray] | None = None) -> np.ndarray:
+    return gaussian_mutation(X, rng, sigma=sigma, bounds=bounds)
+
+def batch_bitflip_mutation(X: np.ndarray, rng: np.random.Generator, p: float = 0.01) -> np.ndarray:
+    mask = rng.random(X.shape) < p
+    return np.where(mask, 1 - X, X)
+
 # Permutation swap mutation
 def swap_mutation(perm: np.ndarray, rng: np.random.Generator) -> np.ndarray:
     a, b = rng.choice(len(perm), size=2, replace=False)
     y = perm.copy()
     y[a], y[b] = y[b], y[a]
-    return y
\ No newline at end of file
+    return y
+
+def batch_swap_mutation(X: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    m, n = X.shape
+    i = rng.integers(0, n, size=m)
+    j = rng.integers(0, n - 1, size=m)
+    j += j >= i
+    rows = np.arange(m)
+    Y = X.copy()
+    Y[rows, i], Y[rows, j] = X[rows, j], X[rows, i]
+    return Y
+
+def batch_two_opt_mutation(X: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    m, n = X.shape
+    i = rng.integers(0, n, size=m)
+    j = rng.integers(0, n - 1, size=m)
+    j += j >= i
+    lo, hi = np.minimum(i, j)[:, None], np.maximum(i, j)[:, None]
+    pos = np.arange(n)
+    seg = (pos >= lo) & (pos <= hi)
+    src = np.where(seg, lo + hi - pos, pos)  # reverse each row's [lo, hi] in place
+    return np.take_along_axis(X, src, axis=1)
+
+# Move-reporting variants: return (child, move) so the engine can apply a fitness delta
+def swap_mutation_move(perm: np.ndarray, rng: np.random.Generator) -> Tuple[np.ndarray, Tuple[str, int, int]]:
+    a, b = rng.choice(len(perm), size=2, replace=False)
+    y = perm.copy()
+    y[a], y[b] = y[b], y[a]
+    return y, ("swap", int(a), int(b))
+swap_mutation_move.returns_move = True
+
+def two_opt_mutation_move(perm: np.ndarray, rng: np.random.Generator) -> Tuple[np.ndarray, Tuple[str, int, int]]:
+    i, j = sorted(rng.choice(len(perm), size=2, replace=False))
+    y = perm.copy()
+    y[i:j + 1] = y[i:j + 1][::-1]
+    return y, ("2opt", int(i), int(j))
+two_opt_mutation_move.returns_move = True
+
+def two_opt_mutation(perm: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    return two_opt_mutation_move(perm, rng)[0]
@@ -0,0 +1,94 @@
+from __future__ import annotations
+import os
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from typing import Any, Dict, Optional
+import numpy as np
+import cloudpickle
+
+# ---------------- Worker side ----------------
+_worker_fitness: Any = None
+_worker_blocks: Dict[str, shared_memory.SharedMemory] = {}
+
+def _init_worker(payload: bytes):
+    # the fitness closure (and the static problem data it captures) arrives once per worker
+    global _worker_fitness
+    _worker_fitness = cloudpickle.loads(payload)
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    shm = _worker_blocks.get(name)
+    if shm is None:
+        # the parent replaced its block (population grew); drop stale handles
+        for old in _worker_blocks.values():
+            old.close()
+        _worker_blocks.clear()
+        shm = shared_memory.SharedMemory(name=name)
+        _worker_blocks[name] = shm
+    return shm
+
+def _eval_rows(task) -> np.ndarray:
+    name, shape, dtype, start, stop = task
+    shm = _attach(name)
+    X = np.ndarray(shape, dtype=dtype, buffer=shm.buf)[start:stop]
+    batch_fn = getattr(_worker_fitness, "batch", None)
+    if batch_fn is not None:
+        out = np.asarray(batch_fn(X), dtype=float)
+    else:
+        out = np.asarray([_worker_fitness(x) for x in X], dtype=float)
+    del X
+    return out
+
+# ---------------- Parent side ----------------
+class PoolEvaluator:
+    """Evaluate populations on a worker pool that lives for a whole GA run.
+
+    The fitness function is serialized once when the workers start, and each
+    population is exchanged through a shared-memory block, so only row ranges
+    and fitness vectors travel through the pool's pipes.
+    """
+    def __init__(self, fitness_fn: Any, n_jobs: int, chunks_per_worker: int = 4):
+        self.n_jobs = int(n_jobs)
+        self.chunks_per_worker = int(chunks_per_worker)
+        payload = cloudpickle.dumps(fitness_fn)
+        if os.name == "posix":
+            # workers must share the parent's tracker, or each one reports the block as leaked
+            from multiprocessing import resource_tracker
+            resource_tracker.ensure_running()
+        self._pool = mp.get_context().Pool(self.n_jobs, initializer=_init_worker, initargs=(payload,))
+        self._shm: Optional[shared_memory.SharedMemory] = None
+
+    def _block(self, nbytes: int) -> shared_memory.SharedMemory:
+        if self._shm is None or self._shm.size < nbytes:
+            self._release_block()
+            self._shm = shared_memory.SharedMemory(create=True, size=max(nbytes, 1))
+        return self._shm
+
+    def _release_block(self):
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def __call__(self, X: np.ndarray) -> np.ndarray:
+        X = np.ascontiguousarray(X)
+        if len(X) == 0:
+            return np.empty((0,), dtype=float)
+        shm = self._block(X.nbytes)
+        np.ndarray(X.shape, dtype=X.dtype, buffer=shm.buf)[...] = X
+        n_chunks = min(len(X), self.n_jobs * self.chunks_per_worker)
+        bounds = np.linspace(0, len(X), n_chunks + 1).astype(int)
+        tasks = [(shm.name, X.shape, X.dtype.str, int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+        return np.concatenate(self._pool.map(_eval_rows, tasks))
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+        self._release_block()
+
+    def __enter__(self) -> "PoolEvaluator":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
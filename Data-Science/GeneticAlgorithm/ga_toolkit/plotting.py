@@ -19,6 +19,39 @@ def plot_fitness(best, mean, out_path: str, title: str = "GA Fitness"):
     fig.savefig(out_path, dpi=120)
     plt.close(fig)
 
+def plot_phase_times(phase_times, out_path: str, title: str = "GA Phase Times"):
+    """Stacked per-generation wall time by phase (``GAHistory.phase_times``)."""
+    ensure_dir(out_path)
+    phases = [p for p, t in phase_times.items() if any(t)]
+    fig, ax = plt.subplots()
+    if phases:
+        gens = np.arange(1, len(phase_times[phases[0]]) + 1)
+        ax.stackplot(gens, [1e3 * np.asarray(phase_times[p]) for p in phases], labels=phases)
+        ax.legend(loc="upper right", fontsize="small")
+    ax.set_title(title)
+    ax.set_xlabel("Generation")
+    ax.set_ylabel("Time (ms)")
+    fig.tight_layout()
+    fig.savefig(out_path, dpi=120)
+    plt.close(fig)
+
+def plot_pareto_front(front, out_path: str, labels=("Objective 1", "Objective 2"), population=None, title: str = "Pareto Front"):
+    """Scatter of a 2-objective front, optionally over the final population."""
+    ensure_dir(out_path)
+    front = np.asarray(front)
+    fig, ax = plt.subplots()
+    if population is not None:
+        population = np.asarray(population)
+        ax.scatter(population[:, 0], population[:, 1], s=8, c="lightgray", label="Population")
+    ax.plot(front[:, 0], front[:, 1], marker="o", markersize=3, linestyle="-", label="Pareto front")
+    ax.set_title(title)
+    ax.set_xlabel(labels[0])
+    ax.set_ylabel(labels[1])
+    ax.legend()
+    fig.tight_layout()
+    fig.savefig(out_path, dpi=120)
+    plt.close(fig)
+
 def plot_tsp_route(coords, perm, out_path: str, title: str = "Best TSP Route"):
     ensure_dir(out_path)
     path = coords[perm]
@@ -1,7 +1,12 @@
 from __future__ import annotations
-from typing import Tuple
+from typing import Optional, Tuple
 import numpy as np
 
+# Batch protocol: a fitness function may carry a ``batch`` attribute that maps a
+# (pop, dim) array to a fitness vector; the engine uses it whenever present.
+# Delta protocol: ``delta(parent, move)`` returns the fitness change of a move
+# reported by a ``returns_move`` mutation operator (see TSPProblem).
+
 # ---------------- Continuous Benchmarks ----------------
 def sphere(x: np.ndarray) -> float:
     return float(np.sum(x * x))
@@ -11,6 +16,17 @@ def rastrigin(x: np.ndarray) -> float:
     n = x.size
     return float(A * n + np.sum(x * x - A * np.cos(2 * np.pi * x)))
 
+def sphere_batch(X: np.ndarray) -> np.ndarray:
+    return np.sum(X * X, axis=1)
+
+def rastrigin_batch(X: np.ndarray) -> np.ndarray:
+    A = 10.0
+    n = X.shape[1]
+    return A * n + np.sum(X * X - A * np.cos(2 * np.pi * X), axis=1)
+
+sphere.batch = sphere_batch
+rastrigin.batch = rastrigin_batch
+
 # ---------------- Knapsack ----------------
 def knapsack_value(bits: np.ndarray, values: np.ndarray, weights: np.ndarray, capacity: float, penalty: float = 1e3) -> float:
     tot_w = float(np.sum(bits * weights))
@@ -20,6 +36,12 @@ def knapsack_value(bits: np.ndarray, values: np.ndarray, weights: np.ndarray, ca
     # penalize overweight linearly
     return tot_v - penalty * (tot_w - capacity)
 
+def knapsack_value_batch(B: np.ndarray, values: np.ndarray, weights: np.ndarray, capacity: float, penalty: float = 1e3) -> np.ndarray:
+    tot_w = B @ weights
+    tot_v = B @ values
+    over = np.maximum(tot_w - capacity, 0.0)
+    return tot_v - penalty * over
+
 def make_knapsack(n_items=50, seed: int = 42, capacity_ratio: float = 0.4) -> Tuple[np.ndarray, np.ndarray, float]:
     rng = np.random.default_rng(seed)
     values = rng.integers(10, 100, size=n_items).astype(float)
@@ -27,6 +49,31 @@ def make_knapsack(n_items=50, seed: int = 42, capacity_ratio: float = 0.4) -> Tu
     capacity = float(np.floor(np.sum(weights) * capacity_ratio))
     return values, weights, capacity
 
+class BiObjectiveKnapsack:
+    """0-1 knapsack as two minimized objectives, (-value, weight), for NSGA-II.
+
+    The Pareto front runs from the empty knapsack to the most valuable
+    packings. With ``capacity`` set, value is penalized beyond it the same way
+    as ``knapsack_value``. ``ref_point`` bounds the hypervolume: no value and
+    every item packed.
+    """
+    def __init__(self, values: np.ndarray, weights: np.ndarray, capacity: Optional[float] = None, penalty: float = 1e3):
+        self.values = np.asarray(values, dtype=float)
+        self.weights = np.asarray(weights, dtype=float)
+        self.capacity = capacity
+        self.penalty = penalty
+        self.ref_point = np.array([0.0, float(self.weights.sum())])
+
+    def __call__(self, bits: np.ndarray) -> np.ndarray:
+        return self.batch(np.asarray(bits)[None, :])[0]
+
+    def batch(self, B: np.ndarray) -> np.ndarray:
+        tot_w = B @ self.weights
+        tot_v = B @ self.values
+        if self.capacity is not None:
+            tot_v = tot_v - self.penalty * np.maximum(tot_w - self.capacity, 0.0)
+        return np.stack([-tot_v, tot_w], axis=1)
+
 # ---------------- TSP (2D Euclidean) ----------------
 def tsp_distance(perm: np.ndarray, coords: np.ndarray) -> float:
     # closed tour
@@ -35,6 +82,62 @@ def tsp_distance(perm: np.ndarray, coords: np.ndarray) -> float:
     d = np.sqrt(((path - shifted) ** 2).sum(axis=1)).sum()
     return float(d)
 
+def tsp_distance_batch(perms: np.ndarray, coords: np.ndarray) -> np.ndarray:
+    paths = coords[perms]  # (pop, n, 2)
+    shifted = np.roll(paths, -1, axis=1)
+    return np.sqrt(((paths - shifted) ** 2).sum(axis=2)).sum(axis=1)
+
+class TSPProblem:
+    """Closed-tour TSP over a precomputed distance matrix.
+
+    The instance is a fitness function (``problem(perm)``) with a ``batch``
+    path and a ``delta(perm, move)`` that returns the cost change of a single
+    ``("swap", i, j)`` or ``("2opt", i, j)`` move in O(1). The matrix costs
+    n^2 floats, i.e. ~8 MB at 1000 cities and ~200 MB at 5000.
+    """
+    def __init__(self, coords: np.ndarray):
+        self.coords = np.asarray(coords, dtype=float)
+        diff = self.coords[:, None, :] - self.coords[None, :, :]
+        self.dist = np.sqrt((diff ** 2).sum(axis=2))
+
+    def __call__(self, perm: np.ndarray) -> float:
+        return float(self.dist[perm, np.roll(perm, -1)].sum())
+
+    def batch(self, perms: np.ndarray) -> np.ndarray:
+        return self.dist[perms, np.roll(perms, -1, axis=1)].sum(axis=1)
+
+    def swap_delta(self, perm: np.ndarray, i: int, j: int) -> float:
+        n = len(perm)
+        if i == j or n < 3:
+            return 0.0
+        def at(p):
+            return perm[j] if p == i else perm[i] if p == j else perm[p]
+        # edges are keyed by their start position; adjacent swaps share one
+        starts = {(i - 1) % n, i, (j - 1) % n, j}
+        d = self.dist
+        old = sum(d[perm[p], perm[(p + 1) % n]] for p in starts)
+        new = sum(d[at(p), at((p + 1) % n)] for p in starts)
+        return float(new - old)
+
+    def two_opt_delta(self, perm: np.ndarray, i: int, j: int) -> float:
+        # reversing perm[i..j] (inclusive) replaces edges (i-1, i) and (j, j+1)
+        n = len(perm)
+        i, j = min(i, j), max(i, j)
+        if j - i < 1 or j - i >= n - 1:
+            return 0.0
+        a, b = perm[i - 1], perm[i]
+        c, e = perm[j], perm[(j + 1) % n]
+        d = self.dist
+        return float(d[a, c] + d[b, e] - d[a, b] - d[c, e])
+
+    def delta(self, perm: np.ndarray, move) -> float:
+        kind, i, j = move
+        if kind == "swap":
+            return self.swap_delta(perm, i, j)
+        if kind == "2opt":
+            return self.two_opt_delta(perm, i, j)
+        raise ValueError(f"Unknown move: {kind}")
+
 def make_cities(n=50, seed: int = 123) -> np.ndarray:
     rng = np.random.default_rng(seed)
     return rng.random((n, 2))  # in [0,1]^2
\ No newline at end of file
@@ -0,0 +1,358 @@
+"""Throughput and quality benchmarks for ga_toolkit.
+
+    python -m scripts.benchmark run --out outputs/bench.json
+    python -m scripts.benchmark run --problems tsp --levels 0,1 --modes ga,vectorized
+    python -m scripts.benchmark compare outputs/bench_base.json outputs/bench.json --tolerance 0.15
+
+Every (problem, size, engine mode) case runs a fixed number of generations
+from a fixed seed and records generations/sec, fitness evaluations/sec,
+time-to-target and peak traced memory.  The target is the halfway point (see
+``--target-frac``) between the initial population's best fitness and a
+reference value: 0 for sphere/rastrigin, greedy fill for knapsack and the
+nearest-neighbour tour for TSP.  The bi-objective knapsack runs under NSGA-II
+and is scored by the hypervolume of its first front against the front of
+greedy value/weight prefixes.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+import numpy as np
+from ga_toolkit.engine import GA, GAConfig, VectorizedGA
+from ga_toolkit.continuous import DifferentialEvolution, CMAES
+from ga_toolkit.nsga2 import NSGA2, hypervolume_2d
+from ga_toolkit import operators as ops
+from ga_toolkit import problems as P
+from scripts.cli import (make_real_init, make_binary_init, make_perm_init, make_real_batch_init,
+                         make_binary_batch_init, make_perm_batch_init)
+
+SIZES = {
+    "sphere": [10, 100, 1000],     # dimensions
+    "rastrigin": [10, 100, 1000],
+    "knapsack": [50, 500, 5000],   # items
+    "tsp": [50, 500, 5000],        # cities
+    "pareto-knapsack": [50, 500, 5000],
+}
+MODES = ["ga", "vectorized", "pool", "de", "cmaes", "nsga2"]
+REAL_PROBLEMS = ("sphere", "rastrigin")
+REAL_ONLY = ("de", "cmaes")  # continuous optimizers, skipped for knapsack/TSP
+# throughput metrics regress when they drop, cost metrics when they grow
+HIGHER_IS_BETTER = ("gens_per_sec", "evals_per_sec")
+LOWER_IS_BETTER = ("time_to_target", "peak_mem_mb")
+
+# -------- Evaluation counting --------
+class Counted:
+    """Forwards to a fitness function and counts full and incremental evaluations."""
+    def __init__(self, fn):
+        self.fn = fn
+        self.evals = 0
+        self.deltas = 0
+        if getattr(fn, "batch", None) is not None:
+            self.batch = self._batch
+        if getattr(fn, "delta", None) is not None:
+            self.delta = self._delta
+
+    def __call__(self, x):
+        self.evals += 1
+        return self.fn(x)
+
+    def _batch(self, X):
+        self.evals += len(X)
+        return self.fn.batch(X)
+
+    def _delta(self, perm, move):
+        self.deltas += 1
+        return self.fn.delta(perm, move)
+
+class CountedEvaluator:
+    """Pool workers hold their own copy of the fitness, so pool mode counts rows here."""
+    def __init__(self, evaluator, counter: Counted):
+        self.evaluator = evaluator
+        self.counter = counter
+
+    def __call__(self, X):
+        self.counter.evals += len(X)
+        return self.evaluator(X)
+
+    def close(self):
+        self.evaluator.close()
+
+# -------- Problems --------
+def nearest_neighbour_length(problem: P.TSPProblem) -> float:
+    D = problem.dist
+    n = len(D)
+    seen = np.zeros(n, dtype=bool)
+    tour = np.empty(n, dtype=int)
+    tour[0] = 0
+    seen[0] = True
+    for i in range(1, n):
+        d = np.where(seen, np.inf, D[tour[i - 1]])
+        tour[i] = int(np.argmin(d))
+        seen[tour[i]] = True
+    return float(problem(tour))
+
+def greedy_knapsack_value(values, weights, capacity) -> float:
+    bits = np.zeros(len(values), dtype=int)
+    w = 0.0
+    for i in np.argsort(-(values / weights), kind="stable"):
+        if w + weights[i] <= capacity:
+            bits[i] = 1
+            w += float(weights[i])
+    return float(P.knapsack_value(bits, values, weights, capacity))
+
+def greedy_front_hypervolume(problem: P.BiObjectiveKnapsack) -> float:
+    order = np.argsort(-(problem.values / problem.weights), kind="stable")
+    front = np.c_[-np.cumsum(problem.values[order]), np.cumsum(problem.weights[order])]
+    return hypervolume_2d(np.vstack([[0.0, 0.0], front]), problem.ref_point)
+
+def supports(problem: str, mode: str) -> bool:
+    if problem == "pareto-knapsack" or mode == "nsga2":
+        return problem == "pareto-knapsack" and mode == "nsga2"
+    return mode not in REAL_ONLY or problem in REAL_PROBLEMS
+
+def build_problem(name: str, size: int, seed: int) -> dict:
+    """Fitness, scalar/batch operators and a reference value for one case."""
+    if name in REAL_PROBLEMS:
+        lo, hi = np.full(size, -5.12), np.full(size, 5.12)
+        sigma = 0.1 * 10.24
+        return dict(
+            fitness=P.sphere if name == "sphere" else P.rastrigin, minimize=True, reference=0.0, bounds=(lo, hi),
+            init=lambda rng: make_real_init(size, lo, hi, rng),
+            batch_init=lambda rng: make_real_batch_init(size, lo, hi, rng),
+            crossover=lambda a, b, rg: ops.blx_alpha_crossover(a, b, rg, alpha=0.5, bounds=(lo, hi)),
+            batch_crossover=lambda A, B, rg: ops.batch_blx_alpha_crossover(A, B, rg, alpha=0.5, bounds=(lo, hi)),
+            mutation=lambda x, rg: ops.gaussian_mutation(x, rg, sigma=sigma, bounds=(lo, hi)),
+            batch_mutation=lambda X, rg: ops.batch_gaussian_mutation(X, rg, sigma=sigma, bounds=(lo, hi)),
+        )
+    if name == "knapsack":
+        values, weights, capacity = P.make_knapsack(n_items=size, seed=seed, capacity_ratio=0.4)
+        def fitness(bits):
+            return P.knapsack_value(bits, values, weights, capacity)
+        fitness.batch = lambda B: P.knapsack_value_batch(B, values, weights, capacity)
+        return dict(
+            fitness=fitness, minimize=False, reference=greedy_knapsack_value(values, weights, capacity),
+            init=lambda rng: make_binary_init(size, rng),
+            batch_init=lambda rng: make_binary_batch_init(size, rng),
+            crossover=ops.one_point_crossover,
+            batch_crossover=ops.batch_one_point_crossover,
+            mutation=lambda x, rg: ops.bitflip_mutation(x, rg, p=0.02),
+            batch_mutation=lambda X, rg: ops.batch_bitflip_mutation(X, rg, p=0.02),
+        )
+    if name == "pareto-knapsack":
+        values, weights, _ = P.make_knapsack(n_items=size, seed=seed)
+        problem = P.BiObjectiveKnapsack(values, weights)
+        return dict(
+            fitness=problem, minimize=False, reference=greedy_front_hypervolume(problem), ref_point=problem.ref_point,
+            batch_init=lambda rng: lambda n: (rng.random((n, size)) < rng.random((n, 1))).astype(int),
+            batch_crossover=ops.batch_uniform_crossover,
+            batch_mutation=lambda X, rg: ops.batch_bitflip_mutation(X, rg, p=0.02),
+        )
+    if name == "tsp":
+        problem = P.TSPProblem(P.make_cities(n=size, seed=seed))
+        return dict(
+            fitness=problem, minimize=True, reference=nearest_neighbour_length(problem),
+            init=lambda rng: make_perm_init(size, rng),
+            batch_init=lambda rng: make_perm_batch_init(size, rng),
+            crossover=ops.order_crossover,
+            batch_crossover=ops.batch_order_crossover,
+            mutation=ops.swap_mutation_move,
+            batch_mutation=ops.batch_swap_mutation,
+        )
+    raise ValueError(f"Unknown problem: {name}")
+
+def build_ga(spec: dict, mode: str, fitness, args) -> GA:
+    minimize = spec["minimize"]
+    select = lambda pop, fit, rg: ops.tournament_selection(pop, fit, rg, k=3, minimize=minimize)
+    select.batch = lambda fit, n, rg: ops.batch_tournament_selection(fit, n, rg, k=3, minimize=minimize)
+    # stall/target stopping is disabled so every case runs the same number of generations
+    cfg = GAConfig(pop_size=args.pop, generations=args.gens, cx_rate=0.9, mut_rate=0.2, elitism=1, minimize=minimize,
+                   stall_generations=0, seed=args.seed, n_jobs=args.jobs if mode == "pool" else 1)
+    rng = np.random.default_rng(args.seed)
+    if mode == "nsga2":
+        return NSGA2(fitness, spec["batch_init"](rng), spec["batch_mutation"], spec["batch_crossover"], cfg, ref_point=spec["ref_point"])
+    if mode == "de":
+        return DifferentialEvolution(fitness, spec["bounds"], cfg)
+    if mode == "cmaes":
+        return CMAES(fitness, spec["bounds"], cfg)
+    if mode == "vectorized":
+        return VectorizedGA(fitness, spec["batch_init"](rng), spec["batch_mutation"], spec["batch_crossover"], select, cfg)
+    return GA(fitness, spec["init"](rng), spec["mutation"], spec["crossover"], select, cfg)
+
+# -------- Measurement --------
+def score(ga: GA, state) -> float:
+    """Best fitness, or first-front hypervolume for NSGA-II."""
+    if isinstance(ga, NSGA2):
+        return hypervolume_2d(state.objs[state.ranks == 0], ga.ref_point)
+    return state.best_fit
+
+def timed_run(spec: dict, mode: str, args) -> dict:
+    fitness = Counted(spec["fitness"])
+    ga = build_ga(spec, mode, fitness, args)
+    ga._open()
+    if ga._evaluator is not None:
+        ga._evaluator = CountedEvaluator(ga._evaluator, fitness)
+    try:
+        t0 = time.perf_counter()
+        state = ga.start()
+        ref, init = spec["reference"], score(ga, state)
+        target = init + args.target_frac * (ref - init)
+        reached = None
+        while state.gen < ga.cfg.generations:
+            ga.step(state)
+            best = score(ga, state)
+            if reached is None and ((best <= target) if spec["minimize"] else (best >= target)):
+                reached = time.perf_counter() - t0
+        seconds = time.perf_counter() - t0
+    finally:
+        ga._close()
+    return dict(
+        seconds=seconds,
+        generations=state.gen,
+        gens_per_sec=state.gen / seconds,
+        evals=fitness.evals,
+        delta_evals=fitness.deltas,
+        evals_per_sec=fitness.evals / seconds,
+        initial_best=float(init),
+        target=float(target),
+        time_to_target=reached,
+        best_fitness=float(score(ga, state)),
+    )
+
+def peak_memory_mb(spec: dict, mode: str, args) -> float:
+    # separate short run: tracemalloc slows allocation-heavy code too much to time under it
+    short = argparse.Namespace(**{**vars(args), "gens": args.mem_gens})
+    ga = build_ga(spec, mode, spec["fitness"], short)
+    tracemalloc.start()
+    try:
+        ga.run()
+        return tracemalloc.get_traced_memory()[1] / 2 ** 20
+    finally:
+        tracemalloc.stop()
+
+def run_case(problem: str, size: int, mode: str, args) -> dict:
+    spec = build_problem(problem, size, args.seed)
+    runs = [timed_run(spec, mode, args) for _ in range(args.repeats)]
+    # runs are seeded, so only the timings differ between repeats; keep the median one
+    row = sorted(runs, key=lambda r: r["seconds"])[len(runs) // 2]
+    row["peak_mem_mb"] = peak_memory_mb(spec, mode, args) if args.mem_gens > 0 else None
+    return dict(problem=problem, size=size, mode=mode, pop=args.pop, reference=spec["reference"], **row)
+
+def fmt_ttt(v) -> str:
+    return "-" if v is None else f"{v:.3f}s"
+
+def cmd_run(args):
+    problems = args.problems.split(",")
+    levels = [int(x) for x in args.levels.split(",")]
+    modes = args.modes.split(",")
+    for m in modes:
+        if m not in MODES:
+            raise SystemExit(f"Unknown mode: {m} (choose from {', '.join(MODES)})")
+    results = []
+    print(f"{'problem':<15} {'size':>6} {'mode':<10} {'gens/s':>9} {'evals/s':>11} {'to target':>10} {'peak MB':>8} {'best':>14}")
+    for problem in problems:
+        if problem not in SIZES:
+            raise SystemExit(f"Unknown problem: {problem} (choose from {', '.join(SIZES)})")
+        for level in levels:
+            size = SIZES[problem][level]
+            for mode in modes:
+                if not supports(problem, mode):
+                    continue
+                r = run_case(problem, size, mode, args)
+                results.append(r)
+                mem = "-" if r["peak_mem_mb"] is None else f"{r['peak_mem_mb']:.1f}"
+                print(f"{problem:<15} {size:>6} {mode:<10} {r['gens_per_sec']:>9.1f} {r['evals_per_sec']:>11.0f} "
+                      f"{fmt_ttt(r['time_to_target']):>10} {mem:>8} {r['best_fitness']:>14.6g}", flush=True)
+    report = dict(
+        meta=dict(
+            created=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            python=platform.python_version(), numpy=np.__version__, platform=platform.platform(),
+            pop=args.pop, gens=args.gens, seed=args.seed, jobs=args.jobs, repeats=args.repeats,
+            target_frac=args.target_frac,
+        ),
+        results=results,
+    )
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.out}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if compare(baseline, report, args.tolerance):
+            sys.exit(1)
+
+# -------- Comparison --------
+def compare(baseline: dict, current: dict, tolerance: float) -> list:
+    """Print per-metric changes; returns the list of regressions."""
+    key = lambda r: (r["problem"], r["size"], r["mode"])
+    base = {key(r): r for r in baseline["results"]}
+    regressions = []
+    print(f"{'problem':<15} {'size':>6} {'mode':<10} {'metric':<15} {'baseline':>11} {'current':>11} {'change':>8}")
+    for r in current["results"]:
+        b = base.get(key(r))
+        if b is None:
+            continue
+        for metric in HIGHER_IS_BETTER + LOWER_IS_BETTER:
+            old, new = b.get(metric), r.get(metric)
+            if old is None and new is None:
+                continue
+            if metric == "time_to_target" and old is not None and new is None:
+                flag, change = "REGRESSION", "lost"
+            elif old is None or new is None or old == 0:
+                flag, change = "", "-" if new is None else "new"
+            else:
+                rel = new / old - 1.0
+                worse = rel < -tolerance if metric in HIGHER_IS_BETTER else rel > tolerance
+                flag, change = ("REGRESSION" if worse else ""), f"{rel:+.1%}"
+            if flag:
+                regressions.append((*key(r), metric))
+            fmt = lambda v: "-" if v is None else f"{v:.4g}"
+            print(f"{r['problem']:<15} {r['size']:>6} {r['mode']:<10} {metric:<15} {fmt(old):>11} {fmt(new):>11} {change:>8} {flag}")
+    missing = sorted(set(base) - {key(r) for r in current["results"]})
+    if missing:
+        print(f"{len(missing)} baseline case(s) not in current run")
+    print(f"{len(regressions)} regression(s) at tolerance {tolerance:.0%}")
+    return regressions
+
+def cmd_compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    if compare(baseline, current, args.tolerance):
+        sys.exit(1)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="ga_toolkit benchmarks")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    r = sub.add_parser("run", help="Run the benchmark matrix")
+    r.add_argument("--problems", default=",".join(SIZES), help="Comma-separated subset of: " + ", ".join(SIZES))
+    r.add_argument("--levels", default="0,1,2", help="Size levels (0=small, 1=medium, 2=large), e.g. dim 10/100/1000, cities 50/500/5000")
+    r.add_argument("--modes", default="ga,vectorized,pool,nsga2", help="Engine modes: ga (per-individual operators), vectorized (VectorizedGA), pool (GA with --jobs workers), de, cmaes (continuous problems only), nsga2 (pareto-knapsack only)")
+    r.add_argument("--pop", type=int, default=100)
+    r.add_argument("--gens", type=int, default=50)
+    r.add_argument("--jobs", type=int, default=2, help="Workers for the pool mode")
+    r.add_argument("--repeats", type=int, default=1, help="Timed repeats per case (median is kept)")
+    r.add_argument("--mem-gens", type=int, default=3, help="Generations of the traced run for peak memory (0 = skip)")
+    r.add_argument("--target-frac", type=float, default=0.5, help="Fraction of the gap from initial best to the reference value that counts as the target")
+    r.add_argument("--seed", type=int, default=7)
+    r.add_argument("--out", help="Write results JSON here")
+    r.add_argument("--baseline", help="Compare against this results JSON after the run")
+    r.add_argument("--tolerance", type=float, default=0.15, help="Relative change tolerated before flagging a regression")
+    r.set_defaults(func=cmd_run)
+
+    c = sub.add_parser("compare", help="Compare two results files")
+    c.add_argument("baseline")
+    c.add_argument("current")
+    c.add_argument("--tolerance", type=float, default=0.15)
+    c.set_defaults(func=cmd_compare)
+
+    args = ap.parse_args(argv)
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,13 @@
 import argparse
 import numpy as np
-from ga_toolkit.engine import GA, GAConfig
+from ga_toolkit.engine import GA, GAConfig, VectorizedGA
+from ga_toolkit.continuous import DifferentialEvolution, CMAES, cmaes_pop_size
+from ga_toolkit.nsga2 import NSGA2
+from ga_toolkit.islands import IslandModel, IslandConfig
+from ga_toolkit.local_search import LocalSearch, two_opt_improver, knapsack_improver, coordinate_descent_improver
 from ga_toolkit import operators as ops
 from ga_toolkit import problems as P
-from ga_toolkit.plotting import plot_fitness
+from ga_toolkit.plotting import plot_fitness, plot_phase_times, plot_pareto_front
 
 # -------- Utilities --------
 def real_bounds(dim, lo=-5.12, hi=5.12):
@@ -26,12 +30,94 @@ def make_perm_init(n, rng):
         return rng.permutation(n).astype(int)
     return init
 
+def make_real_batch_init(dim, lo, hi, rng):
+    def init(n):
+        return rng.uniform(lo, hi, size=(n, dim))
+    return init
+
+def make_binary_batch_init(dim, rng):
+    def init(n):
+        return rng.integers(0, 2, size=(n, dim)).astype(int)
+    return init
+
+def make_perm_batch_init(n, rng):
+    def init(m):
+        return rng.permuted(np.tile(np.arange(n), (m, 1)), axis=1)
+    return init
+
+PERM_CROSSOVERS = {
+    'ox': (ops.order_crossover, ops.batch_order_crossover),
+    'pmx': (ops.pmx_crossover, ops.batch_pmx_crossover),
+    'cx': (ops.cycle_crossover, ops.batch_cycle_crossover),
+    'erx': (ops.edge_recombination_crossover, ops.batch_edge_recombination_crossover),
+}
+
+def make_select(args, minimize):
+    # scalar selector for the per-child path; ``.batch`` draws a whole generation of parent indices
+    if args.selection == 'tournament':
+        select = lambda pop,fit,rg: ops.tournament_selection(pop,fit,rg,k=args.k, minimize=minimize)
+        select.batch = lambda fit,n,rg: ops.batch_tournament_selection(fit,n,rg,k=args.k, minimize=minimize)
+    else:
+        select = lambda pop,fit,rg: ops.roulette_selection(pop,fit,rg, minimize=minimize)
+        batch = ops.sus_selection if args.selection == 'sus' else ops.batch_roulette_selection
+        select.batch = lambda fit,n,rg: batch(fit,n,rg, minimize=minimize)
+    return select
+
+def report_stats(res):
+    h = res.history
+    if h.cache_hits or h.cache_misses:
+        print(f"Fitness cache: {h.cache_hits} hits, {h.cache_misses} misses")
+    if h.ls_steps:
+        print(f"Local search: {sum(h.ls_improved)} improvements, {sum(h.ls_steps)} steps, {sum(h.ls_time):.2f}s")
+    if h.phase_times:
+        print(f"Phase times ({sum(h.fitness_evals)} fitness evals, {sum(h.delta_evals)} delta evals):")
+        report_phases(h.phase_times)
+
+def report_phases(phase_times):
+    totals = {p: sum(t) for p, t in phase_times.items() if any(t)}
+    grand = sum(totals.values()) or 1.0
+    for p, t in sorted(totals.items(), key=lambda kv: -kv[1]):
+        print(f"  {p:<13}{t:8.3f}s {100 * t / grand:5.1f}%")
+
+def run_ga(make_ga, args, minimize):
+    if args.islands > 1 and (args.checkpoint_every or args.resume):
+        raise SystemExit("--checkpoint-every/--resume apply to single-population runs (--islands 1)")
+    if args.resume:
+        return make_ga(args.seed).resume(args.resume)
+    if args.islands > 1:
+        icfg = IslandConfig(n_islands=args.islands, migrate_every=args.migrate_every, migrants=args.migrants, topology=args.topology)
+        return IslandModel(make_ga, icfg, seed=args.seed, minimize=minimize).run()
+    return make_ga(args.seed).run()
+
+def make_local_search(args, improve):
+    if args.ls_fraction <= 0:
+        return None
+    return LocalSearch(improve, fraction=args.ls_fraction, max_steps=args.ls_steps, time_budget=args.ls_time)
+
+def add_local_search_args(p, steps_help):
+    p.add_argument("--ls-fraction", type=float, default=0.0, help="Fraction of each generation improved by local search (0 = off)")
+    p.add_argument("--ls-steps", type=int, default=200, help=f"Local-search step budget per generation ({steps_help})")
+    p.add_argument("--ls-time", type=float, help="Local-search time budget per generation, seconds")
+
+def add_profile_args(p):
+    p.add_argument("--profile", action="store_true", help="Time each GA phase per generation and print a breakdown")
+    p.add_argument("--phase-plot", help="Save stacked phase-time PNG (implies --profile)")
+
+def add_checkpoint_args(p):
+    p.add_argument("--checkpoint-every", type=int, default=0, help="Write a checkpoint every N generations (0 = off)")
+    p.add_argument("--checkpoint", default="outputs/ga_checkpoint.npz", help="Checkpoint file")
+    p.add_argument("--resume", help="Continue from this checkpoint (same arguments as the original run)")
+
+def add_island_args(p):
+    p.add_argument("--islands", type=int, default=1, help="Independent populations, one process each (1 = off)")
+    p.add_argument("--migrate-every", type=int, default=10, help="Generations between island migrations")
+    p.add_argument("--migrants", type=int, default=2, help="Top-k individuals each island sends per migration")
+    p.add_argument("--topology", choices=["ring","full"], default="ring")
+
 # -------- CLI commands --------
 def cmd_optimize(args):
-    rng = np.random.default_rng(args.seed)
     dim = args.dim
     lo, hi = real_bounds(dim, args.lower, args.upper)
-    init_fn = make_real_init(dim, lo, hi, rng)
 
     # choose problem
     if args.problem == 'sphere':
@@ -55,18 +141,44 @@ def cmd_optimize(args):
     else:
         mutation = lambda x,rg: ops.gaussian_mutation(x, rg, sigma=0.1 * (args.upper - args.lower), bounds=(lo,hi))
 
-    select = (lambda pop,fit,rg: ops.tournament_selection(pop,fit,rg,k=args.k, minimize=minimize)) if args.selection=='tournament' else (lambda pop,fit,rg: ops.roulette_selection(pop,fit,rg, minimize=minimize))
+    select = make_select(args, minimize)
+
+    if args.vectorized:
+        if args.crossover == 'blx':
+            crossover = lambda A,B,rg: ops.batch_blx_alpha_crossover(A,B,rg, alpha=args.alpha, bounds=(lo,hi))
+        elif args.crossover == 'onepoint':
+            crossover = ops.batch_one_point_crossover
+        else:
+            crossover = ops.batch_uniform_crossover
+        sigma = args.sigma if args.sigma is not None else 0.1 * (args.upper - args.lower)
+        mutation = lambda X,rg: ops.batch_gaussian_mutation(X, rg, sigma=sigma, bounds=(lo,hi))
+
+    ls = make_local_search(args, coordinate_descent_improver(fitness, (lo, hi), step=0.05 * (args.upper - args.lower), minimize=minimize))
 
-    cfg = GAConfig(pop_size=args.pop, generations=args.gens, cx_rate=args.cx_rate, mut_rate=args.mut_rate, elitism=args.elite, minimize=minimize, stall_generations=args.stall, target_fitness=args.target, seed=args.seed, n_jobs=args.jobs)
-    ga = GA(fitness, init_fn, mutation, crossover, select, cfg)
-    res = ga.run()
+    pop = args.pop or (cmaes_pop_size(dim) if args.engine == 'cmaes' else 100)
+
+    def make_ga(seed):
+        rng = np.random.default_rng(seed)
+        cfg = GAConfig(pop_size=pop, generations=args.gens, cx_rate=args.cx_rate, mut_rate=args.mut_rate, elitism=args.elite, minimize=minimize, stall_generations=args.stall, target_fitness=args.target, seed=seed, n_jobs=args.jobs, cache_size=args.cache_size, checkpoint_every=args.checkpoint_every, checkpoint_path=args.checkpoint, profile=args.profile or bool(args.phase_plot))
+        if args.engine == 'de':
+            return DifferentialEvolution(fitness, (lo, hi), cfg, F=args.de_f, CR=args.de_cr, strategy=args.de_strategy, local_search=ls)
+        if args.engine == 'cmaes':
+            return CMAES(fitness, (lo, hi), cfg, sigma0=args.cma_sigma, diagonal=args.cma_diagonal, restarts=args.cma_restarts, local_search=ls)
+        if args.vectorized:
+            return VectorizedGA(fitness, make_real_batch_init(dim, lo, hi, rng), mutation, crossover, select, cfg, local_search=ls)
+        return GA(fitness, make_real_init(dim, lo, hi, rng), mutation, crossover, select, cfg, local_search=ls)
+    res = run_ga(make_ga, args, minimize)
 
     print(f"Best fitness: {res.best_fitness:.6f}")
+    if res.history.fitness_evals:
+        print(f"Fitness evaluations: {sum(res.history.fitness_evals)}")
+    report_stats(res)
     if args.plot:
         plot_fitness(res.history.best_fitness, res.history.mean_fitness, args.plot, title=f"{args.problem}")
+    if args.phase_plot:
+        plot_phase_times(res.history.phase_times, args.phase_plot, title=f"{args.problem} phases")
 
 def cmd_knapsack(args):
-    rng = np.random.default_rng(args.seed)
     values, weights, capacity = P.make_knapsack(n_items=args.items, seed=args.seed, capacity_ratio=args.capacity_ratio)
 
     def fitness(bits):
@@ -74,45 +186,89 @@ def cmd_knapsack(args):
     # We actually want to MAXIMIZE value; engine uses minimize flag to control; so set minimize=False and use value as fitness for maximize path.
     def fitness_max(bits):
         return P.knapsack_value(bits, values, weights, capacity)
+    fitness_max.batch = lambda B: P.knapsack_value_batch(B, values, weights, capacity)
 
-    init = make_binary_init(len(values), rng)
     crossover = ops.one_point_crossover
     mutation = lambda x,rg: ops.bitflip_mutation(x, rg, p=args.bitflip)
-    select = (lambda pop,fit,rg: ops.tournament_selection(pop,fit,rg,k=args.k, minimize=False)) if args.selection=='tournament' else (lambda pop,fit,rg: ops.roulette_selection(pop,fit,rg, minimize=False))
+    select = make_select(args, minimize=False)
+
+    if args.vectorized:
+        crossover = ops.batch_one_point_crossover
+        mutation = lambda X,rg: ops.batch_bitflip_mutation(X, rg, p=args.bitflip)
+
+    ls = make_local_search(args, knapsack_improver(values, weights, capacity))
 
-    cfg = GAConfig(pop_size=args.pop, generations=args.gens, cx_rate=args.cx_rate, mut_rate=args.mut_rate, elitism=args.elite, minimize=False, stall_generations=args.stall, seed=args.seed, n_jobs=args.jobs)
-    ga = GA(fitness_max, init, mutation, crossover, select, cfg)
-    res = ga.run()
+    def make_ga(seed):
+        rng = np.random.default_rng(seed)
+        cfg = GAConfig(pop_size=args.pop, generations=args.gens, cx_rate=args.cx_rate, mut_rate=args.mut_rate, elitism=args.elite, minimize=False, stall_generations=args.stall, seed=seed, n_jobs=args.jobs, cache_size=args.cache_size, checkpoint_every=args.checkpoint_every, checkpoint_path=args.checkpoint, profile=args.profile or bool(args.phase_plot))
+        if args.vectorized:
+            return VectorizedGA(fitness_max, make_binary_batch_init(len(values), rng), mutation, crossover, select, cfg, local_search=ls)
+        return GA(fitness_max, make_binary_init(len(values), rng), mutation, crossover, select, cfg, local_search=ls)
+    res = run_ga(make_ga, args, minimize=False)
 
     print(f"Best value: {res.best_fitness:.2f} (capacity={capacity:.1f})")
+    report_stats(res)
     if args.plot:
         plot_fitness(res.history.best_fitness, res.history.mean_fitness, args.plot, title="Knapsack")
+    if args.phase_plot:
+        plot_phase_times(res.history.phase_times, args.phase_plot, title="Knapsack phases")
 
 def cmd_tsp(args):
-    rng = np.random.default_rng(args.seed)
     coords = P.make_cities(n=args.cities, seed=args.seed)
     n = len(coords)
-    init = make_perm_init(n, rng)
-    def fitness(perm):
-        return P.tsp_distance(perm, coords)  # minimize
-    crossover = ops.order_crossover
-    mutation = ops.swap_mutation
-    select = (lambda pop,fit,rg: ops.tournament_selection(pop,fit,rg,k=args.k, minimize=True)) if args.selection=='tournament' else (lambda pop,fit,rg: ops.roulette_selection(pop,fit,rg, minimize=True))
-
-    cfg = GAConfig(pop_size=args.pop, generations=args.gens, cx_rate=args.cx_rate, mut_rate=args.mut_rate, elitism=args.elite, minimize=True, stall_generations=args.stall, seed=args.seed, n_jobs=args.jobs)
-    # Wrap mutation probability at engine-level: we'll apply or not via mut_rate, swap is single op
-    def mutate_wrapper(x, rg):
-        return mutation(x, rg)
-    ga = GA(fitness, init, mutate_wrapper, crossover, select, cfg)
-    res = ga.run()
+    # distance matrix once; swap/2-opt children are costed incrementally from their parent
+    fitness = P.TSPProblem(coords)  # minimize
+    crossover = PERM_CROSSOVERS[args.crossover][0]
+    mutation = ops.two_opt_mutation_move if args.mutation == '2opt' else ops.swap_mutation_move
+    select = make_select(args, minimize=True)
+    if args.vectorized:
+        crossover = PERM_CROSSOVERS[args.crossover][1]
+        mutation = ops.batch_two_opt_mutation if args.mutation == '2opt' else ops.batch_swap_mutation
+
+    ls = make_local_search(args, two_opt_improver(fitness))
+
+    def make_ga(seed):
+        rng = np.random.default_rng(seed)
+        cfg = GAConfig(pop_size=args.pop, generations=args.gens, cx_rate=args.cx_rate, mut_rate=args.mut_rate, elitism=args.elite, minimize=True, stall_generations=args.stall, target_fitness=args.target, seed=seed, n_jobs=args.jobs, cache_size=args.cache_size, checkpoint_every=args.checkpoint_every, checkpoint_path=args.checkpoint, profile=args.profile or bool(args.phase_plot))
+        if args.vectorized:
+            return VectorizedGA(fitness, make_perm_batch_init(n, rng), mutation, crossover, select, cfg, local_search=ls)
+        return GA(fitness, make_perm_init(n, rng), mutation, crossover, select, cfg, local_search=ls)
+    res = run_ga(make_ga, args, minimize=True)
 
     print(f"Best tour length: {res.best_fitness:.6f}")
+    report_stats(res)
     if args.plot:
         plot_fitness(res.history.best_fitness, res.history.mean_fitness, args.plot, title="TSP")
+    if args.phase_plot:
+        plot_phase_times(res.history.phase_times, args.phase_plot, title="TSP phases")
     if args.route_plot:
         from ga_toolkit.plotting import plot_tsp_route
         plot_tsp_route(coords, res.best_individual, args.route_plot, title="Best TSP Tour")
 
+def cmd_pareto_knapsack(args):
+    values, weights, _ = P.make_knapsack(n_items=args.items, seed=args.seed)
+    problem = P.BiObjectiveKnapsack(values, weights)  # minimize (-value, weight)
+    rng = np.random.default_rng(args.seed)
+    # sparse random packings spread the initial population along the weight axis
+    init = lambda n: (rng.random((n, len(values))) < rng.random((n, 1))).astype(int)
+    mutation = lambda X,rg: ops.batch_bitflip_mutation(X, rg, p=args.bitflip)
+    cfg = GAConfig(pop_size=args.pop, generations=args.gens, cx_rate=args.cx_rate, mut_rate=args.mut_rate, seed=args.seed, n_jobs=args.jobs, profile=args.profile or bool(args.phase_plot))
+    res = NSGA2(problem, init, mutation, ops.batch_uniform_crossover, cfg, ref_point=problem.ref_point).run()
+
+    front = res.pareto_front
+    print(f"Pareto front: {len(front)} solutions after {res.generations} generations, hypervolume {res.history.hypervolume[-1]:.1f}")
+    print(f"Fitness evaluations: {sum(res.history.fitness_evals)}")
+    for i in np.linspace(0, len(front) - 1, min(args.show, len(front))).astype(int):
+        print(f"  value {-front[i, 0]:8.1f}  weight {front[i, 1]:7.1f}")
+    if res.history.phase_times:
+        print("Phase times:")
+        report_phases(res.history.phase_times)
+    if args.plot:
+        plot_pareto_front(np.c_[front[:, 1], -front[:, 0]], args.plot, labels=("Weight", "Value"),
+                          population=np.c_[res.objectives[:, 1], -res.objectives[:, 0]], title="Knapsack: value vs weight")
+    if args.phase_plot:
+        plot_phase_times(res.history.phase_times, args.phase_plot, title="NSGA-II phases")
+
 def main(argv=None):
     ap = argparse.ArgumentParser(description="Genetic Algorithms Toolkit")
     sub = ap.add_subparsers(dest="cmd", required=True)
@@ -123,20 +279,33 @@ def main(argv=None):
     o.add_argument("--dim", type=int, default=20)
     o.add_argument("--lower", type=float, default=-5.12)
     o.add_argument("--upper", type=float, default=5.12)
-    o.add_argument("--pop", type=int, default=100)
+    o.add_argument("--engine", choices=["ga","de","cmaes"], default="ga", help="Genetic algorithm, differential evolution or CMA-ES")
+    o.add_argument("--pop", type=int, help="Population size (default: 100; cmaes: 4 + 3 ln(dim))")
     o.add_argument("--gens", type=int, default=200)
     o.add_argument("--cx-rate", type=float, default=0.9)
     o.add_argument("--mut-rate", type=float, default=0.2)
     o.add_argument("--elite", type=int, default=1)
     o.add_argument("--stall", type=int, default=60)
     o.add_argument("--target", type=float)
-    o.add_argument("--selection", choices=["tournament","roulette"], default="tournament")
+    o.add_argument("--selection", choices=["tournament","roulette","sus"], default="tournament", help="Parent selection (roulette/sus use rank scaling)")
     o.add_argument("--k", type=int, default=3, help="Tournament size")
     o.add_argument("--crossover", choices=["blx","onepoint","uniform"], default="blx")
     o.add_argument("--alpha", type=float, default=0.5, help="BLX alpha")
     o.add_argument("--mutation", choices=["gaussian"], default="gaussian")
     o.add_argument("--sigma", type=float, help="Gaussian sigma (default: 0.1 * range)")
+    o.add_argument("--de-f", type=float, default=0.5, help="DE difference scale F")
+    o.add_argument("--de-cr", type=float, default=0.9, help="DE crossover rate (~0.1 suits separable problems like rastrigin)")
+    o.add_argument("--de-strategy", choices=["rand/1/bin","best/1/bin","current-to-best/1/bin"], default="rand/1/bin")
+    o.add_argument("--cma-sigma", type=float, help="CMA-ES initial step size (default: 0.3 * range)")
+    o.add_argument("--cma-diagonal", action="store_true", help="Diagonal covariance (sep-CMA-ES), for high dimensions")
+    o.add_argument("--cma-restarts", type=int, default=0, help="IPOP restarts with doubled population on convergence (pair with a large --stall)")
     o.add_argument("--jobs", type=int, default=1, help="Parallel workers for fitness")
+    o.add_argument("--vectorized", action="store_true", help="Use the array-backed VectorizedGA engine")
+    add_island_args(o)
+    add_checkpoint_args(o)
+    add_profile_args(o)
+    add_local_search_args(o, "batched coordinate probes")
+    o.add_argument("--cache-size", type=int, default=0, help="LRU fitness cache entries (0 = off)")
     o.add_argument("--plot", help="Save fitness curve PNG")
     o.add_argument("--seed", type=int, default=42)
     o.set_defaults(func=cmd_optimize)
@@ -152,9 +321,15 @@ def main(argv=None):
     k.add_argument("--bitflip", type=float, default=0.02)
     k.add_argument("--elite", type=int, default=1)
     k.add_argument("--stall", type=int, default=80)
-    k.add_argument("--selection", choices=["tournament","roulette"], default="tournament")
+    k.add_argument("--selection", choices=["tournament","roulette","sus"], default="tournament", help="Parent selection (roulette/sus use rank scaling)")
     k.add_argument("--k", type=int, default=3)
     k.add_argument("--jobs", type=int, default=1)
+    k.add_argument("--vectorized", action="store_true", help="Use the array-backed VectorizedGA engine")
+    add_island_args(k)
+    add_checkpoint_args(k)
+    add_profile_args(k)
+    add_local_search_args(k, "bit flips")
+    k.add_argument("--cache-size", type=int, default=0, help="LRU fitness cache entries (0 = off)")
     k.add_argument("--plot", help="Save fitness curve PNG")
     k.add_argument("--seed", type=int, default=123)
     k.set_defaults(func=cmd_knapsack)
@@ -167,15 +342,39 @@ def main(argv=None):
     t.add_argument("--cx-rate", type=float, default=0.9)
     t.add_argument("--mut-rate", type=float, default=0.2)
     t.add_argument("--elite", type=int, default=1)
+    t.add_argument("--crossover", choices=list(PERM_CROSSOVERS), default="ox", help="Permutation crossover: order, partially-mapped, cycle, edge recombination")
+    t.add_argument("--mutation", choices=["swap","2opt"], default="swap")
     t.add_argument("--stall", type=int, default=120)
-    t.add_argument("--selection", choices=["tournament","roulette"], default="tournament")
+    t.add_argument("--target", type=float, help="Stop once the tour is this short")
+    t.add_argument("--selection", choices=["tournament","roulette","sus"], default="tournament", help="Parent selection (roulette/sus use rank scaling)")
     t.add_argument("--k", type=int, default=3)
     t.add_argument("--jobs", type=int, default=1)
+    t.add_argument("--vectorized", action="store_true", help="Use the array-backed VectorizedGA engine")
+    add_island_args(t)
+    add_checkpoint_args(t)
+    add_profile_args(t)
+    add_local_search_args(t, "2-opt moves")
+    t.add_argument("--cache-size", type=int, default=0, help="LRU fitness cache entries (0 = off)")
     t.add_argument("--plot", help="Save fitness curve PNG")
     t.add_argument("--route-plot", help="Save best route PNG")
     t.add_argument("--seed", type=int, default=321)
     t.set_defaults(func=cmd_tsp)
 
+    # bi-objective knapsack
+    m = sub.add_parser("pareto-knapsack", help="Bi-objective 0-1 knapsack (value vs weight) with NSGA-II")
+    m.add_argument("--items", type=int, default=50)
+    m.add_argument("--pop", type=int, default=200)
+    m.add_argument("--gens", type=int, default=250)
+    m.add_argument("--cx-rate", type=float, default=0.9)
+    m.add_argument("--mut-rate", type=float, default=0.5)
+    m.add_argument("--bitflip", type=float, default=0.02)
+    m.add_argument("--jobs", type=int, default=1)
+    m.add_argument("--show", type=int, default=8, help="Front points to print")
+    add_profile_args(m)
+    m.add_argument("--plot", help="Save Pareto front PNG")
+    m.add_argument("--seed", type=int, default=123)
+    m.set_defaults(func=cmd_pareto_knapsack)
+
     args = ap.parse_args(argv)
     args.func(args)
 
@@ -0,0 +1,195 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from scipy.sparse import csr_matrix
+from utils.data import extend_interaction_matrix, id_index
+from .batch import batch_top_k, index_to_ids
+from .ann import IVFIndex, search_users
+from .persist import save_arrays, load_arrays, ids_array, save_index, load_index
+
+class ALSFactorization:
+    """Implicit-feedback matrix factorization by confidence-weighted alternating
+    least squares (Hu, Koren & Volinsky, 2008).
+
+    Every stored rating r > 0 is a positive preference with confidence
+    1 + alpha * r; missing entries are negatives with confidence 1. The
+    missing entries are never materialized: each solve starts from the shared
+    Gram matrix Y^T Y and only adds the user's own items, so a sweep is linear
+    in nnz. solver='cg' runs ``cg_steps`` conjugate-gradient steps per sweep
+    for a whole block of rows at once, warm-started from the current factors;
+    solver='cholesky' solves every row exactly. Blocks of ``block_size`` rows
+    run on ``n_jobs`` threads. With warm_start=True, refitting keeps the
+    factors of users and items that are still present.
+    """
+    def __init__(self, factors=50, regularization=0.01, alpha=40.0, iterations=15, solver='cg', cg_steps=3,
+                 n_jobs=1, block_size=1024, warm_start=False, random_state=0):
+        assert solver in {'cg', 'cholesky'}
+        self.factors = int(factors)
+        self.regularization = float(regularization)
+        self.alpha = float(alpha)
+        self.iterations = int(iterations)
+        self.solver = solver
+        self.cg_steps = int(cg_steps)
+        self.n_jobs = n_jobs
+        self.block_size = int(block_size)
+        self.warm_start = bool(warm_start)
+        self.random_state = random_state
+        self.user_factors_ = None
+        self.item_factors_ = None
+        self.R_ = None
+        self.user_map_ = None
+        self.item_map_ = None
+        self.item_ids_ = None
+        self.index_ = None  # optional IVFIndex over the item factors
+
+    def _init_factors(self, index, old_index, old, rng):
+        F = (rng.standard_normal((len(index), self.factors)) * 0.01).astype(np.float32)
+        if old is not None:
+            # keep the rows of ids we already have factors for
+            pairs = [(i, old_index[key]) for key, i in index.items() if key in old_index]
+            if pairs:
+                new_rows, old_rows = map(list, zip(*pairs))
+                F[new_rows] = old[old_rows]
+        return F
+
+    def fit(self, R: csr_matrix, user_map, item_map):
+        """R: csr (n_users, n_items) of interaction strengths (0/1 or ratings)."""
+        rng = np.random.default_rng(self.random_state)
+        warm = self.warm_start and self.user_factors_ is not None
+        X = self._init_factors(user_map, self.user_map_, self.user_factors_ if warm else None, rng)
+        Y = self._init_factors(item_map, self.item_map_, self.item_factors_ if warm else None, rng)
+        self.R_ = R.tocsr()
+        self.user_map_ = user_map
+        self.item_map_ = item_map
+        self.item_ids_ = index_to_ids(item_map)
+
+        Cu = self._confidence(self.R_)
+        Ci = self._confidence(self.R_.T.tocsr())
+        n_jobs = os.cpu_count() if self.n_jobs in (-1, None) else int(self.n_jobs)
+        with ThreadPoolExecutor(max(n_jobs, 1)) as pool:
+            for _ in range(self.iterations):
+                X = self._sweep(Cu, Y, X, pool)
+                Y = self._sweep(Ci, X, Y, pool)
+        self.user_factors_ = X
+        self.item_factors_ = Y
+        return self
+
+    def save(self, path):
+        """Write the fitted model (and its index, if built) to the directory ``path``."""
+        params = dict(factors=self.factors, regularization=self.regularization, alpha=self.alpha, iterations=self.iterations,
+                      solver=self.solver, cg_steps=self.cg_steps, n_jobs=self.n_jobs, block_size=self.block_size,
+                      warm_start=self.warm_start, random_state=self.random_state)
+        save_arrays(path, self, params, {
+            'user_factors': self.user_factors_, 'item_factors': self.item_factors_, 'R': self.R_,
+            'user_ids': ids_array(index_to_ids(self.user_map_)), 'item_ids': ids_array(self.item_ids_)})
+        save_index(self, path)
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """Model written by ``save``; its arrays are memory-mapped unless mmap_mode=None."""
+        params, a = load_arrays(path, cls, mmap_mode)
+        model = cls(**params)
+        model.user_factors_, model.item_factors_, model.R_ = a['user_factors'], a['item_factors'], a['R']
+        model.user_map_, model.item_map_ = id_index(a['user_ids']), id_index(a['item_ids'])
+        model.item_ids_ = index_to_ids(model.item_map_)
+        return load_index(model, path, mmap_mode)
+
+    def _confidence(self, R):
+        # stored entries carry alpha * r (the confidence above 1); r <= 0 is not a preference
+        C = csr_matrix((self.alpha * np.maximum(R.data, 0), R.indices, R.indptr), shape=R.shape, dtype=np.float32, copy=True)
+        C.eliminate_zeros()
+        return C
+
+    def _sweep(self, C, Y, X, pool):
+        # solve every row of X against fixed Y; blocks write disjoint slices
+        YtY = Y.T @ Y + self.regularization * np.eye(self.factors, dtype=np.float32)
+        out = np.empty_like(X)
+        solve = self._cg_block if self.solver == 'cg' else self._cholesky_block
+        bounds = [(s, min(s + self.block_size, X.shape[0])) for s in range(0, X.shape[0], self.block_size)]
+        list(pool.map(lambda b: solve(C, Y, YtY, X, out, *b), bounds))
+        return out
+
+    def _cg_block(self, C, Y, YtY, X, out, start, stop):
+        Cb = C[start:stop]
+        rows = np.repeat(np.arange(stop - start), np.diff(Cb.indptr))
+        Yi = Y[Cb.indices]
+
+        def A(V):
+            # (Y^T C_u Y + reg I) v = (YtY + reg I) v + Y_u^T ((c_u - 1) * (Y_u v)), for every row at once
+            t = np.einsum('nf,nf->n', Yi, V[rows]) * Cb.data
+            return V @ YtY + csr_matrix((t, Cb.indices, Cb.indptr), shape=Cb.shape) @ Y
+
+        x = X[start:stop].copy()
+        b = csr_matrix((Cb.data + 1, Cb.indices, Cb.indptr), shape=Cb.shape) @ Y  # Y_u^T c_u p_u
+        r = b - A(x)
+        p = r.copy()
+        rs = np.einsum('bf,bf->b', r, r)
+        for _ in range(self.cg_steps):
+            Ap = A(p)
+            pAp = np.einsum('bf,bf->b', p, Ap)
+            a = np.divide(rs, pAp, out=np.zeros_like(rs), where=pAp > 0)
+            x += a[:, None] * p
+            r -= a[:, None] * Ap
+            rs_new = np.einsum('bf,bf->b', r, r)
+            if rs_new.max(initial=0) < 1e-20:
+                break
+            p = r + np.divide(rs_new, rs, out=np.zeros_like(rs), where=rs > 0)[:, None] * p
+            rs = rs_new
+        out[start:stop] = x
+
+    def _cholesky_block(self, C, Y, YtY, X, out, start, stop):
+        self._cholesky_rows(C, Y, YtY, out, range(start, stop))
+
+    def _cholesky_rows(self, C, Y, YtY, out, rows):
+        for u in rows:
+            lo, hi = C.indptr[u], C.indptr[u + 1]
+            Yu, c = Y[C.indices[lo:hi]], C.data[lo:hi]
+            A = YtY + (Yu.T * c) @ Yu
+            out[u] = np.linalg.solve(A, Yu.T @ (c + 1))
+
+    def partial_fit(self, new_interactions, implicit=False, threshold=0.0):
+        """Add interactions (user_id, item_id[, rating]) without a full refit.
+
+        New users/items get factor rows; users with new interactions are
+        re-solved exactly against the current item factors, then the touched
+        items against the updated user factors. Other rows keep their factors
+        until the next fit (warm_start=True makes that refit cheap).
+        """
+        n_users, n_items = self.user_factors_.shape[0], self.item_factors_.shape[0]
+        self.R_, delta = extend_interaction_matrix(self.R_, self.user_map_, self.item_map_, new_interactions,
+                                                   implicit=implicit, threshold=threshold)
+        self.item_ids_ = index_to_ids(self.item_map_)
+        rng = np.random.default_rng(self.random_state)
+        grow = lambda F, n: np.vstack([F, (rng.standard_normal((n - len(F), self.factors)) * 0.01).astype(np.float32)])
+        X = grow(self.user_factors_, self.R_.shape[0])
+        Y = grow(self.item_factors_, self.R_.shape[1])
+        d = delta.tocoo()
+        reg = self.regularization * np.eye(self.factors, dtype=np.float32)
+        self._cholesky_rows(self._confidence(self.R_), Y, Y.T @ Y + reg, X, np.unique(d.row))
+        self._cholesky_rows(self._confidence(self.R_.T.tocsr()), X, X.T @ X + reg, Y, np.unique(d.col))
+        self.user_factors_, self.item_factors_ = X, Y
+        if self.index_ is not None:
+            self.build_index(n_lists=self.index_.n_lists, nprobe=self.index_.nprobe)
+        return self
+
+    def _scores(self, rows):
+        return self.user_factors_[rows] @ self.item_factors_.T
+
+    def build_index(self, **params):
+        """Index the item factors for approximate=True (params go to IVFIndex)."""
+        self.index_ = IVFIndex(metric='ip', **params).fit(self.item_factors_)
+        return self.index_
+
+    def recommend_batch(self, user_ids, topk=10, exclude_seen=True, block_size=512, approximate=False):
+        """Top-k for many users at once, see ``_BaseKNN.recommend_batch``.
+        approximate=True ranks through the index from ``build_index``.
+        """
+        rows = [self.user_map_.get(u, -1) for u in user_ids]
+        seen = self.R_ if exclude_seen else None
+        if approximate:
+            return search_users(self.index_, lambda r: self.user_factors_[r], rows, topk, seen)
+        return batch_top_k(self._scores, rows, topk, seen, block_size)
+
+    def recommend(self, user_id, topk=10, exclude_seen=True, approximate=False):
+        items, scores = self.recommend_batch([user_id], topk, exclude_seen, approximate=approximate)
+        return [(self.item_ids_[i], float(s)) for i, s in zip(items[0], scores[0]) if i >= 0]
@@ -0,0 +1,184 @@
+import json
+import os
+import numpy as np
+from scipy.sparse import csr_matrix, issparse
+from sklearn.preprocessing import normalize
+from .batch import top_k
+
+class IVFIndex:
+    """Inverted-file index for approximate top-k search by inner product
+    (metric='ip', e.g. MF item factors) or cosine (metric='cosine', dense or
+    sparse rows such as TF-IDF).
+
+    Items are split into ``n_lists`` clusters by spherical k-means; a query
+    only scores the items of its ``nprobe`` closest clusters. More probes
+    means higher recall and more work: nprobe = n_lists is exact search.
+    For 'ip' the vectors are augmented with sqrt(M^2 - |v|^2) before
+    clustering, which turns maximum inner product into a cosine problem.
+    """
+    def __init__(self, n_lists=None, nprobe=8, metric='ip', n_iter=10, random_state=0):
+        assert metric in {'ip', 'cosine'}
+        self.n_lists = n_lists
+        self.nprobe = int(nprobe)
+        self.metric = metric
+        self.n_iter = int(n_iter)
+        self.random_state = random_state
+        self.centroids_ = None  # (n_lists, dim), compared against queries
+        self.vectors_ = None    # items grouped by list
+        self.ids_ = None        # vectors_ row -> original item index
+        self.offsets_ = None    # list l holds vectors_[offsets_[l]:offsets_[l + 1]]
+        self.list_of_ = None    # original item index -> list
+        self.pos_ = None        # original item index -> position inside its list
+
+    def fit(self, V):
+        if self.metric == 'ip' and issparse(V):
+            raise ValueError("metric='ip' needs dense vectors")
+        V = csr_matrix(V, dtype=np.float64) if issparse(V) else np.asarray(V, dtype=np.float64)
+        n = V.shape[0]
+        if self.metric == 'cosine':
+            V = normalize(V)
+            train = V
+        else:
+            norms = np.linalg.norm(V, axis=1)
+            M = max(norms.max(initial=0.0), 1e-12)
+            train = np.hstack([V / M, np.sqrt(np.maximum(1.0 - (norms / M) ** 2, 0.0))[:, None]])
+        n_lists = int(self.n_lists or max(1, round(np.sqrt(n))))
+        n_lists = max(1, min(n_lists, n))
+        C, assign = self._kmeans(train, n_lists)
+        order = np.argsort(assign, kind='stable')
+        counts = np.bincount(assign, minlength=n_lists)
+        self.offsets_ = np.r_[0, np.cumsum(counts)]
+        self.ids_ = order
+        self.vectors_ = V[order]
+        self.centroids_ = C[:, :V.shape[1]]  # queries have a 0 augmented coordinate
+        self.list_of_ = assign
+        self.pos_ = np.empty(n, dtype=np.int64)
+        self.pos_[order] = np.arange(n) - self.offsets_[assign[order]]
+        return self
+
+    def _kmeans(self, X, n_lists):
+        # spherical k-means on unit rows: assign by largest dot product, centroids re-normalized
+        rng = np.random.default_rng(self.random_state)
+        n = X.shape[0]
+        C = X[rng.choice(n, n_lists, replace=False)]
+        C = C.toarray() if issparse(C) else C.copy()
+        assign = np.zeros(n, dtype=np.int64)
+        for it in range(self.n_iter + 1):
+            new = np.asarray(X @ C.T).argmax(axis=1)
+            if it and np.array_equal(new, assign):
+                break
+            assign = new
+            if it == self.n_iter:
+                break
+            onehot = csr_matrix((np.ones(n), (assign, np.arange(n))), shape=(n_lists, n))
+            C = np.asarray(onehot @ X if not issparse(X) else (onehot @ X).toarray())
+            empty = np.flatnonzero(np.bincount(assign, minlength=n_lists) == 0)
+            if empty.size:
+                seeds = X[rng.choice(n, empty.size, replace=False)]
+                C[empty] = seeds.toarray() if issparse(seeds) else seeds
+            C = normalize(C)
+        return C, assign
+
+    def search(self, Q, k, nprobe=None, exclude=None):
+        """Approximate top-k items for each query row: (items, scores) of shape
+        (n_queries, k), best first, padded with -1 / nan. ``exclude`` is a CSR
+        (n_queries, n_items) whose stored entries are never returned.
+        """
+        Q = csr_matrix(Q, dtype=np.float64) if issparse(Q) else np.atleast_2d(np.asarray(Q, dtype=np.float64))
+        if self.metric == 'cosine':
+            Q = normalize(Q)
+        n_q, n_lists = Q.shape[0], len(self.offsets_) - 1
+        nprobe = min(int(nprobe or self.nprobe), n_lists)
+        cs = np.asarray(Q @ self.centroids_.T)
+        probe = np.argpartition(-cs, nprobe - 1, axis=1)[:, :nprobe] if nprobe < n_lists else np.tile(np.arange(n_lists), (n_q, 1))
+        if n_q <= 4:
+            return self._search_gather(Q, k, probe, exclude)
+        best_idx = np.full((n_q, k), -1, dtype=np.int64)
+        best_val = np.full((n_q, k), -np.inf)
+        # list-major: every list scores all queries that probe it in one product
+        flat = probe.ravel()
+        order = np.argsort(flat, kind='stable')
+        queries = np.repeat(np.arange(n_q), nprobe)[order]
+        bounds = np.r_[0, np.cumsum(np.bincount(flat, minlength=n_lists))]
+        for l in range(n_lists):
+            lo, hi = self.offsets_[l], self.offsets_[l + 1]
+            qs = queries[bounds[l]:bounds[l + 1]]
+            if hi == lo or qs.size == 0:
+                continue
+            S = Q[qs] @ self.vectors_[lo:hi].T
+            S = S.toarray() if issparse(S) else np.asarray(S)
+            if exclude is not None:
+                seen = exclude[qs].tocoo()
+                hit = self.list_of_[seen.col] == l
+                S[seen.row[hit], self.pos_[seen.col[hit]]] = -np.inf
+            cand_val = np.hstack([best_val[qs], S])
+            cand_idx = np.hstack([best_idx[qs], np.broadcast_to(self.ids_[lo:hi], S.shape)])
+            cols, vals = top_k(cand_val, k)
+            take = np.take_along_axis(cand_idx, np.maximum(cols, 0), axis=1)
+            take[cols < 0] = -1
+            best_idx[qs, :take.shape[1]] = take
+            best_val[qs, :vals.shape[1]] = np.where(cols < 0, -np.inf, vals)
+        best_val[best_idx < 0] = np.nan
+        return best_idx, best_val
+
+    def _search_gather(self, Q, k, probe, exclude):
+        # few queries (online requests): score each one against its probed lists in a single product
+        items = np.full((Q.shape[0], k), -1, dtype=np.int64)
+        scores = np.full((Q.shape[0], k), np.nan)
+        for q, lists in enumerate(probe):
+            cand = np.concatenate([np.arange(self.offsets_[l], self.offsets_[l + 1]) for l in lists])
+            ids = self.ids_[cand]
+            S = Q[q] @ self.vectors_[cand].T
+            S = np.atleast_2d(S.toarray() if issparse(S) else np.asarray(S, dtype=np.float64))
+            if exclude is not None:
+                S[0, np.isin(ids, exclude[q].indices)] = -np.inf
+            cols, vals = top_k(S, k)
+            items[q, :cols.shape[1]] = np.where(cols[0] >= 0, ids[np.maximum(cols[0], 0)], -1)
+            scores[q, :vals.shape[1]] = vals[0]
+        return items, scores
+
+    # ---- persistence: a directory of .npy arrays plus meta.json ----
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        meta = {'n_lists': len(self.offsets_) - 1, 'nprobe': self.nprobe, 'metric': self.metric,
+                'n_iter': self.n_iter, 'random_state': self.random_state, 'sparse': issparse(self.vectors_)}
+        arrays = {'centroids': self.centroids_, 'ids': self.ids_, 'offsets': self.offsets_,
+                  'list_of': self.list_of_, 'pos': self.pos_}
+        if meta['sparse']:
+            meta['shape'] = list(self.vectors_.shape)
+            arrays.update(data=self.vectors_.data, indices=self.vectors_.indices, indptr=self.vectors_.indptr)
+        else:
+            arrays['vectors'] = self.vectors_
+        for name, a in arrays.items():
+            np.save(os.path.join(path, name + '.npy'), a)
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+
+    @classmethod
+    def load(cls, path, mmap_mode=None):
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        arr = lambda name: np.load(os.path.join(path, name + '.npy'), mmap_mode=mmap_mode)
+        index = cls(meta['n_lists'], meta['nprobe'], meta['metric'], meta['n_iter'], meta['random_state'])
+        index.centroids_, index.ids_, index.offsets_ = arr('centroids'), arr('ids'), arr('offsets')
+        index.list_of_, index.pos_ = arr('list_of'), arr('pos')
+        if meta['sparse']:
+            index.vectors_ = csr_matrix((arr('data'), arr('indices'), arr('indptr')), shape=tuple(meta['shape']))
+        else:
+            index.vectors_ = arr('vectors')
+        return index
+
+def search_users(index, query_fn, rows, topk, seen=None, nprobe=None, block_size=4096):
+    """``batch_top_k`` counterpart that ranks through an ANN index.
+    query_fn(rows) returns the query vectors of those rows; rows < 0 get no
+    recommendations and ``seen`` is a CSR indexed by rows.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    items = np.full((len(rows), topk), -1, dtype=np.int64)
+    scores = np.full((len(rows), topk), np.nan)
+    warm = np.flatnonzero(rows >= 0)
+    for start in range(0, len(warm), block_size):
+        pos = warm[start:start + block_size]
+        exclude = seen[rows[pos]] if seen is not None else None
+        items[pos], scores[pos] = index.search(query_fn(rows[pos]), topk, nprobe, exclude)
+    return items, scores
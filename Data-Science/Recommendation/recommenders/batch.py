@@ -0,0 +1,75 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+
+def top_k(scores, k):
+    """Column indices and values of the k largest finite entries of every row
+    of a dense score block, best first. Ties go to the lower column, as with a
+    stable full sort. Rows with fewer candidates are padded with -1 / nan.
+    """
+    n, m = scores.shape
+    k = min(int(k), m)
+    if k <= 0:
+        return np.full((n, 0), -1, dtype=np.int64), np.empty((n, 0))
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    kth = np.take_along_axis(scores, part, axis=1).min(axis=1)[:, None]
+    above, tie = scores > kth, scores == kth
+    # every entry above the k-th value, then the leftmost ties until the row has k
+    need = k - above.sum(axis=1, keepdims=True)
+    keep = above | (tie & (np.cumsum(tie, axis=1) <= need))
+    cols = np.nonzero(keep)[1].reshape(n, k)
+    vals = np.take_along_axis(scores, cols, axis=1)
+    order = np.argsort(-vals, axis=1, kind='stable')
+    idx = np.take_along_axis(cols, order, axis=1)
+    vals = np.take_along_axis(vals, order, axis=1)
+    missing = ~np.isfinite(vals)
+    idx[missing] = -1
+    vals[missing] = np.nan
+    return idx, vals
+
+def mask_seen(scores, seen):
+    """Set scores[r, c] = -inf for every stored entry (r, c) of the CSR block ``seen``."""
+    rows = np.repeat(np.arange(seen.shape[0]), np.diff(seen.indptr))
+    scores[rows, seen.indices] = -np.inf
+    return scores
+
+def seen_matrix(user_ids, user_seen_items, item_index):
+    """CSR (len(user_ids), len(item_index)) marking the items each user has seen.
+    user_seen_items: dict user id -> iterable of item ids; unknown ids are ignored.
+    """
+    rows, cols = [], []
+    for r, u in enumerate(user_ids):
+        for iid in user_seen_items.get(u) or ():
+            c = item_index.get(iid)
+            if c is not None:
+                rows.append(r)
+                cols.append(c)
+    return csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(len(user_ids), len(item_index)))
+
+def index_to_ids(index):
+    """Inverse of an id -> column dict as an object array, ids[col] = id."""
+    ids = np.empty(len(index), dtype=object)
+    ids[list(index.values())] = list(index.keys())
+    return ids
+
+def batch_top_k(score_fn, rows, topk, seen=None, block_size=512):
+    """Top-k items for many users, scored ``block_size`` users at a time.
+
+    score_fn(rows) returns the dense (len(rows), n_items) score block of those
+    matrix rows, with -inf for items that are not candidates. ``seen`` is a CSR
+    matrix indexed by the same rows whose stored entries are masked out.
+    Rows < 0 (cold users) get no recommendations. Returns (items, scores) of
+    shape (len(rows), topk), padded with -1 / nan.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    items = np.full((len(rows), topk), -1, dtype=np.int64)
+    scores = np.full((len(rows), topk), np.nan)
+    warm = np.flatnonzero(rows >= 0)
+    for start in range(0, len(warm), block_size):
+        pos = warm[start:start + block_size]
+        block = score_fn(rows[pos])
+        if seen is not None:
+            mask_seen(block, seen[rows[pos]])
+        idx, vals = top_k(block, topk)
+        items[pos, :idx.shape[1]] = idx
+        scores[pos, :idx.shape[1]] = vals
+    return items, scores
@@ -1,7 +1,10 @@
 import numpy as np
 import pandas as pd
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.preprocessing import normalize
+from .batch import batch_top_k, top_k, seen_matrix
+from .ann import IVFIndex, search_users
+from .persist import save_arrays, load_arrays, ids_array, save_index, load_index
 
 class ContentBased:
     def __init__(self, text_columns=('title','genres'), max_features=5000, ngram_range=(1,2)):
@@ -11,6 +14,8 @@ class ContentBased:
         self.vectorizer_ = None
         self.item_tfidf_ = None
         self.item_index_ = None  # item_id -> row index
+        self.item_ids_ = None    # row index -> item_id
+        self.index_ = None       # optional IVFIndex over the tf-idf rows
 
     def fit(self, items_df: pd.DataFrame):
         texts = []
@@ -25,22 +30,63 @@ class ContentBased:
         self.vectorizer_ = TfidfVectorizer(max_features=self.max_features, ngram_range=self.ngram_range)
         self.item_tfidf_ = self.vectorizer_.fit_transform(texts)
         self.item_index_ = {iid: i for i, iid in enumerate(ids)}
+        self.item_ids_ = np.array(ids, dtype=object)
         return self
 
-    def recommend(self, user_id, user_seen_items, topk=10):
-        if not user_seen_items:
-            # cold user: return most "central" items by tfidf norm
+    def save(self, path):
+        """Write the tf-idf matrix, vectorizer vocabulary (and index, if built) to the directory ``path``."""
+        params = {'text_columns': list(self.text_columns), 'max_features': self.max_features, 'ngram_range': list(self.ngram_range)}
+        save_arrays(path, self, params, {
+            'tfidf': self.item_tfidf_, 'item_ids': ids_array(self.item_ids_),
+            'terms': ids_array(self.vectorizer_.get_feature_names_out()), 'idf': self.vectorizer_.idf_})
+        save_index(self, path)
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """Model written by ``save``; its arrays are memory-mapped unless mmap_mode=None."""
+        params, a = load_arrays(path, cls, mmap_mode)
+        model = cls(tuple(params['text_columns']), params['max_features'], tuple(params['ngram_range']))
+        model.item_tfidf_ = a['tfidf']
+        model.item_ids_ = np.array(a['item_ids'].tolist(), dtype=object)
+        model.item_index_ = {iid: i for i, iid in enumerate(model.item_ids_)}
+        # the fitted vocabulary and idf weights are all transform() needs
+        model.vectorizer_ = TfidfVectorizer(max_features=model.max_features, ngram_range=model.ngram_range,
+                                            vocabulary={t: i for i, t in enumerate(a['terms'].tolist())})
+        model.vectorizer_.idf_ = np.asarray(a['idf'])
+        return load_index(model, path, mmap_mode)
+
+    def build_index(self, **params):
+        """Index the tf-idf rows for approximate=True (params go to IVFIndex)."""
+        self.index_ = IVFIndex(metric='cosine', **params).fit(self.item_tfidf_)
+        return self.index_
+
+    def recommend_batch(self, user_ids, user_seen_items, topk=10, block_size=512, approximate=False):
+        """Top-k for many users at once: (items, scores) arrays of shape
+        (len(user_ids), topk), items as row indices into item_ids_, padded with
+        -1 / nan. user_seen_items: dict user id -> seen item ids.
+        approximate=True ranks through the index from ``build_index``.
+        """
+        H = seen_matrix(user_ids, user_seen_items, self.item_index_)
+        cold = np.array([not user_seen_items.get(u) for u in user_ids], dtype=bool)
+        rows = np.arange(len(user_ids))
+        rows[cold | (np.diff(H.indptr) == 0)] = -1  # no known items: nothing to match against
+        unit = normalize(self.item_tfidf_)
+        def scores(r):
+            # cosine between the average liked item and every item
+            profile = normalize(H[r] @ self.item_tfidf_)
+            return (profile @ unit.T).toarray()
+        if approximate:
+            items, sims = search_users(self.index_, lambda r: H[r] @ self.item_tfidf_, rows, topk, H)
+        else:
+            items, sims = batch_top_k(scores, rows, topk, H, block_size)
+        if cold.any():
+            # cold user: most "central" items by tfidf norm
             norms = self.item_tfidf_.power(2).sum(axis=1).A1
-            idx = np.argsort(-norms)[:topk]
-            inv = {v:k for k,v in self.item_index_.items()}
-            return [(inv[i], float(norms[i])) for i in idx]
-        indices = [self.item_index_[iid] for iid in user_seen_items if iid in self.item_index_]
-        if not indices:
-            return []
-        profile = self.item_tfidf_[indices].mean(axis=0)  # average liked items
-        sims = cosine_similarity(profile, self.item_tfidf_).ravel()
-        seen = set(indices)
-        pairs = [(i, s) for i, s in enumerate(sims) if i not in seen]
-        pairs.sort(key=lambda x: x[1], reverse=True)
-        inv = {v:k for k,v in self.item_index_.items()}
-        return [(inv[i], float(s)) for i, s in pairs[:topk]]
\ No newline at end of file
+            idx, vals = top_k(norms[None, :], topk)
+            items[cold, :idx.shape[1]] = idx
+            sims[cold, :idx.shape[1]] = vals
+        return items, sims
+
+    def recommend(self, user_id, user_seen_items, topk=10, approximate=False):
+        items, sims = self.recommend_batch([user_id], {user_id: user_seen_items}, topk, approximate=approximate)
+        return [(self.item_ids_[i], float(s)) for i, s in zip(items[0], sims[0]) if i >= 0]
@@ -1,93 +1,142 @@
 import numpy as np
-from scipy.sparse import csr_matrix
-from sklearn.metrics.pairwise import cosine_similarity
+from scipy.sparse import csr_matrix, vstack
+from utils.data import extend_interaction_matrix, id_index
+from .similarity import topk_cosine_similarity, topk_per_row, cosine_columns, replace_rows
+from .batch import batch_top_k, index_to_ids
+from .persist import save_arrays, load_arrays, ids_array
 
 class _BaseKNN:
-    def __init__(self, kind='item', k=50, shrink=0.0, min_common=1):
+    def __init__(self, kind='item', k=50, shrink=0.0, min_common=1, block_size=1024, n_jobs=1, backend='thread'):
         assert kind in {'item','user'}
         self.kind = kind
         self.k = int(k)
         self.shrink = float(shrink)
         self.min_common = int(min_common)
+        # similarity is built block_size rows at a time, on n_jobs thread/process workers
+        self.block_size = int(block_size)
+        self.n_jobs = n_jobs
+        self.backend = backend
         self.sim_ = None  # similarity matrix
+        self.sim_raw_ = None  # the same neighbours before shrinkage (sim_ itself when shrink=0), for partial_fit
         self.R_ = None    # interaction matrix (csr)
         self.user_map_ = None
         self.item_map_ = None
         self.inv_user_map_ = None
         self.inv_item_map_ = None
+        self.item_ids_ = None  # column -> item id
 
     def fit(self, R: csr_matrix, user_map, item_map):
         """R: csr of shape (n_users, n_items) with implicit (0/1) or explicit ratings.
         user_map/item_map: dicts id->index
         """
+        self._set_data(R, user_map, item_map)
+        # cosine similarity without the diagonal, k-nearest neighbors per row, then shrinkage
+        self.sim_, self.sim_raw_ = self._similarity(self._entities())
+        return self
+
+    def _set_data(self, R, user_map, item_map):
         self.R_ = R.tocsr()
         self.user_map_ = user_map
         self.item_map_ = item_map
         self.inv_user_map_ = {v:k for k,v in user_map.items()}
         self.inv_item_map_ = {v:k for k,v in item_map.items()}
+        self.item_ids_ = index_to_ids(item_map)
 
-        if self.kind == 'item':
-            X = self.R_.T  # items x users
-        else:
-            X = self.R_    # users x items
-
-        # cosine similarity; set diagonal to 0 later
-        sim = cosine_similarity(X, dense_output=False)
-        sim.setdiag(0.0)
-        sim.eliminate_zeros()
-
-        # k-nearest neighbors: keep top-k per row
-        if self.k and self.k < sim.shape[1]:
-            sim = self._topk(sim, self.k)
-
-        if self.shrink > 0:
-            # shrinkage: s' = s * n_common / (n_common + shrink)
-            # approximate n_common by binary dot-products
-            # (X>0) dot (X>0)^T
-            B = (X > 0).astype(np.float32)
-            nn = B @ B.T
-            nn.setdiag(0)
-            nn = nn.maximum(nn.T)  # symm-ish
-            nn = nn.tocsr()
-            nn.data = nn.data / (nn.data + self.shrink)
-            sim = sim.multiply(nn)
-
-        self.sim_ = sim.tocsr()
-        return self
+    def save(self, path):
+        """Write the fitted model to the directory ``path`` (format in recommenders.persist)."""
+        params = dict(k=self.k, shrink=self.shrink, min_common=self.min_common, block_size=self.block_size,
+                      n_jobs=self.n_jobs, backend=self.backend)
+        save_arrays(path, self, params, {
+            'sim': self.sim_, 'sim_raw': None if self.sim_raw_ is self.sim_ else self.sim_raw_, 'R': self.R_,
+            'user_ids': ids_array(index_to_ids(self.user_map_)), 'item_ids': ids_array(self.item_ids_)})
 
-    def _topk(self, M, k):
-        # keep top-k entries per row of sparse matrix
-        M = M.tolil()
-        for i, (data, rows) in enumerate(zip(M.data, M.rows)):
-            if len(data) > k:
-                idx = np.argpartition(np.array(data), -k)[-k:]
-                M.data[i] = list(np.array(data)[idx])
-                M.rows[i] = list(np.array(rows)[idx])
-        return M.tocsr()
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """Model written by ``save``; its arrays are memory-mapped unless mmap_mode=None."""
+        params, a = load_arrays(path, cls, mmap_mode)
+        model = cls(**params)
+        model._set_data(a['R'], id_index(a['user_ids']), id_index(a['item_ids']))
+        model.sim_ = a['sim']
+        model.sim_raw_ = a.get('sim_raw', model.sim_)
+        return model
 
-    def recommend(self, user_id, topk=10, exclude_seen=True):
-        if user_id not in self.user_map_:
-            return []  # cold user
-        uidx = self.user_map_[user_id]
+    def _entities(self):
+        return self.R_.T.tocsr() if self.kind == 'item' else self.R_  # items x users / users x items
+
+    def _similarity(self, X, rows=None):
+        k = self.k if self.k and self.k < X.shape[0] else 0
+        return topk_cosine_similarity(X, k=k, shrink=self.shrink, block_size=self.block_size,
+                                      n_jobs=self.n_jobs, backend=self.backend, rows=rows, return_raw=True)
+
+    def partial_fit(self, new_interactions, implicit=False, threshold=0.0):
+        """Add interactions (user_id, item_id[, rating]) without a full refit.
+
+        New users/items extend the maps and R_. Only the touched entities
+        (items for ItemKNN, users for UserKNN) change their vectors, so:
+        - touched rows are recomputed;
+        - every other row only sees new values in the touched columns, which
+          are merged into its kept neighbours and re-pruned to k;
+        - a row that had pruned neighbours and whose kept touched neighbour
+          lost similarity could need a pruned one back, so it is recomputed.
+        The result equals fit() on the combined data.
+        """
+        self.R_, delta = extend_interaction_matrix(self.R_, self.user_map_, self.item_map_, new_interactions,
+                                                   implicit=implicit, threshold=threshold)
+        self.inv_user_map_ = {v:k for k,v in self.user_map_.items()}
+        self.inv_item_map_ = {v:k for k,v in self.item_map_.items()}
+        self.item_ids_ = index_to_ids(self.item_map_)
+        X = self._entities()
+        n = X.shape[0]
+        k = self.k if self.k and self.k < n else 0
+        touched = np.unique(delta.tocoo().col if self.kind == 'item' else delta.tocoo().row)
+        grow = lambda M: csr_matrix((M.data, M.indices, np.r_[M.indptr, np.full(n - M.shape[0], M.indptr[-1])]), shape=(n, n))
+        sim, raw = grow(self.sim_), grow(self.sim_raw_)
+        new_raw, new_sim = cosine_columns(X, touched, self.shrink)
+
+        # rows whose kept neighbours include a touched one that got less similar
+        lost = (raw[:, touched] - new_raw[:, touched]).tocoo()
+        full = np.diff(raw.indptr) >= k if k else np.zeros(n, dtype=bool)
+        dirty = np.unique(lost.row[(lost.data > 0) & full[lost.row]])
+        recompute = np.union1d(touched, dirty)
+        merge = np.setdiff1d(np.union1d(np.unique(new_raw.tocoo().row), np.unique(raw[:, touched].tocoo().row)), recompute)
+
+        # merge: kept neighbours outside the touched columns + fresh values inside them
+        def without_touched(M):
+            M = M[merge].tocoo()
+            keep = ~np.isin(M.col, touched)
+            return csr_matrix((M.data[keep], (M.row[keep], M.col[keep])), shape=(len(merge), n))
+        cand_raw = without_touched(raw) + new_raw[merge]
+        kept = topk_per_row(cand_raw, k) if k else cand_raw
+        merged_raw = kept
+        merged_sim = kept if self.shrink <= 0 else (without_touched(sim) + new_sim[merge]).multiply(kept.astype(bool)).tocsr()
+
+        fresh_sim, fresh_raw = self._similarity(X, recompute)
+        rows = np.r_[recompute, merge]
+        self.sim_ = replace_rows(sim, rows, vstack([fresh_sim, merged_sim]))
+        self.sim_raw_ = self.sim_ if self.shrink <= 0 else replace_rows(raw, rows, vstack([fresh_raw, merged_raw]))
+        return self
+
+    def _scores(self, rows):
         if self.kind == 'item':
             # score = R_u * S_item
-            user_profile = self.R_[uidx]  # 1 x n_items
-            scores = user_profile @ self.sim_  # 1 x n_items
-            scores = scores.toarray().ravel()
-            seen = set(self.R_[uidx].indices) if exclude_seen else set()
-            pairs = [(i, s) for i, s in enumerate(scores) if i not in seen and s > 0]
-            pairs.sort(key=lambda x: x[1], reverse=True)
-            items = [(self.inv_item_map_[i], float(s)) for i, s in pairs[:topk]]
-            return items
+            scores = (self.R_[rows] @ self.sim_).toarray()
         else:
             # user-based: scores = S_user[u] * R
-            scores = self.sim_.getrow(uidx) @ self.R_
-            scores = scores.toarray().ravel()
-            seen = set(self.R_[uidx].indices) if exclude_seen else set()
-            pairs = [(i, s) for i, s in enumerate(scores) if i not in seen and s > 0]
-            pairs.sort(key=lambda x: x[1], reverse=True)
-            items = [(self.inv_item_map_[i], float(s)) for i, s in pairs[:topk]]
-            return items
+            scores = (self.sim_[rows] @ self.R_).toarray()
+        scores[scores <= 0] = -np.inf  # only items with some positive evidence
+        return scores
+
+    def recommend_batch(self, user_ids, topk=10, exclude_seen=True, block_size=512):
+        """Top-k for many users at once: (items, scores) arrays of shape
+        (len(user_ids), topk), items as column indices into item_ids_,
+        padded with -1 / nan (cold users get a fully padded row).
+        """
+        rows = [self.user_map_.get(u, -1) for u in user_ids]
+        return batch_top_k(self._scores, rows, topk, self.R_ if exclude_seen else None, block_size)
+
+    def recommend(self, user_id, topk=10, exclude_seen=True):
+        items, scores = self.recommend_batch([user_id], topk, exclude_seen)
+        return [(self.item_ids_[i], float(s)) for i, s in zip(items[0], scores[0]) if i >= 0]
 
 class ItemKNN(_BaseKNN):
     def __init__(self, **kw):
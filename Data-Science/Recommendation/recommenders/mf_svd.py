@@ -1,6 +1,10 @@
 import numpy as np
 from scipy.sparse.linalg import svds
 from scipy.sparse import csr_matrix
+from utils.data import extend_interaction_matrix, id_index
+from .batch import batch_top_k, index_to_ids
+from .ann import IVFIndex, search_users
+from .persist import save_arrays, load_arrays, ids_array, save_index, load_index
 
 class SVDFactorization:
     """Matrix factorization using truncated SVD on the user-item matrix.
@@ -13,30 +17,21 @@ class SVDFactorization:
         self.U_ = None
         self.S_ = None
         self.Vt_ = None
+        self.R_ = None  # uncentered training matrix, for fold-in
         self.user_map_ = None
         self.item_map_ = None
         self.inv_user_map_ = None
         self.inv_item_map_ = None
+        self.item_ids_ = None
+        self.index_ = None  # optional IVFIndex over the item factors
 
     def fit(self, R: csr_matrix, user_map, item_map):
         R = R.asfptype().tocsr()
-        self.user_map_ = user_map
-        self.item_map_ = item_map
-        self.inv_user_map_ = {v:k for k,v in user_map.items()}
-        self.inv_item_map_ = {v:k for k,v in item_map.items()}
+        self._set_data(R, user_map, item_map)
 
         if self.mean_center:
-            # compute mean per user (avoid NaN for empty rows)
-            sums = R.sum(axis=1).A1
-            counts = (R != 0).sum(axis=1).A1
-            means = np.divide(sums, counts, out=np.zeros_like(sums), where=counts!=0)
-            self.user_means_ = means
-            # center
-            R = R.tolil()
-            for u in range(R.shape[0]):
-                if counts[u] > 0:
-                    R.data[u] = [x - means[u] for x in R.data[u]]
-            R = R.tocsr()
+            self.user_means_ = self._user_means(R)
+            R = self._center(R, self.user_means_)
 
         k = min(self.factors, min(R.shape) - 1) if min(R.shape) > 1 else 1
         U, s, Vt = svds(R, k=k)
@@ -47,17 +42,101 @@ class SVDFactorization:
         self.Vt_ = Vt[idx, :]
         return self
 
-    def recommend(self, user_id, topk=10, exclude_seen=True, R=None):
-        if user_id not in self.user_map_:
-            return []
-        u = self.user_map_[user_id]
+    def _set_data(self, R, user_map, item_map):
+        self.R_ = R
+        self.user_map_ = user_map
+        self.item_map_ = item_map
+        self.inv_user_map_ = {v:k for k,v in user_map.items()}
+        self.inv_item_map_ = {v:k for k,v in item_map.items()}
+        self.item_ids_ = index_to_ids(item_map)
+
+    def save(self, path):
+        """Write the fitted model (and its index, if built) to the directory ``path``."""
+        save_arrays(path, self, {'factors': self.factors, 'mean_center': self.mean_center}, {
+            'U': self.U_, 's': np.diag(self.S_), 'Vt': self.Vt_, 'user_means': self.user_means_, 'R': self.R_,
+            'user_ids': ids_array(index_to_ids(self.user_map_)), 'item_ids': ids_array(self.item_ids_)})
+        save_index(self, path)
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """Model written by ``save``; its arrays are memory-mapped unless mmap_mode=None."""
+        params, a = load_arrays(path, cls, mmap_mode)
+        model = cls(**params)
+        model._set_data(a['R'], id_index(a['user_ids']), id_index(a['item_ids']))
+        model.U_, model.S_, model.Vt_ = a['U'], np.diag(a['s']), a['Vt']
+        model.user_means_ = a.get('user_means')
+        return load_index(model, path, mmap_mode)
+
+    @staticmethod
+    def _user_means(R):
+        # mean per user (avoid NaN for empty rows)
+        sums = R.sum(axis=1).A1
+        counts = (R != 0).sum(axis=1).A1
+        return np.divide(sums, counts, out=np.zeros_like(sums), where=counts!=0)
+
+    @staticmethod
+    def _center(R, means):
+        # center every stored entry of each row
+        R = R.copy()
+        R.data -= np.repeat(means, np.diff(R.indptr))
+        return R
+
+    def partial_fit(self, new_interactions, implicit=False, threshold=0.0):
+        """Add interactions (user_id, item_id[, rating]) by folding in, without a new SVD.
+
+        Users with new interactions (new or existing) are projected onto the
+        item factors, u = r_u Vt^T S^-1; new items are then projected onto
+        the user factors, v = S^-1 U^T r_i. Existing item factors and the
+        singular values are kept, so quality drifts as data accumulates;
+        refit periodically.
+        """
+        n_users, n_items = self.U_.shape[0], self.Vt_.shape[1]
+        self.R_, delta = extend_interaction_matrix(self.R_, self.user_map_, self.item_map_, new_interactions,
+                                                   implicit=implicit, threshold=threshold)
+        self._set_data(self.R_, self.user_map_, self.item_map_)
+        R = self.R_
+        if self.mean_center:
+            self.user_means_ = self._user_means(R)
+            R = self._center(R, self.user_means_)
+        s = np.diag(self.S_)
+        inv_s = np.divide(1.0, s, out=np.zeros_like(s), where=s > 0)
+        self.U_ = np.vstack([self.U_, np.zeros((R.shape[0] - n_users, len(s)))])
+        self.Vt_ = np.hstack([self.Vt_, np.zeros((len(s), R.shape[1] - n_items))])
+        users = np.unique(delta.tocoo().row)
+        self.U_[users] = (R[users] @ self.Vt_.T) * inv_s
+        new_items = np.arange(n_items, R.shape[1])
+        if len(new_items):
+            self.Vt_[:, new_items] = ((R.T.tocsr()[new_items] @ self.U_) * inv_s).T
+        if self.index_ is not None:
+            self.build_index(n_lists=self.index_.n_lists, nprobe=self.index_.nprobe)
+        return self
+
+    def _scores(self, rows):
         # predicted ratings: U*S*Vt
-        u_vec = self.U_[u, :] @ self.S_
-        scores = u_vec @ self.Vt_
+        scores = (self.U_[rows] @ self.S_) @ self.Vt_
         if self.mean_center and self.user_means_ is not None:
-            scores = scores + self.user_means_[u]
-        # filter seen items
-        seen = set(R[u].indices) if (exclude_seen and R is not None) else set()
-        pairs = [(i, s) for i, s in enumerate(scores) if i not in seen]
-        pairs.sort(key=lambda x: x[1], reverse=True)
-        return [(self.inv_item_map_[i], float(s)) for i, s in pairs[:topk]]
\ No newline at end of file
+            scores += self.user_means_[rows, None]
+        return scores
+
+    def build_index(self, **params):
+        """Index the item factors for approximate=True (params go to IVFIndex)."""
+        self.index_ = IVFIndex(metric='ip', **params).fit((self.S_ @ self.Vt_).T)
+        return self.index_
+
+    def recommend_batch(self, user_ids, topk=10, exclude_seen=True, R=None, block_size=512, approximate=False):
+        """Top-k for many users at once, see ``_BaseKNN.recommend_batch``.
+        Seen items are read from R when given. approximate=True ranks through
+        the index from ``build_index`` instead of scoring every item.
+        """
+        rows = [self.user_map_.get(u, -1) for u in user_ids]
+        seen = R.tocsr() if (exclude_seen and R is not None) else None
+        if not approximate:
+            return batch_top_k(self._scores, rows, topk, seen, block_size)
+        items, scores = search_users(self.index_, lambda r: self.U_[r], rows, topk, seen)
+        if self.mean_center and self.user_means_ is not None:
+            scores += self.user_means_[np.maximum(rows, 0)][:, None]
+        return items, scores
+
+    def recommend(self, user_id, topk=10, exclude_seen=True, R=None, approximate=False):
+        items, scores = self.recommend_batch([user_id], topk, exclude_seen, R, approximate=approximate)
+        return [(self.item_ids_[i], float(s)) for i, s in zip(items[0], scores[0]) if i >= 0]
@@ -0,0 +1,99 @@
+import json
+import os
+import numpy as np
+from scipy.sparse import csr_matrix, issparse
+
+# On-disk model format: a directory with meta.json and one .npy per array, so
+# large arrays can be memory-mapped (np.load cannot mmap .npz members).
+# A CSR matrix M is stored as M.data/M.indices/M.indptr.npy with its shape in meta.
+# Bump FORMAT_VERSION when the layout changes; older readers refuse newer models.
+FORMAT_VERSION = 1
+
+def save_arrays(path, model, params, arrays):
+    """Write ``arrays`` (name -> ndarray, csr or None) and the constructor
+    ``params`` of ``model`` to the directory ``path``."""
+    os.makedirs(path, exist_ok=True)
+    meta_path = os.path.join(path, 'meta.json')
+    if os.path.exists(meta_path):
+        os.remove(meta_path)  # written last: a half-written model is never loaded
+    meta = {'format_version': FORMAT_VERSION, 'model': type(model).__name__, 'params': params, 'sparse': {}, 'arrays': []}
+    for name, a in arrays.items():
+        if a is None:
+            continue
+        if issparse(a):
+            a = a.tocsr()
+            if not a.has_canonical_format:
+                # sorted, duplicate-free: scipy would otherwise sort the read-only mmapped arrays in place
+                a = a.copy()
+                a.sum_duplicates()
+            meta['sparse'][name] = list(a.shape)
+            for part in ('data', 'indices', 'indptr'):
+                np.save(os.path.join(path, f'{name}.{part}.npy'), getattr(a, part))
+        else:
+            meta['arrays'].append(name)
+            np.save(os.path.join(path, name + '.npy'), a)
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f)
+
+def read_meta(path):
+    with open(os.path.join(path, 'meta.json')) as f:
+        meta = json.load(f)
+    if meta.get('format_version', 0) > FORMAT_VERSION:
+        raise ValueError(f"{path}: model format {meta['format_version']} is newer than supported ({FORMAT_VERSION})")
+    return meta
+
+def save_training_options(path, **options):
+    """Record how the training data was read (implicit, threshold, ...) in the
+    meta.json of a saved model, so that later updates can read new data the same way."""
+    meta = read_meta(path)
+    meta['training'] = options
+    tmp = os.path.join(path, 'meta.json.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp, os.path.join(path, 'meta.json'))
+
+def training_options(path):
+    """Options stored by ``save_training_options``; {} for models saved without them."""
+    return read_meta(path).get('training', {})
+
+def load_arrays(path, cls, mmap_mode='r'):
+    """(params, arrays) saved by ``save_arrays`` for a model of class ``cls``;
+    arrays that were None are absent. mmap_mode=None reads everything into memory."""
+    meta = read_meta(path)
+    if meta['model'] != cls.__name__:
+        raise ValueError(f"{path} holds a {meta['model']}, not a {cls.__name__}")
+    arr = lambda name: np.load(os.path.join(path, name + '.npy'), mmap_mode=mmap_mode)
+    arrays = {name: arr(name) for name in meta['arrays']}
+    for name, shape in meta['sparse'].items():
+        arrays[name] = csr_matrix((arr(name + '.data'), arr(name + '.indices'), arr(name + '.indptr')), shape=tuple(shape))
+    return meta['params'], arrays
+
+def ids_array(ids):
+    """Id array in a plain numpy dtype (str/int) so it can be saved without pickling."""
+    return np.asarray(list(ids))
+
+def save_index(model, path):
+    # optional ANN index of MF/content models, in its own sub-directory
+    if model.index_ is not None:
+        model.index_.save(os.path.join(path, 'index'))
+    elif os.path.exists(os.path.join(path, 'index', 'meta.json')):
+        os.remove(os.path.join(path, 'index', 'meta.json'))  # stale index of an earlier save
+
+def load_index(model, path, mmap_mode='r'):
+    from .ann import IVFIndex
+    if os.path.exists(os.path.join(path, 'index', 'meta.json')):
+        model.index_ = IVFIndex.load(os.path.join(path, 'index'), mmap_mode)
+    return model
+
+def load_model(path, mmap_mode='r'):
+    """Load any recommender saved with ``model.save(path)``."""
+    from .popularity import PopularityRecommender
+    from .knn import ItemKNN, UserKNN
+    from .mf_svd import SVDFactorization
+    from .als import ALSFactorization
+    from .content import ContentBased
+    classes = {c.__name__: c for c in (PopularityRecommender, ItemKNN, UserKNN, SVDFactorization, ALSFactorization, ContentBased)}
+    name = read_meta(path)['model']
+    if name not in classes:
+        raise ValueError(f'{path}: unknown model {name}')
+    return classes[name].load(path, mmap_mode)
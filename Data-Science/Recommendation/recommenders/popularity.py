@@ -1,4 +1,7 @@
+import numpy as np
 import pandas as pd
+from .batch import batch_top_k, seen_matrix
+from .persist import save_arrays, load_arrays, ids_array
 
 class PopularityRecommender:
     """Popularity baseline.
@@ -8,18 +11,59 @@ class PopularityRecommender:
         assert mode in {"count", "mean"}
         self.mode = mode
         self.item_scores_ = None
+        self.item_stats_ = None  # per item: count (and rating sum for mode='mean')
 
     def fit(self, interactions: pd.DataFrame):
+        self.item_stats_ = self._stats(interactions)
+        return self._rank()
+
+    def partial_fit(self, new_interactions: pd.DataFrame):
+        """Add interactions without re-reading the history: per-item counts
+        (and rating sums) are updated and the ranking is re-sorted."""
+        self.item_stats_ = self.item_stats_.add(self._stats(new_interactions), fill_value=0)
+        return self._rank()
+
+    def _stats(self, interactions: pd.DataFrame):
+        g = interactions.groupby("item_id")
         if self.mode == "count":
-            s = interactions.groupby("item_id").size().rename("score")
-        else:
-            if "rating" not in interactions.columns:
-                raise ValueError("mode='mean' requires a 'rating' column")
-            s = interactions.groupby("item_id")["rating"].mean().rename("score")
-        self.item_scores = s.sort_values(ascending=False)
+            return g.size().to_frame("count")
+        if "rating" not in interactions.columns:
+            raise ValueError("mode='mean' requires a 'rating' column")
+        return g["rating"].agg(["sum", "count"])
+
+    def save(self, path):
+        """Write the per-item statistics to the directory ``path``."""
+        st = self.item_stats_
+        save_arrays(path, self, {'mode': self.mode}, {
+            'item_ids': ids_array(st.index), 'count': st['count'].to_numpy(),
+            'sum': st['sum'].to_numpy() if 'sum' in st else None})
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """Model written by ``save``."""
+        params, a = load_arrays(path, cls, mmap_mode)
+        model = cls(**params)
+        cols = {c: np.asarray(a[c]) for c in ('sum', 'count') if c in a}
+        model.item_stats_ = pd.DataFrame(cols, index=pd.Index(np.asarray(a['item_ids']), name='item_id'))
+        return model._rank()
+
+    def _rank(self):
+        st = self.item_stats_
+        s = st["count"] if self.mode == "count" else st["sum"] / st["count"]
+        self.item_scores = s.rename("score").sort_values(ascending=False)
+        self.item_ids_ = self.item_scores.index.to_numpy(dtype=object)
+        self.item_index_ = {iid: i for i, iid in enumerate(self.item_ids_)}
         return self
 
+    def recommend_batch(self, user_ids, user_seen_items, topk=10, block_size=512):
+        """Top-k for many users at once: (items, scores) arrays of shape
+        (len(user_ids), topk), items as indices into item_ids_, padded with
+        -1 / nan. user_seen_items: dict user id -> seen item ids.
+        """
+        seen = seen_matrix(user_ids, user_seen_items, self.item_index_)
+        values = self.item_scores.to_numpy(dtype=float)
+        return batch_top_k(lambda r: np.tile(values, (len(r), 1)), np.arange(len(user_ids)), topk, seen, block_size)
+
     def recommend(self, user_id, seen_items, topk=10):
-        seen = set(seen_items or [])
-        recs = [i for i in self.item_scores.index if i not in seen][:topk]
-        return [(iid, float(self.item_scores.loc[iid])) for iid in recs]
\ No newline at end of file
+        items, scores = self.recommend_batch([user_id], {user_id: seen_items}, topk)
+        return [(self.item_ids_[i], float(s)) for i, s in zip(items[0], scores[0]) if i >= 0]
@@ -0,0 +1,239 @@
+import json
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs
+from wsgiref.simple_server import WSGIServer, WSGIRequestHandler, make_server
+import numpy as np
+import pandas as pd
+from utils.data import with_interaction_values
+from .persist import load_model, training_options
+from .mf_svd import SVDFactorization
+from .content import ContentBased
+from .popularity import PopularityRecommender
+
+class LRUCache:
+    """Thread-safe LRU map of at most ``capacity`` entries (0 disables caching)."""
+    def __init__(self, capacity=10000):
+        self.capacity = int(capacity)
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value):
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.capacity:
+                self._data.popitem(last=False)
+
+    def invalidate(self, keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+class RecommendationService:
+    """Serves top-k lists of a fitted recommender to concurrent callers.
+
+    Requests that miss the cache are queued; a single worker takes the first
+    one, waits up to ``window_ms`` for more (at most ``max_batch``) and scores
+    the whole batch with one ``recommend_batch`` call, i.e. one matrix
+    product per block instead of one per user. Top-k lists are kept in an
+    LRU cache per user. ``add_interactions`` updates the model (partial_fit)
+    and drops the cached lists of the users whose history changed; lists of
+    other users can shift slightly too (new neighbours, new items) and are
+    refreshed when evicted or after ``cache.clear()``.
+
+    user_seen_items (user id -> set of item ids) is the history that
+    popularity and content models exclude; the other models use their R_.
+    implicit/threshold must match how the training data was read, so new
+    interactions are binarized the same way; ``from_path`` takes them from
+    the saved model.
+    """
+    def __init__(self, model, user_seen_items=None, window_ms=2.0, max_batch=256, cache_size=10000, latency_window=100000,
+                 implicit=False, threshold=0.0):
+        self.model = model
+        self.implicit = bool(implicit)
+        self.threshold = float(threshold)
+        self.user_seen_items = user_seen_items if user_seen_items is not None else {}
+        self.window = float(window_ms) / 1e3
+        self.max_batch = int(max_batch)
+        self.cache = LRUCache(cache_size)
+        self._queue = queue.Queue()
+        self._model_lock = threading.Lock()  # scoring vs. updates; also orders cache writes after invalidation
+        self._stats_lock = threading.Lock()
+        self._latencies = deque(maxlen=latency_window)  # seconds, most recent requests
+        self._batch_sizes = deque(maxlen=latency_window)
+        self._requests = self._hits = 0
+        self._worker = None
+
+    @classmethod
+    def from_path(cls, path, **kw):
+        return cls(load_model(path), **{**training_options(path), **kw})
+
+    def start(self):
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name='recommend-batcher', daemon=True)
+            self._worker.start()
+        return self
+
+    def stop(self):
+        if self._worker is not None:
+            self._queue.put(None)
+            self._worker.join()
+            self._worker = None
+
+    def recommend(self, user_id, topk=10, timeout=30.0):
+        """[(item_id, score), ...] best first, at most topk long.
+        Raises ValueError for topk < 1; larger topk than there are items is capped."""
+        topk = int(topk)
+        if topk < 1:
+            raise ValueError(f'topk must be >= 1, got {topk}')
+        # cap before queueing: the whole batch is scored at its largest k
+        topk = min(topk, len(self.model.item_ids_))
+        start = time.perf_counter()
+        hit = self.cache.get(user_id)
+        cached = hit is not None and hit[0] >= topk  # lists are cached at the largest k asked so far
+        if cached:
+            recs = hit[1][:topk]
+        else:
+            fut = Future()
+            self._queue.put((user_id, topk, fut))
+            recs = fut.result(timeout)
+        with self._stats_lock:
+            self._requests += 1
+            self._hits += cached
+            self._latencies.append(time.perf_counter() - start)
+        return recs
+
+    def add_interactions(self, df: pd.DataFrame):
+        """Fold new (user_id, item_id[, rating]) rows into the model and invalidate those users."""
+        df = df.assign(user_id=df['user_id'].astype(str), item_id=df['item_id'].astype(str))
+        users = df['user_id'].unique()
+        with self._model_lock:
+            if isinstance(self.model, PopularityRecommender):
+                self.model.partial_fit(with_interaction_values(df, self.implicit, self.threshold))
+            elif hasattr(self.model, 'partial_fit'):
+                self.model.partial_fit(df, implicit=self.implicit, threshold=self.threshold)
+            for u, items in df.groupby('user_id')['item_id']:
+                self.user_seen_items.setdefault(u, set()).update(items)
+            self.cache.invalidate(users)
+        return len(users)
+
+    def metrics(self):
+        with self._stats_lock:
+            lat = np.array(self._latencies) * 1e3
+            sizes = np.array(self._batch_sizes)
+            requests, hits = self._requests, self._hits
+        pct = lambda a, q: float(np.percentile(a, q)) if len(a) else 0.0
+        return {
+            'requests': requests,
+            'cache_hits': hits,
+            'cache_hit_rate': hits / requests if requests else 0.0,
+            'cache_entries': len(self.cache),
+            'latency_ms': {'p50': pct(lat, 50), 'p99': pct(lat, 99), 'mean': float(lat.mean()) if len(lat) else 0.0},
+            'batches': len(sizes),
+            'batch_size': {'p50': pct(sizes, 50), 'p99': pct(sizes, 99), 'mean': float(sizes.mean()) if len(sizes) else 0.0,
+                           'max': int(sizes.max(initial=0))},
+        }
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = time.perf_counter() + self.window
+            while len(batch) < self.max_batch:
+                wait = deadline - time.perf_counter()
+                try:
+                    item = self._queue.get(timeout=wait) if wait > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)  # finish this batch, stop on the next loop
+                    break
+                batch.append(item)
+            self._score_batch(batch)
+
+    def _score_batch(self, batch):
+        users = list(dict.fromkeys(u for u, _, _ in batch))
+        k = max(t for _, t, _ in batch)
+        try:
+            with self._model_lock:
+                items, scores = self._score(users, k)
+                ids = self.model.item_ids_
+                recs = {}
+                for u, row_items, row_scores in zip(users, items, scores):
+                    recs[u] = [(ids[i], float(s)) for i, s in zip(row_items, row_scores) if i >= 0]
+                    self.cache.put(u, (k, recs[u]))
+        except Exception as e:
+            for _, _, fut in batch:
+                fut.set_exception(e)
+            return
+        with self._stats_lock:
+            self._batch_sizes.append(len(batch))
+        for u, t, fut in batch:
+            fut.set_result(recs[u][:t])
+
+    def _score(self, users, k):
+        m = self.model
+        if isinstance(m, (ContentBased, PopularityRecommender)):
+            return m.recommend_batch(users, self.user_seen_items, topk=k)
+        if isinstance(m, SVDFactorization):
+            return m.recommend_batch(users, topk=k, R=m.R_)
+        return m.recommend_batch(users, topk=k)
+
+    # ---- WSGI ----
+    def __call__(self, environ, start_response):
+        path, method = environ.get('PATH_INFO', ''), environ.get('REQUEST_METHOD', 'GET')
+        try:
+            if path == '/recommend' and method == 'GET':
+                q = parse_qs(environ.get('QUERY_STRING', ''))
+                user, k = q['user'][0], int(q.get('k', ['10'])[0])
+                recs = self.recommend(user, k)
+                return _json(start_response, '200 OK', {'user': user, 'items': [{'item_id': str(i), 'score': s} for i, s in recs]})
+            if path == '/interactions' and method == 'POST':
+                size = int(environ.get('CONTENT_LENGTH') or 0)
+                rows = json.loads(environ['wsgi.input'].read(size) or b'[]')
+                return _json(start_response, '200 OK', {'updated_users': self.add_interactions(pd.DataFrame(rows))})
+            if path == '/metrics' and method == 'GET':
+                return _json(start_response, '200 OK', self.metrics())
+            return _json(start_response, '404 Not Found', {'error': f'no route {method} {path}'})
+        except (KeyError, ValueError) as e:
+            return _json(start_response, '400 Bad Request', {'error': repr(e)})
+
+def _json(start_response, status, body):
+    data = json.dumps(body).encode()
+    start_response(status, [('Content-Type', 'application/json'), ('Content-Length', str(len(data)))])
+    return [data]
+
+class _ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+def make_app_server(service, host='127.0.0.1', port=8000):
+    """Threaded wsgiref server for ``service`` (port=0 picks a free port)."""
+    return make_server(host, port, service.start(), server_class=_ThreadingWSGIServer, handler_class=_QuietHandler)
@@ -0,0 +1,127 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import numpy as np
+from scipy.sparse import csr_matrix, vstack
+from sklearn.preprocessing import normalize
+
+def topk_per_row(M, k):
+    """Keep the k largest stored entries of every row of a sparse matrix.
+    Ties at the k-th value are broken towards the lower column index.
+    """
+    M = csr_matrix(M)
+    counts = np.diff(M.indptr)
+    long_rows = counts > k
+    if k <= 0 or not long_rows.any():
+        return M
+    M.sort_indices()
+    n, data = M.shape[0], M.data
+    rows = np.repeat(np.arange(n), counts)
+    pos = np.arange(len(data)) - np.repeat(M.indptr[:-1], counts)
+    # k-th largest value of each long row, from a padded (n_long, max_count) view
+    sel = long_rows[rows]
+    pad = np.full((long_rows.sum(), counts.max()), np.inf)
+    pad[(np.cumsum(long_rows) - 1)[rows[sel]], pos[sel]] = -data[sel]
+    pad.partition(k - 1, axis=1)
+    kth = np.full(n, -np.inf)
+    kth[long_rows] = -pad[:, k - 1]
+    del pad
+    t = kth[rows]
+    above, tie = data > t, data == t
+    need = k - np.bincount(rows, weights=above, minlength=n).astype(int)
+    tie_seen = np.cumsum(tie)
+    tie_rank = tie_seen - np.r_[0, tie_seen][M.indptr[:-1]][rows] - 1
+    keep = above | (tie & (tie_rank < need[rows]))
+    indptr = np.r_[0, np.cumsum(np.minimum(counts, k))]
+    return csr_matrix((data[keep], M.indices[keep], indptr), shape=M.shape)
+
+def _cosine_block(Xn, XnT, B, BT, rows, k, shrink):
+    S = (Xn[rows] @ XnT).tocsr()
+    # drop self-similarity and exact zeros
+    S.data[S.indices == np.repeat(rows, np.diff(S.indptr))] = 0.0
+    S.eliminate_zeros()
+    if k:
+        S = topk_per_row(S, k)
+    raw = S
+    if shrink > 0:
+        # s' = s * n_common / (n_common + shrink), n_common from binary dot-products
+        nn = (B[rows] @ BT).tocsr()
+        nn.data = nn.data / (nn.data + shrink)
+        S = S.multiply(nn).tocsr()
+    return S, raw
+
+# process workers receive the operands once, through the pool initializer
+_worker_args = None
+
+def _init_worker(args):
+    global _worker_args
+    _worker_args = args
+
+def _worker_block(rows):
+    return _cosine_block(*_worker_args[:4], rows, *_worker_args[4:])
+
+def _operands(X, shrink):
+    dtype = X.dtype if X.dtype in (np.float32, np.float64) else np.float64  # as sklearn's cosine_similarity
+    Xn = normalize(csr_matrix(X, dtype=dtype), copy=True)
+    B = BT = None
+    if shrink > 0:
+        B = (X > 0).astype(np.float32).tocsr()
+        BT = B.T.tocsr()
+    return Xn, Xn.T.tocsr(), B, BT
+
+def topk_cosine_similarity(X, k=0, shrink=0.0, block_size=1024, n_jobs=1, backend='thread', rows=None, return_raw=False):
+    """Row-by-row cosine similarity of X (rows are the entities), pruned to the
+    top-k neighbours per row, without ever materializing the full matrix.
+
+    X @ X.T is computed in blocks of ``block_size`` rows, and each block is
+    pruned in CSR form before the next one is built, so peak memory is one
+    block plus the kept neighbours. ``k=0`` keeps every neighbour. ``shrink``
+    applies s * n / (n + shrink), where n is the number of co-rated entries.
+    Blocks can run on a ``'thread'`` or ``'process'`` pool with ``n_jobs``
+    workers (-1 = all cores). Given ``rows``, only those rows are computed and
+    the result is (len(rows), n). ``return_raw=True`` also returns the
+    similarities before shrinkage (the same matrix when shrink is 0).
+    """
+    Xn, XnT, B, BT = _operands(X, shrink)
+    n = Xn.shape[0]
+    rows = np.arange(n) if rows is None else np.asarray(rows, dtype=np.int64)
+    step = max(int(block_size), 1)
+    blocks = [rows[s:s + step] for s in range(0, len(rows), step)]
+    n_jobs = os.cpu_count() if n_jobs in (-1, None) else int(n_jobs)
+    if n_jobs <= 1 or len(blocks) <= 1:
+        blocks = [_cosine_block(Xn, XnT, B, BT, b, k, shrink) for b in blocks]
+    elif backend == 'process':
+        args = (Xn, XnT, B, BT, k, shrink)
+        with ProcessPoolExecutor(n_jobs, initializer=_init_worker, initargs=(args,)) as ex:
+            blocks = list(ex.map(_worker_block, blocks))
+    elif backend == 'thread':
+        with ThreadPoolExecutor(n_jobs) as ex:
+            blocks = list(ex.map(lambda b: _cosine_block(Xn, XnT, B, BT, b, k, shrink), blocks))
+    else:
+        raise ValueError(f"Unknown backend: {backend}")
+    if not blocks:
+        blocks = [(csr_matrix((0, n)),) * 2]
+    sim = vstack([b[0] for b in blocks], format='csr')
+    if not return_raw:
+        return sim
+    return sim, (sim if shrink <= 0 else vstack([b[1] for b in blocks], format='csr'))
+
+def cosine_columns(X, cols, shrink=0.0):
+    """Similarities of every row of X with the rows ``cols`` as (n, n) CSR
+    matrices holding only those columns: (raw, shrunk), unpruned. Cosine and
+    co-counts are symmetric, so this is the transpose of their rows.
+    """
+    cols = np.asarray(cols, dtype=np.int64)
+    S, raw = _cosine_block(*_operands(X, shrink), cols, 0, shrink)
+    def spread(M):
+        M = M.tocoo()
+        return csr_matrix((M.data, (M.col, cols[M.row])), shape=(X.shape[0], X.shape[0]))
+    raw_t = spread(raw)
+    return raw_t, (raw_t if shrink <= 0 else spread(S))
+
+def replace_rows(M, rows, block):
+    """M with rows ``rows`` replaced by the rows of ``block`` (same width)."""
+    M, block = M.tocoo(), block.tocoo()
+    keep = ~np.isin(M.row, rows)
+    rows = np.asarray(rows)
+    return csr_matrix((np.r_[M.data[keep], block.data], (np.r_[M.row[keep], rows[block.row]], np.r_[M.col[keep], block.col])),
+                      shape=M.shape)
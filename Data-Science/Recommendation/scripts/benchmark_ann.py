@@ -0,0 +1,71 @@
+import argparse, time
+import numpy as np
+import pandas as pd
+from utils.data import load_ratings_csv, build_interaction_matrix, get_user_seen_items
+from recommenders.mf_svd import SVDFactorization
+from recommenders.als import ALSFactorization
+from recommenders.content import ContentBased
+
+def recall_at_k(approx, exact):
+    # fraction of the exact top-k (ignoring padding) that the index returned
+    hits = [(len(set(a[a >= 0]) & set(e[e >= 0])), (e >= 0).sum()) for a, e in zip(approx, exact)]
+    return float(np.mean([h / n for h, n in hits if n])) if hits else 0.0
+
+def timed(fn, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        t = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t)
+    return out, best
+
+def main():
+    ap = argparse.ArgumentParser(description='Recall@k and latency of the IVF index against brute-force scoring.')
+    ap.add_argument('--ratings', required=True)
+    ap.add_argument('--algo', default='svd', choices=['svd','als','content'])
+    ap.add_argument('--items', help='Item metadata CSV (for content)')
+    ap.add_argument('--text-cols', default='title,genres')
+    ap.add_argument('--factors', type=int, default=64)
+    ap.add_argument('--topk', type=int, default=10)
+    ap.add_argument('--n-lists', type=int, default=None, help='IVF lists (default sqrt(n_items))')
+    ap.add_argument('--nprobe', default='1,2,4,8,16,32', help='Comma-separated probe counts to try')
+    ap.add_argument('--users', type=int, default=2000, help='Sampled query users')
+    ap.add_argument('--single', type=int, default=200, help='Users timed one request at a time')
+    ap.add_argument('--repeats', type=int, default=3)
+    ap.add_argument('--seed', type=int, default=0)
+    args = ap.parse_args()
+
+    df = load_ratings_csv(args.ratings)
+    R, u_map, i_map = build_interaction_matrix(df)
+    rng = np.random.default_rng(args.seed)
+    users = list(rng.choice(list(u_map), size=min(args.users, len(u_map)), replace=False))
+    k = args.topk
+    if args.algo == 'content':
+        if not args.items:
+            raise SystemExit('Content-based requires --items metadata CSV')
+        cols = args.text_cols.split(',')
+        model = ContentBased(text_columns=tuple(cols)).fit(pd.read_csv(args.items)[['item_id'] + cols])
+        seen = get_user_seen_items(df)
+        query = lambda us, **kw: model.recommend_batch(us, seen, k, **kw)
+    else:
+        model = (SVDFactorization(factors=args.factors) if args.algo == 'svd' else ALSFactorization(factors=args.factors)).fit(R, u_map, i_map)
+        extra = {'R': R} if args.algo == 'svd' else {}
+        query = lambda us, **kw: model.recommend_batch(us, topk=k, **extra, **kw)
+
+    _, build_s = timed(lambda: model.build_index(n_lists=args.n_lists), 1)
+    index = model.index_
+    n_lists = len(index.offsets_) - 1
+    single = users[:args.single]
+    exact, exact_s = timed(lambda: query(users)[0], args.repeats)
+    _, exact_single = timed(lambda: [query([u]) for u in single], 1)
+    print(f"{args.algo}: {len(model.item_ids_)} items, {n_lists} lists, index built in {build_s:.2f}s, {len(users)} query users")
+    print(f"{'nprobe':>8} {'recall@' + str(k):>10} {'batch ms/user':>14} {'single ms':>10} {'speedup':>8}")
+    print(f"{'exact':>8} {1.0:>10.3f} {1e3 * exact_s / len(users):>14.4f} {1e3 * exact_single / len(single):>10.3f} {1.0:>8.2f}")
+    for nprobe in sorted({min(int(p), n_lists) for p in args.nprobe.split(',')}):
+        index.nprobe = nprobe
+        approx, s = timed(lambda: query(users, approximate=True)[0], args.repeats)
+        _, s1 = timed(lambda: [query([u], approximate=True) for u in single], 1)
+        print(f"{nprobe:>8} {recall_at_k(approx, exact):>10.3f} {1e3 * s / len(users):>14.4f} {1e3 * s1 / len(single):>10.3f} {exact_single / s1:>8.2f}")
+
+if __name__ == '__main__':
+    main()
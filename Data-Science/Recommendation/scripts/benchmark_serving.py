@@ -0,0 +1,74 @@
+import argparse, json, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+from urllib.request import urlopen
+import numpy as np
+from utils.data import load_ratings_csv, get_user_seen_items
+from recommenders.persist import load_model
+from recommenders.serving import RecommendationService, make_app_server
+
+def run(model, seen, users, args, window_ms, max_batch, cache_size):
+    # one in-process server per configuration; clients hit it over HTTP from a thread pool
+    service = RecommendationService(model, user_seen_items=seen, window_ms=window_ms, max_batch=max_batch, cache_size=cache_size)
+    server = make_app_server(service, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}"
+    rng = np.random.default_rng(args.seed)
+    # zipf-like popularity over users, so the cache sees repeat visitors
+    p = 1.0 / np.arange(1, len(users) + 1) ** args.skew
+    sample = rng.choice(users, size=args.requests, p=p / p.sum())
+
+    def call(u):
+        t = time.perf_counter()
+        with urlopen(f"{url}/recommend?user={quote(str(u))}&k={args.topk}") as r:
+            r.read()
+        return time.perf_counter() - t
+
+    t = time.perf_counter()
+    with ThreadPoolExecutor(args.clients) as pool:
+        lat = np.array(list(pool.map(call, sample))) * 1e3
+    wall = time.perf_counter() - t
+    with urlopen(f"{url}/metrics") as r:
+        m = json.load(r)
+    server.shutdown()
+    server.server_close()
+    service.stop()
+    return wall, lat, m
+
+def main():
+    ap = argparse.ArgumentParser(description='Load generator for the recommendation server: throughput and latency with and without micro-batching / caching.')
+    ap.add_argument('--model', required=True, help='Model directory written by `cli train`')
+    ap.add_argument('--ratings', help='Ratings CSV: user histories for pop/content models, and the user ids to query')
+    ap.add_argument('--clients', type=int, default=32, help='Concurrent client threads')
+    ap.add_argument('--requests', type=int, default=2000)
+    ap.add_argument('--topk', type=int, default=10)
+    ap.add_argument('--window-ms', type=float, default=2.0)
+    ap.add_argument('--max-batch', type=int, default=256)
+    ap.add_argument('--cache-size', type=int, default=10000)
+    ap.add_argument('--skew', type=float, default=1.0, help='Zipf exponent of user popularity (0 = uniform)')
+    ap.add_argument('--seed', type=int, default=0)
+    args = ap.parse_args()
+
+    model = load_model(args.model)
+    df = load_ratings_csv(args.ratings) if args.ratings else None
+    seen = get_user_seen_items(df) if df is not None else None
+    if hasattr(model, 'user_map_'):
+        users = list(model.user_map_)
+    elif df is not None:
+        users = list(df['user_id'].unique())
+    else:
+        raise SystemExit(f'{type(model).__name__} keeps no users: pass --ratings')
+    np.random.default_rng(args.seed).shuffle(users)
+
+    configs = [('per-request', 0.0, 1, 0), ('micro-batch', args.window_ms, args.max_batch, 0),
+               ('micro-batch+cache', args.window_ms, args.max_batch, args.cache_size)]
+    print(f"{type(model).__name__}: {len(users)} users, {args.requests} requests from {args.clients} clients, top-{args.topk}")
+    print(f"{'config':>18} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'server p50':>11} {'server p99':>11} {'batch mean':>11} {'batch p99':>10} {'hit rate':>9}")
+    for name, window_ms, max_batch, cache_size in configs:
+        wall, lat, m = run(model, seen, users, args, window_ms, max_batch, cache_size)
+        print(f"{name:>18} {args.requests / wall:>8.0f} {np.percentile(lat, 50):>8.2f} {np.percentile(lat, 99):>8.2f} "
+              f"{m['latency_ms']['p50']:>11.2f} {m['latency_ms']['p99']:>11.2f} {m['batch_size']['mean']:>11.1f} "
+              f"{m['batch_size']['p99']:>10.0f} {m['cache_hit_rate']:>9.2f}")
+
+if __name__ == '__main__':
+    main()
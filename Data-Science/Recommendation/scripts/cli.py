@@ -1,32 +1,52 @@
 import argparse
+import numpy as np
 import pandas as pd
-from utils.data import load_ratings_csv, build_interaction_matrix, leave_one_out_split, get_user_seen_items
-from utils.metrics import precision_at_k, recall_at_k, average_precision, ndcg
+from utils.data import (load_ratings_csv, build_interaction_matrix, load_interaction_matrix, id_index,
+                        leave_one_out_split, get_user_seen_items, with_interaction_values)
+from utils.rank_metrics import relevance_matrix, ranking_metrics
 from recommenders.popularity import PopularityRecommender
 from recommenders.knn import ItemKNN, UserKNN
 from recommenders.mf_svd import SVDFactorization
+from recommenders.als import ALSFactorization
 from recommenders.content import ContentBased
+from recommenders.persist import load_model, save_training_options
 
 def build_algo(name, args):
     name = name.lower()
+    if args.ann and name not in ('svd', 'als', 'content'):
+        raise SystemExit('--ann supports svd, als and content')
     if name == 'pop':
         return PopularityRecommender(mode=args.pop_mode)
     if name == 'userknn':
-        return UserKNN(k=args.k, shrink=args.shrink)
+        return UserKNN(k=args.k, shrink=args.shrink, block_size=args.block_size, n_jobs=args.jobs, backend=args.knn_backend)
     if name == 'itemknn':
-        return ItemKNN(k=args.k, shrink=args.shrink)
+        return ItemKNN(k=args.k, shrink=args.shrink, block_size=args.block_size, n_jobs=args.jobs, backend=args.knn_backend)
     if name == 'svd':
         return SVDFactorization(factors=args.factors, mean_center=not args.no_center)
+    if name == 'als':
+        return ALSFactorization(factors=args.factors, regularization=args.reg, alpha=args.alpha, iterations=args.iterations,
+                                solver=args.als_solver, cg_steps=args.cg_steps, n_jobs=args.jobs)
     if name == 'content':
         return ContentBased(text_columns=tuple(args.text_cols.split(',')))
     raise SystemExit(f"Unknown algo: {name}")
 
+def ann_options(algo, args):
+    # --ann: serve MF/content models from an IVF index instead of scoring every item
+    if not args.ann:
+        return {}
+    if not hasattr(algo, 'build_index'):
+        raise SystemExit('--ann supports svd, als and content')
+    if algo.index_ is None:
+        algo.build_index(n_lists=args.n_lists, nprobe=args.nprobe)
+    else:
+        algo.index_.nprobe = args.nprobe  # index loaded with the model
+    return {'approximate': True}
+
 def cmd_eval(args):
-    df = load_ratings_csv(args.ratings)
-    if args.implicit or 'rating' not in df.columns:
-        df['rating'] = 1.0
+    # binarized once here, exactly as the streaming loader of train/sweep does
+    df = with_interaction_values(load_ratings_csv(args.ratings), args.implicit, args.threshold)
     train, test = leave_one_out_split(df, min_user_interactions=args.min_user_interactions)
-    R, u_map, i_map = build_interaction_matrix(train, implicit=args.implicit, threshold=args.threshold)
+    R, u_map, i_map = build_interaction_matrix(train)
     user_seen_train = get_user_seen_items(train)
 
     algo = build_algo(args.algo, args)
@@ -40,89 +60,174 @@ def cmd_eval(args):
     else:
         algo.fit(R, u_map, i_map)
 
-    # Evaluate
+    # Evaluate: score every user in blocks, then map indices back to item ids
     users = sorted(set(train['user_id']).intersection(set(test['user_id'])))
     k = args.topk
-    precs, recs, maps, ndcgs = [], [], [], []
-    for u in users:
-        relevant = set(test[test['user_id'] == u]['item_id'].values)
-        if args.algo == 'svd':
-            recs_u = algo.recommend(u, topk=k, exclude_seen=True, R=R)
-        elif args.algo == 'content':
-            recs_u = algo.recommend(u, user_seen_train.get(u, []), topk=k)
-        elif args.algo == 'pop':
-            recs_u = algo.recommend(u, user_seen_train.get(u, []), topk=k)
-        else:
-            recs_u = algo.recommend(u, topk=k, exclude_seen=True)
-        precs.append(precision_at_k(recs_u, relevant, k))
-        recs.append(recall_at_k(recs_u, relevant, k))
-        maps.append(average_precision(recs_u, relevant, k))
-        ndcgs.append(ndcg(recs_u, relevant, k))
-
-    import numpy as np
-    def s(a): return float(np.mean(a)) if a else 0.0
+    ann = ann_options(algo, args)
+    if args.algo == 'svd':
+        items, scores = algo.recommend_batch(users, topk=k, exclude_seen=True, R=R, **ann)
+    elif args.algo in ('content', 'pop'):
+        items, scores = algo.recommend_batch(users, user_seen_train, topk=k, **ann)
+    else:
+        items, scores = algo.recommend_batch(users, topk=k, exclude_seen=True, **ann)
+    item_index = {iid: i for i, iid in enumerate(algo.item_ids_)}
+    relevant = relevance_matrix(test['user_id'], test['item_id'], {u: i for i, u in enumerate(users)}, item_index)
+    m = ranking_metrics(items, relevant, k)
+
+    def s(a): return float(np.mean(a)) if len(a) else 0.0
     print(f"Users evaluated: {len(users)}")
-    print(f"Precision@{k}: {s(precs):.4f}")
-    print(f"Recall@{k}:    {s(recs):.4f}")
-    print(f"MAP@{k}:       {s(maps):.4f}")
-    print(f"NDCG@{k}:      {s(ndcgs):.4f}")
+    print(f"Precision@{k}: {s(m['precision']):.4f}")
+    print(f"Recall@{k}:    {s(m['recall']):.4f}")
+    print(f"MAP@{k}:       {s(m['map']):.4f}")
+    print(f"NDCG@{k}:      {s(m['ndcg']):.4f}")
 
-def cmd_recommend(args):
-    df = load_ratings_csv(args.ratings)
-    if args.implicit or 'rating' not in df.columns:
-        df['rating'] = 1.0
-    R, u_map, i_map = build_interaction_matrix(df, implicit=args.implicit, threshold=args.threshold)
+def fit_full(args):
+    """Fit args.algo on all of --ratings (for train, and recommend without --model)."""
     algo = build_algo(args.algo, args)
-
+    if args.algo != 'content' and not args.ratings:
+        raise SystemExit('--ratings is required')
     if args.algo == 'content':
         if not args.items:
             raise SystemExit('Content-based requires --items metadata CSV')
         items_df = pd.read_csv(args.items)
         algo.fit(items_df[['item_id'] + args.text_cols.split(',')])
-        # Build user history
-        user_hist = set(df[df['user_id'] == args.user]['item_id'].astype(str).tolist())
-        recs = algo.recommend(args.user, user_hist, topk=args.topk)
     elif args.algo == 'pop':
-        algo.fit(df)
+        algo.fit(with_interaction_values(load_ratings_csv(args.ratings), args.implicit, args.threshold))
+    else:
+        # matrix models only need R: stream it from the CSV (or the --cache directory)
+        R, user_ids, item_ids = load_interaction_matrix(args.ratings, implicit=args.implicit, threshold=args.threshold, cache=args.cache)
+        algo.fit(R, id_index(user_ids), id_index(item_ids))
+    return algo
+
+def cmd_train(args):
+    algo = fit_full(args)
+    ann_options(algo, args)
+    algo.save(args.out)
+    save_training_options(args.out, implicit=bool(args.implicit), threshold=float(args.threshold))
+    print(f"Saved {type(algo).__name__} to {args.out}")
+
+def cmd_recommend(args):
+    if args.model:
+        algo = load_model(args.model)  # memory-mapped: no refit
+    elif args.algo:
+        algo = fit_full(args)
+    else:
+        raise SystemExit('recommend needs --algo or --model')
+    ann = ann_options(algo, args)
+
+    if isinstance(algo, (ContentBased, PopularityRecommender)):
+        # these models keep no interactions: the user's history comes from --ratings
+        if not args.ratings:
+            raise SystemExit(f'{type(algo).__name__} needs --ratings for the user history')
+        df = load_ratings_csv(args.ratings)
         user_hist = set(df[df['user_id'] == args.user]['item_id'].astype(str).tolist())
-        recs = algo.recommend(args.user, user_hist, topk=args.topk)
-    elif args.algo == 'svd':
-        algo.fit(R, u_map, i_map)
-        recs = algo.recommend(args.user, topk=args.topk, exclude_seen=True, R=R)
+        recs = algo.recommend(args.user, user_hist, topk=args.topk, **ann)
+    elif isinstance(algo, SVDFactorization):
+        recs = algo.recommend(args.user, topk=args.topk, exclude_seen=True, R=algo.R_, **ann)
     else:
-        algo.fit(R, u_map, i_map)
-        recs = algo.recommend(args.user, topk=args.topk, exclude_seen=True)
+        recs = algo.recommend(args.user, topk=args.topk, exclude_seen=True, **ann)
 
     for iid, score in recs:
         print(f"{iid}, {score:.6f}")
 
+def cmd_serve(args):
+    from recommenders.serving import RecommendationService, make_app_server
+    seen = get_user_seen_items(load_ratings_csv(args.ratings)) if args.ratings else None
+    service = RecommendationService.from_path(args.model, user_seen_items=seen, window_ms=args.window_ms,
+                                              max_batch=args.max_batch, cache_size=args.cache_size)
+    server = make_app_server(service, args.host, args.port)
+    print(f"Serving {type(service.model).__name__} on http://{args.host}:{server.server_port} "
+          "(GET /recommend?user=..&k=.., POST /interactions, GET /metrics)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop()
+
+def cmd_sweep(args):
+    from scripts.sweep import run_sweep, GRID_PARAMS
+    table = run_sweep(args)
+    shown = table.copy()
+    for c in set(GRID_PARAMS) & set(shown.columns):
+        shown[c] = ['-' if pd.isna(v) else str(v) for v in shown[c]]  # parameters the algorithm does not use
+    print(shown.to_string(index=False, float_format=lambda v: f'{v:.4f}'))
+    if args.out:
+        table.to_csv(args.out, index=False)
+        print(f"Wrote {args.out}")
+
 def main(argv=None):
     ap = argparse.ArgumentParser(description='Recommendation Systems Toolkit')
     sub = ap.add_subparsers(dest='cmd', required=True)
 
     common = argparse.ArgumentParser(add_help=False)
-    common.add_argument('--algo', required=True, choices=['pop','userknn','itemknn','svd','content'])
     common.add_argument('--implicit', action='store_true', help='Treat data as implicit (binarize)')
     common.add_argument('--threshold', type=float, default=0.0, help='Rating > threshold => 1 (implicit)')
     common.add_argument('--topk', type=int, default=10)
     common.add_argument('--k', type=int, default=50, help='Neighbors for KNN')
     common.add_argument('--shrink', type=float, default=0.0, help='Shrinkage for KNN similarity')
-    common.add_argument('--factors', type=int, default=50, help='Latent factors for SVD')
+    common.add_argument('--block-size', type=int, default=1024, help='Rows per block when building KNN similarity')
+    common.add_argument('--jobs', type=int, default=1, help='Workers for building KNN similarity / ALS solves (-1 = all cores)')
+    common.add_argument('--knn-backend', default='thread', choices=['thread','process'], help='Worker pool for KNN similarity blocks')
+    common.add_argument('--factors', type=int, default=50, help='Latent factors for SVD/ALS')
+    common.add_argument('--reg', type=float, default=0.01, help='L2 regularization for ALS')
+    common.add_argument('--alpha', type=float, default=40.0, help='Confidence scaling for ALS (c = 1 + alpha*r)')
+    common.add_argument('--iterations', type=int, default=15, help='ALS sweeps')
+    common.add_argument('--als-solver', default='cg', choices=['cg','cholesky'])
+    common.add_argument('--cg-steps', type=int, default=3, help='Conjugate-gradient steps per ALS solve')
     common.add_argument('--no-center', action='store_true', help='Disable mean-centering in SVD')
+    common.add_argument('--ann', action='store_true', help='Rank svd/als/content through an IVF index (approximate)')
+    common.add_argument('--n-lists', type=int, default=None, help='IVF lists (default sqrt(n_items))')
+    common.add_argument('--nprobe', type=int, default=8, help='IVF lists scanned per query: higher = better recall, slower')
     common.add_argument('--pop-mode', default='count', choices=['count','mean'])
     common.add_argument('--items', help='Item metadata CSV (for content-based)')
     common.add_argument('--text-cols', default='title,genres', help='Comma-separated text columns')
 
+    algos = ['pop','userknn','itemknn','svd','als','content']
     e = sub.add_parser('eval', parents=[common], help='Evaluate with leave-one-out')
+    e.add_argument('--algo', required=True, choices=algos)
     e.add_argument('--ratings', required=True)
     e.add_argument('--min-user-interactions', type=int, default=3)
     e.set_defaults(func=cmd_eval)
 
+    t = sub.add_parser('train', parents=[common], help='Fit on all ratings and save the model')
+    t.add_argument('--algo', required=True, choices=algos)
+    t.add_argument('--ratings', required=True)
+    t.add_argument('--out', required=True, help='Model directory (with --ann the index is saved too)')
+    t.add_argument('--cache', help='Directory caching the parsed interaction matrix (memory-mapped on later runs)')
+    t.set_defaults(func=cmd_train)
+
     r = sub.add_parser('recommend', parents=[common], help='Recommend for a single user')
-    r.add_argument('--ratings', required=True)
+    r.add_argument('--algo', choices=algos, help='Fit this algorithm on --ratings (without --model)')
+    r.add_argument('--model', help='Model directory written by train (no refit)')
+    r.add_argument('--ratings', help='Ratings CSV (to fit, or the user history for pop/content models)')
     r.add_argument('--user', required=True, help='User id for recommendations')
+    r.add_argument('--cache', help='Directory caching the parsed interaction matrix (memory-mapped on later runs)')
     r.set_defaults(func=cmd_recommend)
 
+    w = sub.add_parser('sweep', parents=[common], help='Grid search over algorithms and parameters with cross-validation')
+    w.add_argument('--ratings', required=True)
+    w.add_argument('--algos', default='pop,itemknn,userknn,svd,als', help='Comma-separated algorithms (not content)')
+    w.add_argument('--grid', nargs='*', metavar='NAME=V1,V2', help='Values to try, e.g. k=20,50 shrink=0,10 factors=32,64')
+    w.add_argument('--split', default='loo', choices=['loo','kfold','temporal'], help='Leave-one-out, random k-fold or time cutoff')
+    w.add_argument('--folds', type=int, default=5, help='Folds for --split kfold')
+    w.add_argument('--test-frac', type=float, default=0.2, help='Latest fraction of interactions held out by --split temporal')
+    w.add_argument('--min-user-interactions', type=int, default=3)
+    w.add_argument('--seed', type=int, default=0)
+    w.add_argument('--workers', type=int, default=-1, help='Processes fitting configurations in parallel (-1 = all cores)')
+    w.add_argument('--out', help='Write the results table as CSV')
+    w.set_defaults(func=cmd_sweep)
+
+    s = sub.add_parser('serve', help='Serve a saved model over HTTP (micro-batched, cached)')
+    s.add_argument('--model', required=True, help='Model directory written by train')
+    s.add_argument('--ratings', help='Ratings CSV with the user histories (needed by pop/content models)')
+    s.add_argument('--host', default='127.0.0.1')
+    s.add_argument('--port', type=int, default=8000)
+    s.add_argument('--window-ms', type=float, default=2.0, help='How long a batch waits for more requests')
+    s.add_argument('--max-batch', type=int, default=256, help='Most requests scored together')
+    s.add_argument('--cache-size', type=int, default=10000, help='Users whose top-k lists are cached (0 = off)')
+    s.set_defaults(func=cmd_serve)
+
     args = ap.parse_args(argv)
     args.func(args)
 
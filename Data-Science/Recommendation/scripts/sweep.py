@@ -0,0 +1,164 @@
+import itertools
+import os
+import tempfile
+import time
+from argparse import Namespace
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix, hstack
+from utils.data import stream_interactions, id_index
+from utils.split import leave_one_out, k_fold, time_cutoff
+from utils.rank_metrics import ranking_metrics
+
+# grid parameter (CLI dest) -> algorithms it applies to
+GRID_PARAMS = {
+    'k': ('userknn', 'itemknn'), 'shrink': ('userknn', 'itemknn'),
+    'factors': ('svd', 'als'), 'no_center': ('svd',),
+    'reg': ('als',), 'alpha': ('als',), 'iterations': ('als',), 'cg_steps': ('als',),
+    'pop_mode': ('pop',),
+}
+
+def parse_grid(specs, defaults):
+    """['k=20,50', 'shrink=0,10'] -> {'k': [20, 50], 'shrink': [0.0, 10.0]}, typed like the CLI defaults."""
+    grid = {}
+    for spec in specs:
+        name, _, values = spec.partition('=')
+        name = name.strip().replace('-', '_')
+        if name not in GRID_PARAMS or not values:
+            raise SystemExit(f"Bad --grid entry {spec!r}: expected name=v1,v2 with name in {', '.join(GRID_PARAMS)}")
+        kind = type(getattr(defaults, name))
+        cast = (lambda v: v.lower() in ('1', 'true', 'yes')) if kind is bool else kind
+        grid[name] = [cast(v.strip()) for v in values.split(',')]
+    return grid
+
+def grid_configs(algos, grid):
+    """(algo, params) for every algorithm and combination of the grid values it uses."""
+    for algo in algos:
+        keys = [k for k in grid if algo in GRID_PARAMS[k]]
+        for values in itertools.product(*(grid[k] for k in keys)):
+            yield algo, dict(zip(keys, values))
+
+def split_folds(data, split, folds=5, test_frac=0.2, min_user_interactions=3, seed=0):
+    """[(train, test), ...] CSR pairs from stream_interactions output: one
+    leave-one-out or temporal split, or ``folds`` random interaction folds."""
+    users, items, values, times, user_ids, item_ids = data
+    shape = (len(user_ids), len(item_ids))
+    if split == 'loo':
+        return [leave_one_out(users, items, values, shape, times, min_user_interactions)]
+    if split == 'kfold':
+        return k_fold(users, items, values, shape, folds, seed)
+    if split == 'temporal':
+        if times is None:
+            raise SystemExit('--split temporal needs a timestamp column')
+        return [time_cutoff(users, items, values, times, shape, test_frac=test_frac)]
+    raise SystemExit(f'Unknown split: {split}')
+
+# ---- folds are written once as .npy files; every worker memory-maps the same pages ----
+def _save_csr(path, name, M):
+    for part in ('data', 'indices', 'indptr'):
+        np.save(os.path.join(path, f'{name}.{part}.npy'), getattr(M, part))
+    return list(M.shape)
+
+def _load_csr(path, name, shape):
+    arr = lambda part: np.load(os.path.join(path, f'{name}.{part}.npy'), mmap_mode='r')
+    return csr_matrix((arr('data'), arr('indices'), arr('indptr')), shape=tuple(shape))
+
+def save_fold(path, train, test, user_ids, item_ids):
+    """Train CSR, ids and the binary relevance of the test users, as cmd_eval builds them:
+    only users and items with training data get rows/columns; test items without
+    any are relevant columns after the known ones, which no model can hit."""
+    os.makedirs(path, exist_ok=True)
+    users = np.diff(train.indptr) > 0
+    items = np.diff(train.tocsc().indptr) > 0
+    evaluated = users & (np.diff(test.indptr) > 0)
+    R = train[users][:, items]
+    relevant = test[evaluated]
+    relevant = hstack([relevant[:, items], relevant[:, ~items]], format='csr')
+    relevant.data[:] = 1.0
+    for name, ids in (('user_ids', user_ids[users]), ('item_ids', item_ids[items]), ('eval_users', user_ids[evaluated])):
+        np.save(os.path.join(path, name + '.npy'), ids)
+    return {'path': path, 'R': _save_csr(path, 'R', R), 'relevant': _save_csr(path, 'relevant', relevant)}
+
+_FOLDS, _LOADED = None, {}
+
+def _init_worker(folds):
+    global _FOLDS
+    _FOLDS = folds
+
+def _fold(i):
+    if i not in _LOADED:
+        meta = _FOLDS[i]
+        ids = lambda name: np.load(os.path.join(meta['path'], name + '.npy'), mmap_mode='r')
+        item_ids = ids('item_ids')
+        _LOADED[i] = Namespace(R=_load_csr(meta['path'], 'R', meta['R']), relevant=_load_csr(meta['path'], 'relevant', meta['relevant']),
+                               user_map=id_index(ids('user_ids')), item_map=id_index(item_ids), item_ids=item_ids,
+                               users=ids('eval_users').tolist())
+    return _LOADED[i]
+
+def evaluate_config(task):
+    """Fit one (fold, algo, params) and score its test users; runs in a pool worker."""
+    from scripts.cli import build_algo, ann_options
+    fold, name, params, opts = task
+    f = _fold(fold)
+    args = Namespace(**{**opts, **params})
+    algo = build_algo(name, args)
+    k = args.topk
+    start = time.perf_counter()
+    if name == 'pop':
+        algo.fit(pd.DataFrame({'item_id': f.item_ids[f.R.indices], 'rating': f.R.data}))
+    else:
+        algo.fit(f.R, f.user_map, f.item_map)
+    ann = ann_options(algo, args)
+    fit_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if name == 'pop':
+        rows = [f.user_map[u] for u in f.users]
+        seen = {u: set(f.item_ids[f.R.indices[f.R.indptr[r]:f.R.indptr[r + 1]]].tolist()) for u, r in zip(f.users, rows)}
+        items, _ = algo.recommend_batch(f.users, seen, topk=k)
+        cols = np.array([f.item_map[i] for i in algo.item_ids_], dtype=np.int64)  # pop's ranking order -> R columns
+        items = np.where(items >= 0, cols[np.maximum(items, 0)], -1)
+    elif name == 'svd':
+        items, _ = algo.recommend_batch(f.users, topk=k, exclude_seen=True, R=f.R, **ann)
+    else:
+        items, _ = algo.recommend_batch(f.users, topk=k, exclude_seen=True, **ann)
+    m = ranking_metrics(items, f.relevant, k)
+    score_s = time.perf_counter() - start
+    mean = lambda a: float(np.mean(a)) if len(a) else 0.0
+    return dict(algo=name, **params, fold=fold, users=len(f.users), precision=mean(m['precision']), recall=mean(m['recall']),
+                map=mean(m['map']), ndcg=mean(m['ndcg']), fit_s=fit_s, score_s=score_s)
+
+def run_sweep(args):
+    """Load and split once, then evaluate every grid configuration on every fold in a process pool.
+    Returns one row per configuration (metrics and timings averaged over folds)."""
+    grid = parse_grid(args.grid or [], args)
+    algos = args.algos.split(',')
+    unknown = set(algos) - {'pop', 'userknn', 'itemknn', 'svd', 'als'}
+    if unknown:
+        raise SystemExit(f"sweep supports pop, userknn, itemknn, svd and als, not {', '.join(sorted(unknown))}")
+    unused = [k for k in grid if not set(GRID_PARAMS[k]) & set(algos)]
+    if unused:
+        raise SystemExit(f"--grid {', '.join(unused)} applies to none of --algos {args.algos} "
+                         f"({'; '.join(k + ': ' + ', '.join(GRID_PARAMS[k]) for k in unused)})")
+    data = stream_interactions(args.ratings, implicit=args.implicit, threshold=args.threshold)
+    splits = split_folds(data, args.split, args.folds, args.test_frac, args.min_user_interactions, args.seed)
+    configs = list(grid_configs(algos, grid))
+    opts = {k: v for k, v in vars(args).items() if k != 'func'}
+    workers = os.cpu_count() if args.workers in (-1, None) else max(int(args.workers), 1)
+    with tempfile.TemporaryDirectory(prefix='sweep-') as tmp:
+        folds = [save_fold(os.path.join(tmp, str(i)), train, test, data[4], data[5]) for i, (train, test) in enumerate(splits)]
+        del data, splits
+        tasks = [(fold, name, params, opts) for name, params in configs for fold in range(len(folds))]
+        print(f"{len(configs)} configurations x {len(folds)} fold(s) on {workers} worker(s)")
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(folds,)) as pool:
+            rows = list(pool.map(evaluate_config, tasks))
+    per_fold = pd.DataFrame(rows)
+    per_fold['config'] = np.repeat(np.arange(len(configs)), len(folds))
+    table = per_fold.groupby('config').agg({**{k: 'first' for k in ['algo', *grid]}, 'fold': 'size', 'users': 'mean',
+                                             **{c: 'mean' for c in ('precision', 'recall', 'map', 'ndcg', 'fit_s', 'score_s')}})
+    for key, values in grid.items():
+        if all(isinstance(v, int) and not isinstance(v, bool) for v in values):
+            table[key] = table[key].astype('Int64')  # stays integer next to the NaN of other algorithms
+    table['users'] = table['users'].round().astype(int)
+    return table.rename(columns={'fold': 'folds'}).reset_index(drop=True)
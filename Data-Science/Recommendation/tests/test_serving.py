@@ -0,0 +1,68 @@
+import io
+import json
+import os
+import sys
+import threading
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from recommenders.knn import ItemKNN
+from recommenders.persist import save_training_options
+from recommenders.serving import RecommendationService
+from utils.data import build_interaction_matrix
+
+def _ratings():
+    rng = np.random.default_rng(0)
+    users, items = np.nonzero(rng.random((30, 20)) < 0.3)
+    return pd.DataFrame({'user_id': users.astype(str), 'item_id': items.astype(str), 'rating': rng.integers(1, 6, len(users))})
+
+@pytest.fixture
+def service():
+    model = ItemKNN(k=3).fit(*build_interaction_matrix(_ratings()))
+    svc = RecommendationService(model, window_ms=200, cache_size=0).start()  # wide window: concurrent calls share a batch
+    yield svc
+    svc.stop()
+
+def _concurrent(svc, calls):
+    out = [None] * len(calls)
+    def run(i, user, k):
+        try:
+            out[i] = svc.recommend(user, k)
+        except Exception as e:
+            out[i] = e
+    threads = [threading.Thread(target=run, args=(i, *c)) for i, c in enumerate(calls)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return out
+
+def test_huge_k_is_capped_and_does_not_fail_its_batch(service):
+    good, huge = _concurrent(service, [('0', 2), ('1', 10 ** 12)])
+    assert len(good) == 2
+    assert isinstance(huge, list) and len(huge) <= len(service.model.item_ids_)
+    assert service.metrics()['batch_size']['max'] == 2
+
+def test_bad_k_is_rejected_and_good_request_still_served(service):
+    good, negative, zero = _concurrent(service, [('0', 2), ('1', -1), ('2', 0)])
+    assert len(good) == 2
+    assert isinstance(negative, ValueError) and isinstance(zero, ValueError)
+
+def test_wsgi_bad_k_is_400(service):
+    status = []
+    environ = {'PATH_INFO': '/recommend', 'REQUEST_METHOD': 'GET', 'QUERY_STRING': 'user=0&k=-3', 'wsgi.input': io.BytesIO()}
+    body = service(environ, lambda s, h: status.append(s))
+    assert status == ['400 Bad Request']
+    assert 'topk' in json.loads(body[0])['error']
+
+def test_updates_use_the_training_implicit_threshold(tmp_path):
+    path = str(tmp_path / 'itemknn')
+    ItemKNN(k=3).fit(*build_interaction_matrix(_ratings(), implicit=True, threshold=2)).save(path)
+    save_training_options(path, implicit=True, threshold=2.0)
+    svc = RecommendationService.from_path(path, cache_size=0)
+    svc.add_interactions(pd.DataFrame({'user_id': ['new', 'new'], 'item_id': ['0', '1'], 'rating': [5, 1]}))
+    m = svc.model
+    row = m.R_[m.user_map_['new']]
+    assert set(row.data) <= {0.0, 1.0} and row[0, m.item_map_['0']] == 1.0
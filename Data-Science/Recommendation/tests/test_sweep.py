@@ -0,0 +1,41 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from scripts.cli import main
+
+RATINGS = os.path.join(ROOT, 'data', 'sample_ratings.csv')
+
+@pytest.mark.parametrize('grid', ['k=5,10', 'no_center=true'])
+def test_grid_parameter_of_no_selected_algorithm_is_rejected(grid):
+    with pytest.raises(SystemExit, match='applies to none of --algos'):
+        main(['sweep', '--ratings', RATINGS, '--algos', 'pop', '--grid', grid, '--workers', '1'])
+
+def test_grid_parameter_of_some_selected_algorithm_runs(capsys):
+    main(['sweep', '--ratings', RATINGS, '--algos', 'pop,itemknn', '--grid', 'k=5,10', '--workers', '1'])
+    rows = capsys.readouterr().out.splitlines()
+    assert rows[0].startswith('3 configurations') and rows[2].split()[:2] == ['pop', '-']
+
+def _eval_metrics(out):
+    # 'Precision@10: 0.1234' lines of cmd_eval, in sweep's column order
+    values = dict(line.split(':') for line in out.splitlines() if '@' in line)
+    return [round(float(values[f'{m}@10']), 4) for m in ('Precision', 'Recall', 'MAP', 'NDCG')]
+
+@pytest.mark.parametrize('algo', ['pop', 'itemknn', 'svd'])
+def test_implicit_threshold_eval_matches_sweep(tmp_path, capsys, algo):
+    rng = np.random.default_rng(1)
+    users, items = np.nonzero(rng.random((40, 30)) < 0.3)
+    path = tmp_path / 'ratings.csv'
+    pd.DataFrame({'user_id': users, 'item_id': items, 'rating': rng.integers(1, 6, len(users)),
+                  'timestamp': rng.permutation(len(users))}).to_csv(path, index=False)
+    opts = ['--ratings', str(path), '--implicit', '--threshold', '3', '--factors', '5', '--pop-mode', 'mean']
+    main(['eval', '--algo', algo, *opts])
+    expected = _eval_metrics(capsys.readouterr().out)
+    out = tmp_path / 'sweep.csv'
+    main(['sweep', '--algos', algo, '--workers', '1', '--out', str(out), *opts])
+    row = pd.read_csv(out).iloc[0]
+    assert [round(row[c], 4) for c in ('precision', 'recall', 'map', 'ndcg')] == expected
@@ -1,19 +1,23 @@
 from __future__ import annotations
+import json
+import os
+import numpy as np
 import pandas as pd
 from scipy.sparse import csr_matrix
 
-def load_ratings_csv(path: str) -> pd.DataFrame:
-    df = pd.read_csv(path)
-    # standardize column names
-    cols = {c.lower().strip(): c for c in df.columns}
+def _ratings_columns(columns):
+    # standardize column names: (user, item, rating, timestamp) as named in the file, None if absent
+    cols = {c.lower().strip(): c for c in columns}
     def pick(*names):
         for n in names:
             if n in cols: return cols[n]
         return None
-    uid = pick('user_id','user','userid','u')
-    iid = pick('item_id','item','movieid','i','productid')
-    rating = pick('rating','score','value')
-    ts = pick('timestamp','time','ts')
+    return (pick('user_id','user','userid','u'), pick('item_id','item','movieid','i','productid'),
+            pick('rating','score','value'), pick('timestamp','time','ts'))
+
+def load_ratings_csv(path: str) -> pd.DataFrame:
+    df = pd.read_csv(path)
+    uid, iid, rating, ts = _ratings_columns(df.columns)
     out = pd.DataFrame({
         'user_id': df[uid].astype(str),
         'item_id': df[iid].astype(str),
@@ -36,29 +40,136 @@ def build_interaction_matrix(df: pd.DataFrame, implicit: bool = False, threshold
     i_index = {m:i for i,m in enumerate(items)}
     rows = df['user_id'].astype(str).map(u_index)
     cols = df['item_id'].astype(str).map(i_index)
-    if implicit or 'rating' not in df.columns:
-        vals = (df.get('rating', 1.0) > threshold).astype(float)
-        vals = vals.where(vals > 0, 0.0).astype(float)
-    else:
-        vals = pd.to_numeric(df['rating'], errors='coerce').fillna(0.0).astype(float)
+    vals = _interaction_values(df, implicit, threshold)
 
     R = csr_matrix((vals, (rows, cols)), shape=(len(users), len(items)))
     return R, u_index, i_index
 
+def _interaction_values(df: pd.DataFrame, implicit: bool, threshold: float):
+    if implicit or 'rating' not in df.columns:
+        vals = (df.get('rating', 1.0) > threshold).astype(float)
+        return vals.where(vals > 0, 0.0).astype(float)
+    return pd.to_numeric(df['rating'], errors='coerce').fillna(0.0).astype(float)
+
+def with_interaction_values(df: pd.DataFrame, implicit: bool = False, threshold: float = 0.0):
+    """df with 'rating' replaced by the values build_interaction_matrix stores
+    (1/0 by rating > threshold under implicit, 1 without a rating column), for
+    models fitted on the frame rather than on R."""
+    return df.assign(rating=_interaction_values(df, implicit, threshold).to_numpy())
+
+def extend_interaction_matrix(R: csr_matrix, user_map: dict, item_map: dict, df: pd.DataFrame,
+                              implicit: bool = False, threshold: float = 0.0):
+    """Append the interactions of df to R. Returns (R, delta).
+    - unseen users/items get the next rows/columns; user_map/item_map grow in place
+    - R is the grown matrix, identical to build_interaction_matrix on the concatenated data
+    - delta: csr of the same shape holding only the new interactions
+    """
+    for u in df['user_id'].astype(str).unique():
+        user_map.setdefault(u, len(user_map))
+    for i in df['item_id'].astype(str).unique():
+        item_map.setdefault(i, len(item_map))
+    shape = (len(user_map), len(item_map))
+    rows = df['user_id'].astype(str).map(user_map).to_numpy()
+    cols = df['item_id'].astype(str).map(item_map).to_numpy()
+    vals = _interaction_values(df, implicit, threshold).to_numpy()
+    old = R.tocoo()
+    R = csr_matrix((np.r_[old.data, vals], (np.r_[old.row, rows], np.r_[old.col, cols])), shape=shape)
+    delta = csr_matrix((vals, (rows, cols)), shape=shape)
+    return R, delta
+
+def _encode(values, vocab: dict):
+    # codes of a chunk of raw ids; only the chunk's distinct ids become str and touch the vocabulary
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    lut = np.fromiter((vocab.setdefault(u, len(vocab)) for u in uniques.astype(str)), dtype=np.int32, count=len(uniques))
+    return lut[codes]
+
+def _timestamps(col: pd.Series):
+    # seconds as float: numeric columns as they are, date strings parsed; unparseable -> nan
+    if pd.api.types.is_numeric_dtype(col):
+        return col.to_numpy(dtype=float)
+    t = pd.to_datetime(col, errors='coerce')
+    return np.where(t.isna(), np.nan, t.to_numpy(dtype='datetime64[ns]').astype(np.int64) / 1e9)
+
+def stream_interactions(path: str, implicit: bool = False, threshold: float = 0.0, chunksize: int = 1_000_000,
+                        timestamps: bool = True):
+    """Integer-coded interactions of a ratings CSV read ``chunksize`` rows at a time.
+    Returns (users, items, values, times, user_ids, item_ids):
+    - users/items: int32 codes per row, numbered by first appearance like build_interaction_matrix
+    - values: as build_interaction_matrix stores them; times: float seconds, None without a timestamp column
+    - user_ids/item_ids: str arrays, user_ids[code] is the original id
+    Only a chunk's distinct ids ever become Python strings.
+    """
+    uid, iid, rating, ts = _ratings_columns(pd.read_csv(path, nrows=0).columns)
+    ts = ts if timestamps else None
+    users, items = {}, {}
+    rows, cols, vals, times = [], [], [], []
+    for chunk in pd.read_csv(path, usecols=[c for c in (uid, iid, rating, ts) if c], chunksize=chunksize):
+        rows.append(_encode(chunk[uid], users))
+        cols.append(_encode(chunk[iid], items))
+        ratings = pd.DataFrame({'rating': pd.to_numeric(chunk[rating], errors='coerce')}) if rating else pd.DataFrame(index=chunk.index)
+        vals.append(_interaction_values(ratings, implicit, threshold).to_numpy())
+        if ts:
+            times.append(_timestamps(chunk[ts]))
+    cat = lambda parts, dtype: np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+    return (cat(rows, np.int32), cat(cols, np.int32), cat(vals, float), cat(times, float) if ts else None,
+            np.array(list(users), dtype=str), np.array(list(items), dtype=str))
+
+def stream_interaction_matrix(path: str, implicit: bool = False, threshold: float = 0.0, chunksize: int = 1_000_000):
+    """Build (R, user_ids, item_ids) from a ratings CSV read ``chunksize`` rows at a time.
+    - ids are factorized to int32 codes per chunk, so the full file never exists as Python strings
+    - user_ids/item_ids: str arrays, user_ids[row] / item_ids[col] is the original id
+    - R, rows and columns are identical to build_interaction_matrix(load_ratings_csv(path))
+    """
+    rows, cols, vals, _, user_ids, item_ids = stream_interactions(path, implicit, threshold, chunksize, timestamps=False)
+    R = csr_matrix((vals, (rows, cols)), shape=(len(user_ids), len(item_ids)))
+    return R, user_ids, item_ids
+
+def load_interaction_matrix(path: str, implicit: bool = False, threshold: float = 0.0, cache: str | None = None,
+                            chunksize: int = 1_000_000):
+    """stream_interaction_matrix with an on-disk cache. Returns (R, user_ids, item_ids).
+    - cache: directory of .npy arrays plus meta.json (an .npz cannot be memory-mapped)
+    - a cache built from the same file (size and mtime) and options is memory-mapped read-only;
+      otherwise the CSV is parsed and the cache rewritten
+    """
+    st = os.stat(path)
+    meta = {'source': os.path.abspath(path), 'size': st.st_size, 'mtime_ns': st.st_mtime_ns,
+            'implicit': bool(implicit), 'threshold': float(threshold)}
+    if cache:
+        try:
+            with open(os.path.join(cache, 'meta.json')) as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            cached = None
+        if cached and all(cached.get(k) == v for k, v in meta.items()):
+            arr = lambda name: np.load(os.path.join(cache, name + '.npy'), mmap_mode='r')
+            R = csr_matrix((arr('data'), arr('indices'), arr('indptr')), shape=tuple(cached['shape']))
+            return R, arr('user_ids'), arr('item_ids')
+    R, user_ids, item_ids = stream_interaction_matrix(path, implicit, threshold, chunksize)
+    if cache:
+        os.makedirs(cache, exist_ok=True)
+        if os.path.exists(os.path.join(cache, 'meta.json')):
+            os.remove(os.path.join(cache, 'meta.json'))  # written last: a half-written cache is never read
+        arrays = {'data': R.data, 'indices': R.indices, 'indptr': R.indptr, 'user_ids': user_ids, 'item_ids': item_ids}
+        for name, a in arrays.items():
+            np.save(os.path.join(cache, name + '.npy'), a)
+        with open(os.path.join(cache, 'meta.json'), 'w') as f:
+            json.dump(dict(meta, shape=list(R.shape)), f)
+    return R, user_ids, item_ids
+
+def id_index(ids) -> dict:
+    """id -> position dict (user_map / item_map) for an id array."""
+    return {x: i for i, x in enumerate(np.asarray(ids).tolist())}
+
 def leave_one_out_split(df: pd.DataFrame, min_user_interactions: int = 2):
-    """For each user with >= min interactions, keep the most recent (or last) as test, rest train."""
-    if 'timestamp' in df.columns:
-        df_sorted = df.sort_values(['user_id','timestamp'])
-    else:
-        df_sorted = df.sort_values(['user_id'])
-    test = df_sorted.groupby('user_id').tail(1)
-    train = pd.concat([df_sorted, test]).drop_duplicates(keep=False)
-    # Filter out users with not enough interactions
-    counts = train.groupby('user_id').size()
-    keep_users = counts[counts >= (min_user_interactions - 1)].index
-    train = train[train['user_id'].isin(keep_users)]
-    test = test[test['user_id'].isin(keep_users)]
-    return train, test
+    """For each user with >= min interactions, keep the most recent (or last) as test, rest train.
+    Both frames are ordered by user, then time. Row-level arrays are in utils.split."""
+    from .split import user_groups, last_n_masks
+    users = pd.factorize(df['user_id'], sort=True)[0]  # codes in sorted id order
+    times = _timestamps(df['timestamp']) if 'timestamp' in df.columns else None
+    groups = user_groups(users, times)
+    train, test = last_n_masks(users, times, 1, min_user_interactions, groups)
+    order = groups[0]
+    return df.iloc[order[train[order]]], df.iloc[order[test[order]]]
 
 def get_user_seen_items(df: pd.DataFrame):
     return df.groupby('user_id')['item_id'].apply(set).to_dict()
\ No newline at end of file
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+
+def relevance_matrix(user_ids, item_ids, user_index, item_index):
+    """Binary CSR (len(user_index), n_cols) marking each (user, item) pair.
+    Pairs of unknown users are dropped. Items missing from item_index get
+    their own columns after the known ones, so they still count as relevant
+    but can never be hit.
+    """
+    rows = pd.Series(user_ids).map(user_index)
+    known = rows.notna().to_numpy()
+    rows = rows.to_numpy()[known].astype(np.int64)
+    items = pd.Series(item_ids)[known]
+    cols = items.map(item_index)
+    unknown = cols.isna().to_numpy()
+    cols = cols.to_numpy(dtype=float, copy=True)
+    extra, _ = pd.factorize(items[unknown])
+    cols[unknown] = len(item_index) + extra
+    cols = cols.astype(np.int64)
+    R = csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(len(user_index), len(item_index) + extra.max(initial=-1) + 1))
+    R.sum_duplicates()
+    R.data[:] = 1.0
+    return R
+
+def hit_matrix(recommended, relevant):
+    """Boolean (n_users, k): recommended[u, j] is relevant to user u. -1 entries never hit."""
+    recommended = np.asarray(recommended, dtype=np.int64)
+    relevant = csr_matrix(relevant)
+    relevant.sum_duplicates()  # canonical: sorted indices, so row-major keys are sorted
+    n_cols = relevant.shape[1]
+    rows = np.repeat(np.arange(relevant.shape[0], dtype=np.int64), np.diff(relevant.indptr))
+    keys = rows * n_cols + relevant.indices
+    query = np.arange(len(recommended), dtype=np.int64)[:, None] * n_cols + recommended
+    pos = np.minimum(np.searchsorted(keys, query), max(len(keys) - 1, 0))
+    hits = keys[pos] == query if len(keys) else np.zeros(query.shape, dtype=bool)
+    return hits & (recommended >= 0)
+
+def ranking_metrics(recommended, relevant, k=None):
+    """Precision, recall, MAP and NDCG at k for every user at once.
+
+    recommended: (n_users, >=k) item indices, best first, padded with -1.
+    relevant: CSR (n_users, n_items) whose stored entries are the relevant items.
+    Returns a dict of (n_users,) arrays with the same definitions as
+    utils.metrics (AP is normalized by the number of hits).
+    """
+    recommended = np.asarray(recommended)
+    k = recommended.shape[1] if k is None else int(k)
+    hits = hit_matrix(recommended[:, :k], relevant)
+    n_rel = np.diff(csr_matrix(relevant).indptr)
+    n_hits = hits.sum(axis=1)
+    ranks = np.arange(1, k + 1)
+    discounts = 1.0 / np.log2(ranks + 1)
+    hits = np.pad(hits, ((0, 0), (0, k - hits.shape[1])))  # fewer than k columns: the rest are misses
+    precision_at_hits = np.cumsum(hits, axis=1) / ranks
+    ideal = np.r_[0.0, np.cumsum(discounts)][np.minimum(n_rel, k)]  # all relevant items ranked first
+    return {
+        'precision': n_hits / float(k),
+        'recall': np.divide(n_hits, n_rel, out=np.zeros(len(hits)), where=n_rel > 0),
+        'map': np.divide((precision_at_hits * hits).sum(axis=1), n_hits, out=np.zeros(len(hits)), where=n_hits > 0),
+        'ndcg': np.divide(hits @ discounts, ideal, out=np.zeros(len(hits)), where=ideal > 0),
+    }
@@ -0,0 +1,63 @@
+# Train/test splits on integer-coded interaction arrays (utils.data.stream_interactions).
+# Every split returns (train, test) CSR matrices of the same shape. Users are grouped
+# with one stable sort (skipped when the log is already ordered by user and time) and
+# np.diff group boundaries; the rest is linear, with no DataFrame concatenation or row
+# hashing. Repeated interactions are kept and summed into one entry, as in
+# build_interaction_matrix.
+import numpy as np
+from scipy.sparse import csr_matrix
+
+def user_groups(users, times=None):
+    """(order, starts, counts): ``order`` sorts the interactions by user, then
+    by time, ties in input order. User group g is order[starts[g]:starts[g] + counts[g]]."""
+    users = np.asarray(users)
+    same_user = users[1:] == users[:-1]
+    ordered = np.all(users[1:] >= users[:-1]) and (times is None or np.all(~same_user | (times[1:] >= times[:-1])))
+    if ordered:
+        order = np.arange(len(users))
+    else:
+        order = np.lexsort((times, users)) if times is not None else np.argsort(users, kind='stable')
+        same_user = users[order][1:] == users[order][:-1]
+    starts = np.flatnonzero(np.r_[True, ~same_user]) if len(users) else np.empty(0, dtype=np.int64)
+    counts = np.diff(np.r_[starts, len(users)])
+    return order, starts, counts
+
+def last_n_masks(users, times=None, n=1, min_user_interactions=2, groups=None):
+    """(train, test) boolean masks: the n most recent interactions of every user
+    are test (the last n in input order without times). Users with fewer than
+    max(min_user_interactions, n + 1) interactions are in neither.
+    groups: user_groups(users, times), if the caller already has it."""
+    order, starts, counts = groups if groups is not None else user_groups(users, times)
+    size = np.repeat(counts, counts)
+    rank = np.arange(len(order)) - np.repeat(starts, counts)  # 0 = the user's oldest interaction
+    keep = size >= max(min_user_interactions, n + 1)
+    test_sorted = keep & (rank >= size - n)
+    train, test = np.zeros(len(order), dtype=bool), np.zeros(len(order), dtype=bool)
+    train[order] = keep & ~test_sorted
+    test[order] = test_sorted
+    return train, test
+
+def to_csr(users, items, values, mask, shape):
+    return csr_matrix((values[mask], (users[mask], items[mask])), shape=shape)
+
+def leave_last_n(users, items, values, shape, times=None, n=1, min_user_interactions=2):
+    """Per-user holdout of the last n interactions, as CSR (train, test)."""
+    train, test = last_n_masks(users, times, n, min_user_interactions)
+    return to_csr(users, items, values, train, shape), to_csr(users, items, values, test, shape)
+
+def leave_one_out(users, items, values, shape, times=None, min_user_interactions=2):
+    return leave_last_n(users, items, values, shape, times, 1, min_user_interactions)
+
+def time_cutoff(users, items, values, times, shape, cutoff=None, test_frac=0.2):
+    """Global temporal split: interactions after ``cutoff`` are test. By default
+    the cutoff is the time before the latest ``test_frac`` of interactions.
+    Interactions without a time are kept in train."""
+    if cutoff is None:
+        cutoff = np.nanquantile(times, 1 - test_frac)
+    test = times > cutoff
+    return to_csr(users, items, values, ~test, shape), to_csr(users, items, values, test, shape)
+
+def k_fold(users, items, values, shape, folds=5, seed=0):
+    """``folds`` random interaction-level (train, test) pairs; every interaction is tested once."""
+    fold = np.random.default_rng(seed).permutation(len(users)) % folds
+    return [(to_csr(users, items, values, fold != f, shape), to_csr(users, items, values, fold == f, shape)) for f in range(folds)]